@@ -2,14 +2,23 @@
 
 from __future__ import annotations
 
+import atexit
+import json
 import os
-from typing import Any
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Iterator
 
 from flask import Flask, Response, jsonify, render_template, request
 from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
 
-from qr_contract import GenerationRequest, QrGenerationError
-from qr_core import generate
+from qr_contract import (
+    GenerationRequest,
+    GenerationResult,
+    InternalGenerationError,
+    QrGenerationError,
+)
+from qr_core import EncodingCache, generate, generate_many
 
 
 MAX_REQUEST_BYTES = 16_384
@@ -22,13 +31,33 @@ API_FIELDS = frozenset(
         "background",
         "border",
         "outputName",
+        "maskSelection",
+        "svgPath",
     }
 )
 REQUIRED_API_FIELDS = frozenset({"payloadType", "fields"})
 
+# NDJSON batches have their own body and item limits. MAX_REQUEST_BYTES still
+# bounds every single-item request and every batch line.
+MAX_BATCH_BYTES = 1_048_576
+MAX_BATCH_ITEMS = 500
+BATCH_WORKERS = min(4, os.cpu_count() or 1)
+# Small chunks, so each line is sent soon after its item is generated.
+BATCH_CHUNKSIZE = 8
+
+# Popular public payloads (URLs and plain email addresses) skip the version and
+# mask search on a repeat. Every other payload, including email with a subject
+# or body, is sensitive and is not cached here.
+ENCODING_CACHE = EncodingCache(max_entries=4096, ttl_seconds=3600.0)
+
 app = Flask(__name__)
 app.config["MAX_CONTENT_LENGTH"] = MAX_REQUEST_BYTES
 
+# One process pool per server process, started by the first batch request and
+# shut down at exit. Tests may patch in any executor.
+_BATCH_EXECUTOR: Executor | None = None
+_BATCH_EXECUTOR_LOCK = threading.Lock()
+
 
 class ApiContractError(Exception):
     def __init__(self, code: str, message: str) -> None:
@@ -62,6 +91,8 @@ def _parse_api_request(data: dict[str, Any]) -> GenerationRequest:
         background=data.get("background", "#FFFFFF"),
         border=data.get("border", 4),
         output_name=data.get("outputName"),
+        mask_selection=data.get("maskSelection", "exact"),
+        svg_path=data.get("svgPath", "modules"),
     )
 
 
@@ -83,8 +114,9 @@ def request_too_large(_error: RequestEntityTooLarge) -> tuple[Response, int]:
     )
 
 
-@app.post("/api/generate")
-def generate_qr() -> tuple[Response, int] | Response:
+def _generate_from_request() -> GenerationResult | tuple[Response, int]:
+    """Parse the JSON request and generate a lean result, or return an error."""
+
     if request.mimetype != "application/json":
         return _error_response(
             "unsupported_media_type",
@@ -109,7 +141,7 @@ def generate_qr() -> tuple[Response, int] | Response:
 
     try:
         canonical_request = _parse_api_request(data)
-        result = generate(canonical_request)
+        result = generate(canonical_request, cache=ENCODING_CACHE, lean=True)
     except ApiContractError as error:
         return _error_response(error.code, error.message, 400)
     except QrGenerationError as error:
@@ -121,10 +153,186 @@ def generate_qr() -> tuple[Response, int] | Response:
         return _error_response(
             "internal_error", "QR generation failed unexpectedly.", 500
         )
+    return result
 
+
+@app.post("/api/generate")
+def generate_qr() -> tuple[Response, int] | Response:
+    result = _generate_from_request()
+    if not isinstance(result, GenerationResult):
+        return result
     return jsonify(result.to_public_dict())
 
 
+@app.post("/api/generate/svg")
+def generate_qr_svg() -> tuple[Response, int] | Response:
+    """Stream only the SVG document, rendered row by row as it is sent.
+
+    The request body and errors are the same as `/api/generate`. Every
+    validation runs before the first byte is sent, so errors keep their JSON
+    envelope and status.
+    """
+
+    result = _generate_from_request()
+    if not isinstance(result, GenerationResult):
+        return result
+    return Response(result.svg_chunks(), mimetype="image/svg+xml")
+
+
+def _batch_executor() -> Executor:
+    global _BATCH_EXECUTOR
+    with _BATCH_EXECUTOR_LOCK:
+        if _BATCH_EXECUTOR is None:
+            _BATCH_EXECUTOR = ProcessPoolExecutor(BATCH_WORKERS)
+        return _BATCH_EXECUTOR
+
+
+@atexit.register
+def shutdown_batch_executor() -> None:
+    """Shut down the batch pool, if any; the next batch starts a new one."""
+
+    global _BATCH_EXECUTOR
+    with _BATCH_EXECUTOR_LOCK:
+        executor, _BATCH_EXECUTOR = _BATCH_EXECUTOR, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _ndjson_line(value: dict[str, Any]) -> bytes:
+    text = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return text.encode("utf-8") + b"\n"
+
+
+def _item_error(index: int, code: str, message: str, status: int) -> bytes:
+    return _ndjson_line(
+        {"index": index, "status": status, "error": {"code": code, "message": message}}
+    )
+
+
+def _parse_batch_line(line: bytes) -> GenerationRequest:
+    try:
+        data = json.loads(line)
+    except ValueError:
+        raise ApiContractError(
+            "invalid_json", "Batch line must contain valid JSON."
+        ) from None
+    if not isinstance(data, dict):
+        raise ApiContractError(
+            "invalid_request_shape", "Batch line must be a JSON object."
+        )
+    return _parse_api_request(data)
+
+
+def _batch_lines(
+    failures: list[bytes],
+    requests: list[GenerationRequest],
+    positions: list[int],
+) -> Iterator[bytes]:
+    yield from failures
+    try:
+        for offset, outcome in generate_many(
+            requests,
+            chunksize=BATCH_CHUNKSIZE,
+            ordered=False,
+            lean=True,
+            executor=_batch_executor(),
+        ):
+            index = positions[offset]
+            if isinstance(outcome, InternalGenerationError):
+                app.logger.error(
+                    "Unexpected QR batch item failure (index=%d, type=%s)",
+                    index,
+                    outcome.error_type,
+                )
+            if isinstance(outcome, QrGenerationError):
+                yield _item_error(
+                    index, outcome.code, outcome.message, outcome.http_status
+                )
+            else:
+                yield _ndjson_line(
+                    {"index": index, "status": 200, **outcome.to_public_dict()}
+                )
+    except Exception as error:  # Deliberately safe unexpected-error boundary.
+        app.logger.error(
+            "Unexpected QR batch failure (type=%s)", type(error).__name__
+        )
+        yield _ndjson_line(
+            {
+                "error": {
+                    "code": "internal_error",
+                    "message": "QR batch generation failed unexpectedly.",
+                }
+            }
+        )
+
+
+@app.post("/api/generate/batch")
+def generate_qr_batch() -> tuple[Response, int] | Response:
+    """Generate an NDJSON batch and stream one NDJSON line back per item.
+
+    Each non-blank line is one `/api/generate` request object. Every response
+    line carries the item's zero-based ``index`` and the ``status`` the
+    single-item endpoint would return, with either the public result or its
+    error envelope. A line longer than `MAX_REQUEST_BYTES` fails alone, as the
+    same request would on its own. Lines are sent as items finish, so they are not in input
+    order. Items are generated on a process pool shared by all batches. Body,
+    media type, and item-count errors fail the whole batch before streaming.
+    """
+
+    if request.mimetype != "application/x-ndjson":
+        return _error_response(
+            "unsupported_media_type",
+            "Content-Type must be application/x-ndjson.",
+            415,
+        )
+
+    too_large = _error_response(
+        "request_too_large",
+        f"Batch request bodies cannot exceed {MAX_BATCH_BYTES} bytes.",
+        413,
+    )
+    if request.content_length is not None and request.content_length > MAX_BATCH_BYTES:
+        return too_large
+    request.max_content_length = MAX_BATCH_BYTES
+    try:
+        body = request.get_data(cache=False)
+    except RequestEntityTooLarge:
+        return too_large
+
+    lines = [line for line in body.splitlines() if line.strip()]
+    if len(lines) > MAX_BATCH_ITEMS:
+        return _error_response(
+            "batch_too_large",
+            f"Batches cannot contain more than {MAX_BATCH_ITEMS} items.",
+            413,
+        )
+
+    # Malformed lines fail alone and are reported first, without the pool.
+    failures: list[bytes] = []
+    requests: list[GenerationRequest] = []
+    positions: list[int] = []
+    for index, line in enumerate(lines):
+        if len(line) > MAX_REQUEST_BYTES:
+            failures.append(
+                _item_error(
+                    index,
+                    "request_too_large",
+                    f"Batch lines cannot exceed {MAX_REQUEST_BYTES} bytes.",
+                    413,
+                )
+            )
+            continue
+        try:
+            requests.append(_parse_batch_line(line))
+        except ApiContractError as error:
+            failures.append(_item_error(index, error.code, error.message, 400))
+        else:
+            positions.append(index)
+    return Response(
+        _batch_lines(failures, requests, positions), mimetype="application/x-ndjson"
+    )
+
+
 @app.get("/")
 def index() -> str:
     return render_template("index.html")
@@ -0,0 +1,309 @@
+"""Measure per-code generation latency for representative QR versions.
+
+This is a maintainer tool for comparing encoder and renderer changes on the
+same machine. It prints one row per version and mode with the median and best
+wall-clock latency of a single code, so a change can be judged where it starts
+to pay off rather than from one aggregate number. The last column is how many
+of the eight candidates' rows and columns the mask search actually scored.
+The NumPy engine always scores them all, so use ``--engine python`` to see
+what the cutoff of the pure-Python search skips.
+A second table compares exact and fast mask selection over several payloads
+per version. It reports median latency and the mean penalty of the chosen mask.
+A third table times SVG rendering of one symbol per version: the original
+per-module formatter from the test helpers, the packed-row renderer, its
+streamed chunk variant, and the run-length and outline path modes, plus PNG and
+PBM output at 8 pixels per module. It also reports each document's size and how
+much smaller it is than the per-module SVG. A last table measures batch
+throughput of `qr_core.generate_many` against serial `generate` as the process
+pool grows from one worker to ``--workers``.
+
+Usage:
+
+    python benchmark.py [--versions 5,10,25,40] [--repeat 15] [--workers N]
+                        [--engine python|numpy]
+
+Redirect the output to `bench_output.txt` (ignored by Git) to keep a run for
+comparison. Payloads are deterministic pseudo-random bytes sized to fill each
+version at ECL M, so runs on different machines encode the same symbols.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable, TypeVar
+
+from qr_contract import GenerationRequest
+from qr_core import generate, generate_many
+from qr_matrix import ModuleMatrix
+from qr_raster import render_pbm, render_png
+from qr_svg import iter_svg_chunks, render_svg
+from qrcodegen import QrCode, QrSegment
+from tests.helpers import render_svg_per_module
+
+DEFAULT_VERSIONS = (5, 10, 25, 40)
+DEFAULT_REPEAT = 15
+MASK_SELECTION_SAMPLES = 5
+BATCH_SIZE = 512
+ECL = QrCode.Ecc.MEDIUM
+
+T = TypeVar("T")
+
+
+def _payload_for_version(version: int, seed: int = 0) -> bytes:
+    """Return the largest byte payload that still encodes at ``version``."""
+
+    generator = random.Random(version + 1000 * seed)
+    low, high = 1, 2331
+    while low < high:
+        middle = (low + high + 1) // 2
+        needed = QrCode.find_min_version(
+            lambda candidate: QrSegment.get_total_bits(
+                [QrSegment.make_bytes(bytes(middle))], candidate
+            ),
+            ECL,
+        )
+        if needed is not None and needed <= version:
+            low = middle
+        else:
+            high = middle - 1
+    return bytes(generator.randrange(256) for _ in range(low))
+
+
+def _time(action: Callable[[], T], repeat: int) -> tuple[float, float, T]:
+    result = action()  # Warm per-version caches and pool workers outside the samples.
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = action()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, min(samples) * 1000, result
+
+
+def _mask_modes(workers: int) -> list[tuple[str, Callable[[], Executor | None]]]:
+    return [
+        ("serial masks", lambda: None),
+        (f"process pool x{workers}", lambda: ProcessPoolExecutor(workers)),
+        (f"thread pool x{workers}", lambda: ThreadPoolExecutor(workers)),
+    ]
+
+
+def run(versions: Iterable[int], repeat: int, workers: int) -> int:
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(
+        f"# Python {platform.python_version()} ({platform.python_implementation()}), "
+        f"{os.cpu_count()} CPUs, GIL {'enabled' if gil else 'disabled'}, "
+        f"{QrCode.get_matrix_engine()} matrix engine, {repeat} samples per row"
+    )
+    if QrCode.get_matrix_engine() == "numpy":
+        print(
+            "# The NumPy engine scores every candidate in full; "
+            "run with --engine python to see the cutoff's lines scored"
+        )
+    print(
+        f"{'version':>7}  {'mode':<22} {'median ms':>10} {'best ms':>9} "
+        f"{'lines scored':>14}"
+    )
+    for label, make_executor in _mask_modes(workers):
+        executor = make_executor()
+        try:
+            for version in versions:
+                segments = [QrSegment.make_bytes(_payload_for_version(version))]
+                median, best, qr = _time(
+                    lambda: QrCode.encode_segments(
+                        segments, ECL, boostecl=False, maskexecutor=executor
+                    ),
+                    repeat,
+                )
+                lines = f"{qr.get_penalty_lines_scored()}/{16 * qr.get_size()}"
+                print(
+                    f"{version:>7}  {label:<22} {median:>10.2f} {best:>9.2f} "
+                    f"{lines:>14}"
+                )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+    _run_mask_selection(versions, repeat)
+    _run_svg_rendering(versions, repeat)
+    _run_batch_throughput(workers)
+    return 0
+
+
+def _penalty(qr: QrCode) -> int:
+    return QrCode._compute_penalty(qr.get_size(), qr._modules)[0]
+
+
+def _run_mask_selection(versions: Iterable[int], repeat: int) -> None:
+    print()
+    print(
+        f"{'version':>7}  {'mask selection':<22} {'median ms':>10} {'best ms':>9} "
+        f"{'mean penalty':>14}"
+    )
+    for version in versions:
+        payloads = [
+            [QrSegment.make_bytes(_payload_for_version(version, seed))]
+            for seed in range(MASK_SELECTION_SAMPLES)
+        ]
+        for label, fast in (("exact", False), ("fast", True)):
+            medians, bests, penalties = [], [], []
+            for segments in payloads:
+                median, best, qr = _time(
+                    lambda: QrCode.encode_segments(
+                        segments, ECL, boostecl=False, fastmask=fast
+                    ),
+                    repeat,
+                )
+                medians.append(median)
+                bests.append(best)
+                penalties.append(_penalty(qr))
+            print(
+                f"{version:>7}  {label:<22} {statistics.median(medians):>10.2f} "
+                f"{min(bests):>9.2f} {statistics.mean(penalties):>14.1f}"
+            )
+
+
+def _run_svg_rendering(versions: Iterable[int], repeat: int) -> None:
+    print()
+    print(
+        f"{'version':>7}  {'renderer':<22} {'median ms':>10} {'best ms':>9} "
+        f"{'speedup':>8} {'KiB':>7} {'smaller':>8}"
+    )
+    renderers: tuple[tuple[str, Callable[..., str | bytes]], ...] = (
+        ("per-module reference", render_svg_per_module),
+        ("packed rows", render_svg),
+        ("streamed chunks", lambda *args: b"".join(iter_svg_chunks(*args))),
+        ("run-length path", lambda *args: render_svg(*args, "runs")),
+        ("outline path", lambda *args: render_svg(*args, "outline")),
+        ("png, 8 px per module", lambda *args: render_png(*args, 8)),
+        ("pbm, 8 px per module", lambda m, border, *_: render_pbm(m, border, 8)),
+    )
+    for version in versions:
+        qr = QrCode.encode_segments(
+            [QrSegment.make_bytes(_payload_for_version(version))], ECL, boostecl=False
+        )
+        matrix = ModuleMatrix(qr.get_size(), qr.get_packed_rows())
+        baseline_ms = baseline_size = None
+        for label, renderer in renderers:
+            median, best, svg = _time(
+                lambda: renderer(matrix, 4, "#FFFFFF", "#000000"), repeat
+            )
+            baseline_ms = baseline_ms or median
+            baseline_size = baseline_size or len(svg)
+            print(
+                f"{version:>7}  {label:<22} {median:>10.2f} {best:>9.2f} "
+                f"{baseline_ms / median:>7.1f}x {len(svg) / 1024:>7.1f} "
+                f"{1 - len(svg) / baseline_size:>8.0%}"
+            )
+
+
+def _worker_counts(workers: int) -> list[int]:
+    counts = [1]
+    while counts[-1] * 2 < workers:
+        counts.append(counts[-1] * 2)
+    return counts + [workers] if workers > 1 else counts
+
+
+def _run_batch_throughput(workers: int) -> None:
+    print()
+    print(
+        f"{'batch':>7}  {'mode':<22} {'seconds':>10} {'codes/s':>9} {'speedup':>8}"
+    )
+    requests = [
+        GenerationRequest(
+            payload_type="url",
+            fields={"url": f"https://example.com/items/{index:06d}?ref=batch"},
+        )
+        for index in range(BATCH_SIZE)
+    ]
+
+    def serial() -> None:
+        for request in requests:
+            generate(request).svg
+
+    modes: list[tuple[str, Callable[[], None], Executor | None]] = [
+        ("serial generate", serial, None)
+    ]
+    for count in _worker_counts(workers):
+        executor = ProcessPoolExecutor(count)
+        modes.append(
+            (
+                f"generate_many x{count}",
+                lambda count=count, executor=executor: _drain(
+                    generate_many(requests, workers=count, executor=executor)
+                ),
+                executor,
+            )
+        )
+    baseline = None
+    try:
+        for label, action, _executor in modes:
+            # Best of three, after a warm-up that also starts the pool's workers.
+            _, best, _ = _time(action, 3)
+            seconds = best / 1000
+            baseline = baseline or seconds
+            print(
+                f"{BATCH_SIZE:>7}  {label:<22} {seconds:>10.3f} "
+                f"{BATCH_SIZE / seconds:>9.0f} {baseline / seconds:>7.1f}x"
+            )
+    finally:
+        for _label, _action, executor in modes:
+            if executor is not None:
+                executor.shutdown()
+
+
+def _drain(outcomes: Iterable[object]) -> None:
+    for _ in outcomes:
+        pass
+
+
+def _parse_versions(value: str) -> tuple[int, ...]:
+    versions = tuple(int(part) for part in value.split(",") if part.strip())
+    if not versions or not all(
+        QrCode.MIN_VERSION <= version <= QrCode.MAX_VERSION for version in versions
+    ):
+        raise argparse.ArgumentTypeError("versions must be between 1 and 40")
+    return versions
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--versions",
+        type=_parse_versions,
+        default=DEFAULT_VERSIONS,
+        help="comma-separated QR versions to measure (default: 5,10,25,40)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help=f"timed samples per row (default: {DEFAULT_REPEAT})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=min(8, os.cpu_count() or 1),
+        help="pool size for the concurrent mask modes and the largest batch pool "
+        "(default: CPUs, at most 8)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=("python", "numpy"),
+        help="matrix engine of the serial mask search (default: numpy if installed)",
+    )
+    arguments = parser.parse_args(list(argv) if argv is not None else None)
+    try:
+        QrCode.set_matrix_engine(arguments.engine)
+    except ValueError as error:
+        parser.error(str(error))
+    return run(arguments.versions, max(1, arguments.repeat), max(1, arguments.workers))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -7,10 +7,10 @@ import re
 import sys
 from getpass import getpass
 from pathlib import Path
-from typing import Mapping
+from typing import Mapping, Sequence
 
 from qr_contract import GenerationRequest, GenerationResult, QrGenerationError
-from qr_core import generate
+from qr_core import encode, render
 from qr_files import save_svg_exclusive
 
 
@@ -163,15 +163,14 @@ def collect_request() -> GenerationRequest:
     )
 
 
-def print_qr_terminal(
-    matrix: tuple[tuple[bool, ...], ...], border: int = 2
-) -> None:
+def print_qr_terminal(matrix: Sequence[Sequence[bool]], border: int = 2) -> None:
     print("\nQR preview:")
     size = len(matrix)
     for y in range(-border, size + border):
+        row = matrix[y] if 0 <= y < size else ()
         line = []
         for x in range(-border, size + border):
-            dark = 0 <= x < size and 0 <= y < size and matrix[y][x]
+            dark = 0 <= x < size and 0 <= y < size and row[x]
             line.append("██" if dark else "  ")
         print("".join(line))
     print()
@@ -204,9 +203,11 @@ def run_interactive(output_directory: str | Path = "saved") -> int:
     while True:
         try:
             request = collect_request()
-            result = generate(request)
+            symbol = encode(request)
+            # A lean result streams its SVG to the file without building the document
+            result = render(symbol, request.presentation, lean=True)
             path = save_svg_exclusive(
-                result.svg, request.output_name, directory=output_directory
+                result.svg_chunks(), request.output_name, directory=output_directory
             )
         except QrGenerationError as error:
             print(f"\nError [{error.code}]: {error.message}")
@@ -221,7 +222,7 @@ def run_interactive(output_directory: str | Path = "saved") -> int:
                     "Reveal exact encoded payload? This may expose private content (y/n) [n]: "
                 ).strip().lower()
                 if reveal == "y":
-                    print(f"Encoded payload: {result.encoded_payload}")
+                    print(f"Encoded payload: {symbol.encoded_payload}")
 
         if input("Create another QR code? (y/n) [n]: ").strip().lower() != "y":
             return 0
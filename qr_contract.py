@@ -3,7 +3,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Mapping
+from functools import cached_property
+from typing import Iterator, Mapping
+
+from qr_matrix import ModuleMatrix
+from qr_raster import DEFAULT_SCALE, iter_pbm_chunks, iter_png_chunks
+from qr_svg import SVG_CHUNK_BYTES, iter_svg_chunks, render_svg
 
 
 class QrGenerationError(Exception):
@@ -16,6 +21,10 @@ class QrGenerationError(Exception):
         self.code = code
         self.message = message
 
+    def __reduce__(self) -> tuple[type[QrGenerationError], tuple[str, str]]:
+        # Keeps errors picklable, so they can cross process-pool boundaries.
+        return (type(self), (self.code, self.message))
+
 
 class ValidationError(QrGenerationError):
     """The request is structurally valid but contains an invalid value."""
@@ -29,6 +38,19 @@ class CapacityError(QrGenerationError):
     """The valid encoded payload cannot fit under the declared QR limits."""
 
 
+class InternalGenerationError(QrGenerationError):
+    """An unexpected failure of one batch item, named only by its exception type."""
+
+    http_status = 500
+
+    def __init__(self, error_type: str) -> None:
+        super().__init__("internal_error", "QR generation failed unexpectedly.")
+        self.error_type = error_type
+
+    def __reduce__(self) -> tuple[type[InternalGenerationError], tuple[str]]:
+        return (type(self), (self.error_type,))
+
+
 @dataclass(frozen=True)
 class GenerationWarning:
     """A stable warning code plus a public message that never contains payload data."""
@@ -51,6 +73,31 @@ class GenerationRequest:
     background: str = "#FFFFFF"
     border: int = 4
     output_name: str | None = None
+    mask_selection: str = "exact"
+    svg_path: str = "modules"
+
+    @property
+    def presentation(self) -> Presentation:
+        """The presentation half of this request, for `qr_core.render`."""
+
+        return Presentation(
+            foreground=self.foreground,
+            background=self.background,
+            border=self.border,
+            output_name=self.output_name,
+            svg_path=self.svg_path,
+        )
+
+
+@dataclass(frozen=True)
+class Presentation:
+    """Colors, quiet zone, file name, and SVG path mode for an encoded symbol."""
+
+    foreground: str = "#000000"
+    background: str = "#FFFFFF"
+    border: int = 4
+    output_name: str | None = None
+    svg_path: str = "modules"
 
 
 @dataclass(frozen=True)
@@ -64,33 +111,99 @@ class ScanabilityAssessment:
 
 
 @dataclass(frozen=True)
-class GenerationResult:
-    """Canonical result shared by terminal, Flask, and tests."""
+class EncodedSymbol:
+    """A built payload encoded as a QR symbol, before any presentation choice.
+
+    Produced by `qr_core.encode` and turned into a `GenerationResult` by
+    `qr_core.render`, any number of times. ``warnings`` are the payload
+    warnings; scanability warnings depend on the presentation.
+    """
 
     payload_type: str
     encoded_payload: str
     payload_bytes: int
     summary: str
     sensitive: bool
-    svg: str
-    matrix: tuple[tuple[bool, ...], ...]
+    matrix: ModuleMatrix
+    version: int
+    module_count: int
+    mask: int
+    mask_selection: str
+    requested_error_correction: str
+    actual_error_correction: str
+    warnings: tuple[GenerationWarning, ...] = field(default_factory=tuple)
+
+
+@dataclass(frozen=True)
+class GenerationResult:
+    """Canonical result shared by terminal, Flask, and tests.
+
+    ``svg`` is derived from the matrix, border, colors, and path mode. It is
+    rendered on first access and then kept; `qr_core.render` touches it right
+    away unless asked for a lean result. A lean result also has ``encoded_payload`` set to
+    None, so the exact payload text is not kept alive by the result.
+    """
+
+    payload_type: str
+    encoded_payload: str | None
+    payload_bytes: int
+    summary: str
+    sensitive: bool
+    matrix: ModuleMatrix
     version: int
     module_count: int
     mask: int
+    mask_selection: str
     requested_error_correction: str
     actual_error_correction: str
     foreground: str
     background: str
     border: int
+    svg_path: str
     output_filename: str
     scanability: ScanabilityAssessment
     warnings: tuple[GenerationWarning, ...] = field(default_factory=tuple)
 
+    @cached_property
+    def svg(self) -> str:
+        return render_svg(
+            self.matrix, self.border, self.background, self.foreground, self.svg_path
+        )
+
+    def svg_chunks(self, chunk_size: int = SVG_CHUNK_BYTES) -> Iterator[bytes]:
+        """Yield ``svg`` as UTF-8 chunks, rendering rows as the chunks are read.
+
+        This does not fill the cached ``svg``, so streaming a lean result never
+        holds the whole document.
+        """
+
+        return iter_svg_chunks(
+            self.matrix,
+            self.border,
+            self.background,
+            self.foreground,
+            self.svg_path,
+            chunk_size,
+        )
+
+    def png_chunks(self, scale: int = DEFAULT_SCALE) -> Iterator[bytes]:
+        """Yield a 1-bit PNG of the symbol with ``scale`` pixels per module."""
+
+        return iter_png_chunks(
+            self.matrix, self.border, self.background, self.foreground, scale
+        )
+
+    def pbm_chunks(self, scale: int = DEFAULT_SCALE) -> Iterator[bytes]:
+        """Yield a black-and-white PBM of the symbol, ignoring its colors."""
+
+        return iter_pbm_chunks(self.matrix, self.border, scale)
+
     def to_public_dict(self) -> dict[str, object]:
         """Return the payload-safe API representation.
 
-        The exact payload intentionally stays on the in-process result so parity
-        and decode tests can compare it. It is not copied into the HTTP metadata.
+        The exact payload intentionally stays on the in-process result (unless
+        it is lean) so parity and decode tests can compare it. It is not copied
+        into the HTTP metadata.
         """
 
         return {
@@ -103,11 +216,13 @@ class GenerationResult:
                 "version": self.version,
                 "moduleCount": self.module_count,
                 "mask": self.mask,
+                "maskSelection": self.mask_selection,
                 "requestedErrorCorrection": self.requested_error_correction,
                 "actualErrorCorrection": self.actual_error_correction,
                 "foreground": self.foreground,
                 "background": self.background,
                 "border": self.border,
+                "svgPath": self.svg_path,
                 "contrastRatio": self.scanability.contrast_ratio,
                 "polarity": self.scanability.polarity,
                 "scanability": self.scanability.status,
@@ -2,21 +2,51 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import hmac
+import itertools
+import os
 import re
-from typing import Iterable
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    Literal,
+    overload,
+)
 
 from qrcodegen import DataTooLongError, QrCode, QrSegment
 
 from qr_contract import (
     CapacityError,
+    EncodedSymbol,
     GenerationRequest,
     GenerationResult,
     GenerationWarning,
+    InternalGenerationError,
+    Presentation,
+    QrGenerationError,
     ScanabilityAssessment,
     ValidationError,
 )
 from qr_files import sanitize_filename
-from qr_payloads import build_payload
+from qr_matrix import ModuleMatrix
+from qr_svg import SVG_PATHS, render_svg
+from qr_payloads import BuiltPayload, build_payload
 
 
 DEFAULT_BORDER = 4
@@ -28,11 +58,20 @@ MIN_CONTRAST = 3.0
 RECOMMENDED_CONTRAST = 4.5
 PIXELS_PER_MODULE_GUIDANCE = 8
 
-# Conservative byte-mode maxima for a version-40 QR. Numeric/alphanumeric text
-# could theoretically fit more characters, but a UTF-8 byte ceiling is stable
-# across payload kinds and prevents input-dependent surprises.
+# Byte-mode maxima for a version-40 QR. Payloads that are entirely numeric or
+# alphanumeric are encoded in those denser modes and may hold more characters;
+# `fit_version` gives the exact answer for any payload.
 MAX_PAYLOAD_BYTES = {"L": 2953, "M": 2331, "Q": 1663, "H": 1273}
 
+# "exact" runs the full ISO/IEC 18004 penalty search; "fast" ranks masks with a
+# cheaper estimate on the pure-Python engine up to version 3, and is otherwise
+# the same as "exact".
+MASK_SELECTIONS = ("exact", "fast")
+
+# No payload longer than this can fit any version (7,089 digits in numeric mode
+# at ECL L), so longer input is rejected without inspecting its characters.
+_MAX_ENCODABLE_BYTES = 7089
+
 _HEX_COLOR_RE = re.compile(r"^#[0-9A-Fa-f]{6}$")
 _ECL_BY_CODE = {
     "L": QrCode.Ecc.LOW,
@@ -133,37 +172,8 @@ def _assess_scanability(
     return assessment, tuple(warnings)
 
 
-def render_svg(
-    matrix: tuple[tuple[bool, ...], ...],
-    border: int,
-    background: str,
-    foreground: str,
-) -> str:
-    """Render a deterministic minimal SVG from a validated module matrix."""
-
-    size = len(matrix)
-    dimension = size + border * 2
-    path = " ".join(
-        f"M{x + border},{y + border}h1v1h-1z"
-        for y, row in enumerate(matrix)
-        for x, dark in enumerate(row)
-        if dark
-    )
-    return (
-        '<?xml version="1.0" encoding="UTF-8"?>\n'
-        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {dimension} {dimension}" '
-        'shape-rendering="crispEdges">\n'
-        f'  <rect width="100%" height="100%" fill="{background}"/>\n'
-        f'  <path fill="{foreground}" d="{path}"/>\n'
-        "</svg>\n"
-    )
-
-
-def _matrix_from_qr(qr: QrCode) -> tuple[tuple[bool, ...], ...]:
-    return tuple(
-        tuple(qr.get_module(x, y) for x in range(qr.get_size()))
-        for y in range(qr.get_size())
-    )
+def _matrix_from_qr(qr: QrCode) -> ModuleMatrix:
+    return ModuleMatrix(qr.get_size(), qr.get_packed_rows())
 
 
 def _validate_error_correction(value: object) -> str:
@@ -175,6 +185,24 @@ def _validate_error_correction(value: object) -> str:
     return value
 
 
+def _validate_mask_selection(value: object) -> str:
+    if not isinstance(value, str) or value not in MASK_SELECTIONS:
+        raise ValidationError(
+            "invalid_mask_selection",
+            "Mask selection must be exact or fast.",
+        )
+    return value
+
+
+def _validate_svg_path(value: object) -> str:
+    if not isinstance(value, str) or value not in SVG_PATHS:
+        raise ValidationError(
+            "invalid_svg_path",
+            "SVG path must be modules, runs, or outline.",
+        )
+    return value
+
+
 def _encoded_utf8(payload: str) -> bytes:
     try:
         return payload.encode("utf-8")
@@ -185,44 +213,219 @@ def _encoded_utf8(payload: str) -> bytes:
         ) from exc
 
 
-def generate(request: GenerationRequest) -> GenerationResult:
-    """Validate, build, encode, assess, and render one canonical request."""
-
-    if not isinstance(request, GenerationRequest):
-        raise TypeError("generate() requires a GenerationRequest")
+def _single_segment(text: str, payload_bytes: bytes) -> list[QrSegment]:
+    if not text:
+        return []
+    if QrSegment.is_numeric(text):
+        return [QrSegment.make_numeric(text)]
+    return [QrSegment.make_bytes(payload_bytes)]
+
+
+def _single_segment_version(
+    text: str, payload_bytes: bytes, ecl: QrCode.Ecc
+) -> int | None:
+    # Segment sizes from ISO/IEC 18004 without building the segment itself.
+    if not text:
+        return QrCode.find_min_version(lambda version: 0, ecl)
+    if QrSegment.is_numeric(text):
+        mode = QrSegment.Mode.NUMERIC
+        count = len(text)
+        data_bits = count // 3 * 10 + (0, 4, 7)[count % 3]
+    else:
+        mode = QrSegment.Mode.BYTE
+        count = len(payload_bytes)
+        data_bits = count * 8
+
+    def total_bits(version: int) -> int | None:
+        count_bits = mode.num_char_count_bits(version)
+        if count >= 1 << count_bits:
+            return None
+        return 4 + count_bits + data_bits
+
+    return QrCode.find_min_version(total_bits, ecl)
+
+
+def _plan_segments(
+    text: str, payload_bytes: bytes, error_correction: str
+) -> tuple[int, list[QrSegment]] | None:
+    """Return the smallest fitting version and its segments, or None.
+
+    ASCII text is split optimally across numeric, alphanumeric, and byte
+    segments. Other text stays one byte segment: decoders guess the character
+    set of each byte segment on its own, and a short UTF-8 fragment can be
+    misread. Both paths reject oversize payloads from the capacity table before
+    any segment is built.
+    """
+
+    if len(payload_bytes) > _MAX_ENCODABLE_BYTES:
+        return None
+    ecl = _ECL_BY_CODE[error_correction]
+    if text.isascii() and not QrSegment.is_numeric(text):
+        try:
+            version, segments = QrSegment.make_segments_optimally_with_version(
+                text, ecl, QrCode.MIN_VERSION, QrCode.MAX_VERSION
+            )
+        except DataTooLongError:
+            return None
+    else:
+        version = _single_segment_version(text, payload_bytes, ecl)
+        if version is None:
+            return None
+        segments = _single_segment(text, payload_bytes)
+    return version, segments
+
+
+def fit_version(payload: str, error_correction: str) -> int | None:
+    """Return the smallest QR version that holds a built payload, or None.
+
+    This is the exact segmentation and version search `generate` performs, so
+    a None here is the same `payload_too_large` that `generate` would raise.
+    """
+
+    requested_ecl = _validate_error_correction(error_correction)
+    plan = _plan_segments(payload, _encoded_utf8(payload), requested_ecl)
+    return None if plan is None else plan[0]
+
+
+@dataclass(frozen=True)
+class _Encoding:
+    """The presentation-independent outcome of the version and mask search."""
+
+    matrix: ModuleMatrix
+    version: int
+    mask: int
+    actual_error_correction: str
+
+
+@dataclass(frozen=True)
+class EncodingCacheStats:
+    """Point-in-time counters of an `EncodingCache`."""
+
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    entries: int
+
+
+class EncodingCache:
+    """Bounded, thread-safe LRU cache of encoded symbols for `generate`.
+
+    Entries hold the module matrix, version, mask, and actual error correction
+    of one built payload at one requested error correction and mask selection.
+    Colors, border, and file name are not part of an entry, so a hit only
+    repeats the cheap validation and rendering.
+
+    Keys are HMAC-SHA256 digests under a secret that defaults to random bytes
+    per process, so the cache never holds payload text as a key. The matrix
+    itself still encodes the payload, which is why sensitive payloads such as
+    WiFi credentials are skipped unless ``include_sensitive`` is true.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600.0,
+        *,
+        include_sensitive: bool = False,
+        secret: bytes | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if not ttl_seconds > 0:
+            raise ValueError("ttl_seconds must be positive")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.include_sensitive = include_sensitive
+        self._secret = os.urandom(32) if secret is None else secret
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[bytes, tuple[float, _Encoding]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def key(
+        self, payload_bytes: bytes, error_correction: str, mask_selection: str
+    ) -> bytes:
+        """Return the entry key of a built payload's UTF-8 bytes and encoder options."""
+
+        options = f"{error_correction}\x00{mask_selection}\x00".encode("ascii")
+        return hmac.new(self._secret, options + payload_bytes, hashlib.sha256).digest()
+
+    def get(self, key: bytes) -> _Encoding | None:
+        """Return the live entry for a key and mark it recently used, or None."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, key: bytes, encoding: _Encoding) -> None:
+        """Store an entry, evicting the least recently used beyond the bound."""
+
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, encoding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry. Counters keep running."""
+
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> EncodingCacheStats:
+        """Return a snapshot of the hit, miss, eviction, and expiration counters."""
+
+        with self._lock:
+            return EncodingCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                entries=len(self._entries),
+            )
 
-    try:
-        built = build_payload(request.payload_type, request.fields)
-    except UnicodeError as exc:
-        raise ValidationError(
-            "invalid_unicode",
-            "Payload text must contain valid Unicode scalar values.",
-        ) from exc
-    requested_ecl = _validate_error_correction(request.requested_error_correction)
-    foreground = _normalize_color(request.foreground, "Foreground")
-    background = _normalize_color(request.background, "Background")
-    output_filename = sanitize_filename(request.output_name)
-    # Reject unsafe/invalid presentation choices before the comparatively costly
-    # version/mask search. The final call below fills dimension guidance once the
-    # actual module count is known.
-    _assess_scanability(foreground, background, request.border, 0)
-    payload_bytes = _encoded_utf8(built.text)
 
-    maximum = MAX_PAYLOAD_BYTES[requested_ecl]
-    if len(payload_bytes) > maximum:
+def _encode_payload(
+    text: str,
+    payload_bytes: bytes,
+    requested_ecl: str,
+    mask_selection: str,
+    mask_executor: Executor | None,
+) -> _Encoding:
+    plan = _plan_segments(text, payload_bytes, requested_ecl)
+    if plan is None:
         raise CapacityError(
             "payload_too_large",
-            f"Payload exceeds the {maximum}-byte limit for error correction {requested_ecl}.",
+            f"Payload exceeds version-40 capacity for error correction {requested_ecl}.",
         )
 
-    segments = QrSegment.make_segments(built.text)
+    version, segments = plan
     try:
         # Boosting is intentional: Nayuki may raise the actual ECL without growing
         # the QR version. Both requested and actual values are returned.
         qr = QrCode.encode_segments(
             segments,
             _ECL_BY_CODE[requested_ecl],
+            minversion=version,
+            maxversion=version,  # Already the smallest fit; only check it
             boostecl=True,
+            maskexecutor=mask_executor,
+            fastmask=mask_selection == "fast",
         )
     except DataTooLongError as exc:
         raise CapacityError(
@@ -230,34 +433,529 @@ def generate(request: GenerationRequest) -> GenerationResult:
             "The valid payload cannot fit in a version-40 QR at the requested error correction.",
         ) from exc
 
-    matrix = _matrix_from_qr(qr)
-    scanability, scan_warnings = _assess_scanability(
-        foreground, background, request.border, qr.get_size()
+    return _Encoding(
+        matrix=_matrix_from_qr(qr),
+        version=qr.get_version(),
+        mask=qr.get_mask(),
+        actual_error_correction=_ECL_CODE_BY_ORDINAL[
+            qr.get_error_correction_level().ordinal
+        ],
     )
-    warnings = tuple((*built.warnings, *scan_warnings))
-    actual_ecl = _ECL_CODE_BY_ORDINAL[qr.get_error_correction_level().ordinal]
-    svg = render_svg(matrix, request.border, background, foreground)
 
-    return GenerationResult(
+
+def _build(request: GenerationRequest) -> tuple[BuiltPayload, str, str]:
+    try:
+        built = build_payload(request.payload_type, request.fields)
+    except UnicodeError as exc:
+        raise ValidationError(
+            "invalid_unicode",
+            "Payload text must contain valid Unicode scalar values.",
+        ) from exc
+    requested_ecl = _validate_error_correction(request.requested_error_correction)
+    mask_selection = _validate_mask_selection(request.mask_selection)
+    return built, requested_ecl, mask_selection
+
+
+def _validate_presentation(
+    presentation: Presentation,
+) -> tuple[str, str, str, str]:
+    foreground = _normalize_color(presentation.foreground, "Foreground")
+    background = _normalize_color(presentation.background, "Background")
+    output_filename = sanitize_filename(presentation.output_name)
+    svg_path = _validate_svg_path(presentation.svg_path)
+    # Border and contrast policy; dimension guidance needs the module count and
+    # is filled in by `render`.
+    _assess_scanability(foreground, background, presentation.border, 0)
+    return foreground, background, output_filename, svg_path
+
+
+def _encode_built(
+    request: GenerationRequest,
+    built: BuiltPayload,
+    requested_ecl: str,
+    mask_selection: str,
+    mask_executor: Executor | None,
+    cache: EncodingCache | None,
+) -> EncodedSymbol:
+    payload_bytes = _encoded_utf8(built.text)
+
+    if cache is not None and (cache.include_sensitive or not built.sensitive):
+        key = cache.key(payload_bytes, requested_ecl, mask_selection)
+        encoding = cache.get(key)
+        if encoding is None:
+            encoding = _encode_payload(
+                built.text, payload_bytes, requested_ecl, mask_selection, mask_executor
+            )
+            cache.put(key, encoding)
+    else:
+        encoding = _encode_payload(
+            built.text, payload_bytes, requested_ecl, mask_selection, mask_executor
+        )
+
+    return EncodedSymbol(
         payload_type=request.payload_type,
         encoded_payload=built.text,
         payload_bytes=len(payload_bytes),
         summary=f"{built.summary} • {len(payload_bytes)} UTF-8 bytes",
         sensitive=built.sensitive,
-        svg=svg,
-        matrix=matrix,
-        version=qr.get_version(),
-        module_count=qr.get_size(),
-        mask=qr.get_mask(),
+        matrix=encoding.matrix,
+        version=encoding.version,
+        module_count=len(encoding.matrix),
+        mask=encoding.mask,
+        mask_selection=mask_selection,
         requested_error_correction=requested_ecl,
-        actual_error_correction=actual_ecl,
+        actual_error_correction=encoding.actual_error_correction,
+        warnings=built.warnings,
+    )
+
+
+def encode(
+    request: GenerationRequest,
+    *,
+    mask_executor: Executor | None = None,
+    cache: EncodingCache | None = None,
+) -> EncodedSymbol:
+    """Validate, build, and encode the payload half of one canonical request.
+
+    The presentation fields of ``request`` are ignored; pass them, or any other
+    `Presentation`, to `render`. ``mask_executor`` and ``cache`` behave as in
+    `generate`.
+    """
+
+    if not isinstance(request, GenerationRequest):
+        raise TypeError("encode() requires a GenerationRequest")
+
+    built, requested_ecl, mask_selection = _build(request)
+    return _encode_built(
+        request, built, requested_ecl, mask_selection, mask_executor, cache
+    )
+
+
+def render(
+    symbol: EncodedSymbol, presentation: Presentation, *, lean: bool = False
+) -> GenerationResult:
+    """Validate one presentation, assess scanability, and render a symbol.
+
+    Rendering never repeats the version and mask search, so one `encode` can
+    feed any number of palettes, borders, and file names.
+
+    A ``lean`` result renders its SVG only when ``svg`` is first read and
+    leaves ``encoded_payload`` as None. It suits adapters that only need
+    `to_public_dict()` or the SVG text.
+    """
+
+    if not isinstance(symbol, EncodedSymbol):
+        raise TypeError("render() requires an EncodedSymbol")
+    if not isinstance(presentation, Presentation):
+        raise TypeError("render() requires a Presentation")
+
+    foreground, background, output_filename, svg_path = _validate_presentation(
+        presentation
+    )
+    scanability, scan_warnings = _assess_scanability(
+        foreground, background, presentation.border, symbol.module_count
+    )
+    result = GenerationResult(
+        payload_type=symbol.payload_type,
+        encoded_payload=None if lean else symbol.encoded_payload,
+        payload_bytes=symbol.payload_bytes,
+        summary=symbol.summary,
+        sensitive=symbol.sensitive,
+        matrix=symbol.matrix,
+        version=symbol.version,
+        module_count=symbol.module_count,
+        mask=symbol.mask,
+        mask_selection=symbol.mask_selection,
+        requested_error_correction=symbol.requested_error_correction,
+        actual_error_correction=symbol.actual_error_correction,
         foreground=foreground,
         background=background,
-        border=request.border,
+        border=presentation.border,
+        svg_path=svg_path,
         output_filename=output_filename,
         scanability=scanability,
-        warnings=warnings,
+        warnings=tuple((*symbol.warnings, *scan_warnings)),
+    )
+    if not lean:
+        result.svg  # Fill the cached SVG now, as full results always carried it
+    return result
+
+
+def generate(
+    request: GenerationRequest,
+    *,
+    mask_executor: Executor | None = None,
+    cache: EncodingCache | None = None,
+    lean: bool = False,
+) -> GenerationResult:
+    """Validate, build, encode, assess, and render one canonical request.
+
+    This is `render(encode(request), request.presentation)`, except that the
+    presentation is validated before the comparatively costly version and mask
+    search, so an invalid color or border fails fast.
+
+    ``mask_executor`` opts in to scoring the eight mask candidates concurrently
+    on a caller-owned process or thread pool. The chosen mask, and so the output,
+    is identical to the serial search; it only pays off for large versions.
+
+    ``cache`` reuses the encoded symbol of an earlier request with the same
+    built payload, error correction, and mask selection. Output is identical
+    with or without it.
+
+    ``lean`` returns a lazily rendered result without the payload text; see
+    `render`.
+    """
+
+    if not isinstance(request, GenerationRequest):
+        raise TypeError("generate() requires a GenerationRequest")
+
+    built, requested_ecl, mask_selection = _build(request)
+    presentation = request.presentation
+    _validate_presentation(presentation)
+    symbol = _encode_built(
+        request, built, requested_ecl, mask_selection, mask_executor, cache
     )
+    return render(symbol, presentation, lean=lean)
+
+
+# Requests sent to a worker per task by `generate_many`. Large enough that
+# pickling and scheduling stay small next to encoding, small enough that the
+# first results arrive quickly.
+DEFAULT_BATCH_CHUNKSIZE = 64
+
+BatchOutcome = GenerationResult | QrGenerationError
+
+
+def _generate_chunk(
+    requests: list[GenerationRequest], lean: bool
+) -> list[BatchOutcome]:
+    """Worker task for `generate_many`: generate one chunk, keeping its errors."""
+
+    outcomes: list[BatchOutcome] = []
+    for request in requests:
+        try:
+            result = generate(request, lean=lean)
+            result.svg  # Render in the worker, not in the process reading results
+        except QrGenerationError as error:
+            outcomes.append(error)
+        except Exception as error:  # One item's failure must not end the batch.
+            outcomes.append(InternalGenerationError(type(error).__name__))
+        else:
+            outcomes.append(result)
+    return outcomes
+
+
+@overload
+def generate_many(
+    requests: Iterable[GenerationRequest],
+    *,
+    workers: int | None = ...,
+    chunksize: int = ...,
+    window: int | None = ...,
+    ordered: Literal[True] = ...,
+    lean: bool = ...,
+    executor: Executor | None = ...,
+) -> Iterator[BatchOutcome]: ...
+
+
+@overload
+def generate_many(
+    requests: Iterable[GenerationRequest],
+    *,
+    workers: int | None = ...,
+    chunksize: int = ...,
+    window: int | None = ...,
+    ordered: Literal[False],
+    lean: bool = ...,
+    executor: Executor | None = ...,
+) -> Iterator[tuple[int, BatchOutcome]]: ...
+
+
+def generate_many(
+    requests: Iterable[GenerationRequest],
+    *,
+    workers: int | None = None,
+    chunksize: int = DEFAULT_BATCH_CHUNKSIZE,
+    window: int | None = None,
+    ordered: bool = True,
+    lean: bool = False,
+    executor: Executor | None = None,
+) -> Iterator[BatchOutcome] | Iterator[tuple[int, BatchOutcome]]:
+    """Generate many requests on a process pool, reading the input lazily.
+
+    Requests are sent to the workers in chunks of ``chunksize``. At most
+    ``window`` chunks (default: twice the worker count) are in flight, so
+    input is read only as results are consumed and memory stays flat however
+    long the input is. Each request yields its `GenerationResult` or, instead
+    of raising, its `QrGenerationError`. Any other exception from one request
+    yields an `InternalGenerationError` for that request only.
+
+    Results come in input order. With ``ordered=False`` each chunk's results
+    are yielded as soon as that chunk finishes, as ``(index, outcome)`` pairs
+    so callers can match them to their input.
+
+    The SVG is always rendered in the worker; ``lean`` only drops the payload
+    text as in `generate`. The pool has ``workers`` processes (default: CPU
+    count) and is shut down when the generator finishes or is closed. Pass a
+    caller-owned ``executor`` instead to reuse a pool; pending chunks are
+    then cancelled, but the pool is left running.
+    """
+
+    if chunksize < 1:
+        raise ValueError("chunksize must be positive")
+    if workers is not None and workers < 1:
+        raise ValueError("workers must be positive")
+    if window is not None and window < 1:
+        raise ValueError("window must be positive")
+    workers = workers or os.cpu_count() or 1
+    window = window or 2 * workers
+    if ordered:
+        return _generate_many_ordered(
+            requests, workers, chunksize, window, lean, executor
+        )
+    return _generate_many_unordered(
+        requests, workers, chunksize, window, lean, executor
+    )
+
+
+def _chunks(
+    requests: Iterable[GenerationRequest], chunksize: int
+) -> Iterator[list[GenerationRequest]]:
+    iterator = iter(requests)
+    while chunk := list(itertools.islice(iterator, chunksize)):
+        yield chunk
+
+
+def _finish_batch(
+    pending: Iterable[Future[list[BatchOutcome]]],
+    executor: Executor,
+    owned: bool,
+) -> None:
+    for future in pending:
+        future.cancel()
+    if owned:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _generate_many_ordered(
+    requests: Iterable[GenerationRequest],
+    workers: int,
+    chunksize: int,
+    window: int,
+    lean: bool,
+    executor: Executor | None,
+) -> Iterator[BatchOutcome]:
+    owned = executor is None
+    pool = ProcessPoolExecutor(workers) if executor is None else executor
+    pending: deque[Future[list[BatchOutcome]]] = deque()
+    try:
+        for chunk in _chunks(requests, chunksize):
+            pending.append(pool.submit(_generate_chunk, chunk, lean))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        _finish_batch(pending, pool, owned)
+
+
+def _generate_many_unordered(
+    requests: Iterable[GenerationRequest],
+    workers: int,
+    chunksize: int,
+    window: int,
+    lean: bool,
+    executor: Executor | None,
+) -> Iterator[tuple[int, BatchOutcome]]:
+    owned = executor is None
+    pool = ProcessPoolExecutor(workers) if executor is None else executor
+    pending: dict[Future[list[BatchOutcome]], int] = {}
+    chunks = _chunks(requests, chunksize)
+    start = 0
+    try:
+        while True:
+            for chunk in itertools.islice(chunks, window - len(pending)):
+                pending[pool.submit(_generate_chunk, chunk, lean)] = start
+                start += len(chunk)
+            if not pending:
+                return
+            done, _running = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                first = pending.pop(future)
+                yield from enumerate(future.result(), start=first)
+    finally:
+        _finish_batch(pending, pool, owned)
+
+
+def _render_with_svg(
+    symbol: EncodedSymbol, presentation: Presentation, lean: bool
+) -> GenerationResult:
+    result = render(symbol, presentation, lean=lean)
+    result.svg  # Lean results render lazily; render here, off the event loop
+    return result
+
+
+async def agenerate(
+    request: GenerationRequest,
+    *,
+    executor: Executor | None = None,
+    cache: EncodingCache | None = None,
+    lean: bool = False,
+) -> GenerationResult:
+    """Asynchronous `generate` that keeps the event loop free.
+
+    Validation runs inline, so invalid requests fail without an executor round
+    trip. The version and mask search and then rendering each run on
+    ``executor`` (default: the loop's default thread pool), with the SVG
+    rendered there even for ``lean`` results. If the awaiting task is cancelled
+    during the search, the request stops there and is never rendered.
+
+    ``cache`` is shared in-process state, so it needs a thread executor; a
+    process pool only gets picklable arguments.
+    """
+
+    if not isinstance(request, GenerationRequest):
+        raise TypeError("agenerate() requires a GenerationRequest")
+
+    built, requested_ecl, mask_selection = _build(request)
+    presentation = request.presentation
+    _validate_presentation(presentation)
+    loop = asyncio.get_running_loop()
+    symbol = await loop.run_in_executor(
+        executor,
+        _encode_built,
+        request,
+        built,
+        requested_ecl,
+        mask_selection,
+        None,
+        cache,
+    )
+    return await loop.run_in_executor(
+        executor, _render_with_svg, symbol, presentation, lean
+    )
+
+
+async def _agenerate_outcome(
+    request: GenerationRequest,
+    executor: Executor | None,
+    cache: EncodingCache | None,
+    lean: bool,
+) -> BatchOutcome:
+    try:
+        return await agenerate(request, executor=executor, cache=cache, lean=lean)
+    except QrGenerationError as error:
+        return error
+    except Exception as error:  # One item's failure must not end the batch.
+        return InternalGenerationError(type(error).__name__)
+
+
+async def _arequests(
+    requests: AsyncIterable[GenerationRequest] | Iterable[GenerationRequest],
+) -> AsyncIterator[GenerationRequest]:
+    if isinstance(requests, AsyncIterable):
+        async for request in requests:
+            yield request
+    else:
+        for request in requests:
+            yield request
+
+
+@overload
+def agenerate_many(
+    requests: AsyncIterable[GenerationRequest] | Iterable[GenerationRequest],
+    *,
+    concurrency: int | None = ...,
+    ordered: Literal[True] = ...,
+    executor: Executor | None = ...,
+    cache: EncodingCache | None = ...,
+    lean: bool = ...,
+) -> AsyncIterator[BatchOutcome]: ...
+
+
+@overload
+def agenerate_many(
+    requests: AsyncIterable[GenerationRequest] | Iterable[GenerationRequest],
+    *,
+    concurrency: int | None = ...,
+    ordered: Literal[False],
+    executor: Executor | None = ...,
+    cache: EncodingCache | None = ...,
+    lean: bool = ...,
+) -> AsyncIterator[tuple[int, BatchOutcome]]: ...
+
+
+def agenerate_many(
+    requests: AsyncIterable[GenerationRequest] | Iterable[GenerationRequest],
+    *,
+    concurrency: int | None = None,
+    ordered: bool = True,
+    executor: Executor | None = None,
+    cache: EncodingCache | None = None,
+    lean: bool = False,
+) -> AsyncIterator[BatchOutcome] | AsyncIterator[tuple[int, BatchOutcome]]:
+    """Run `agenerate` over an async or plain iterable with bounded concurrency.
+
+    At most ``concurrency`` requests (default: CPU count) are in flight, and the
+    next request is read only when one finishes and its outcome is consumed, so
+    a slow consumer holds back the producer. Outcomes are the same as
+    `generate_many`: each result or `QrGenerationError` in input order, or
+    ``(index, outcome)`` pairs as requests finish with ``ordered=False``.
+
+    Closing the iterator, or cancelling the task iterating it, cancels every
+    request still in flight; ones still in the search are never rendered.
+    """
+
+    if concurrency is not None and concurrency < 1:
+        raise ValueError("concurrency must be positive")
+    limit = concurrency or os.cpu_count() or 1
+    return _agenerate_many(
+        _arequests(requests), limit, ordered, executor, cache, lean
+    )
+
+
+async def _agenerate_many(
+    requests: AsyncIterator[GenerationRequest],
+    concurrency: int,
+    ordered: bool,
+    executor: Executor | None,
+    cache: EncodingCache | None,
+    lean: bool,
+) -> AsyncIterator[BatchOutcome | tuple[int, BatchOutcome]]:
+    pending: dict[asyncio.Task[BatchOutcome], int] = {}
+    next_index = 0
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    request = await anext(requests)
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                task = asyncio.ensure_future(
+                    _agenerate_outcome(request, executor, cache, lean)
+                )
+                pending[task] = next_index
+                next_index += 1
+            if not pending:
+                return
+            if ordered:
+                # Dicts keep insertion order, so the first task is the oldest.
+                task = next(iter(pending))
+                outcome = await task
+                del pending[task]
+                yield outcome
+                continue
+            done, _running = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                yield pending.pop(task), task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
 
 
 def warning_codes(warnings: Iterable[GenerationWarning]) -> tuple[str, ...]:
@@ -5,6 +5,7 @@ from __future__ import annotations
 import os
 import re
 from pathlib import Path
+from typing import Iterable
 
 from qr_contract import ValidationError
 
@@ -66,14 +67,17 @@ def _collision_name(filename: str, counter: int) -> str:
 
 
 def save_svg_exclusive(
-    svg: str,
+    svg: str | Iterable[bytes],
     requested_name: str | None,
     directory: str | os.PathLike[str] = "saved",
 ) -> Path:
     """Create a complete SVG with an atomic exclusive path allocation.
 
+    `svg` is the document text or an iterable of UTF-8 chunks, such as
+    `GenerationResult.svg_chunks()`, which are written as they arrive.
     `O_EXCL` makes collision selection race-safe and prevents overwriting an
-    existing path. A failed write removes only the new incomplete file.
+    existing path. A failed write, including one raised while producing a
+    chunk, removes only the new incomplete file.
     """
 
     filename = sanitize_filename(requested_name)
@@ -103,8 +107,12 @@ def save_svg_exclusive(
             continue
 
         try:
-            with os.fdopen(descriptor, "w", encoding="utf-8", newline="\n") as file:
-                file.write(svg)
+            with os.fdopen(descriptor, "wb") as file:
+                if isinstance(svg, str):
+                    file.write(svg.encode("utf-8"))
+                else:
+                    for chunk in svg:
+                        file.write(chunk)
                 file.flush()
                 os.fsync(file.fileno())
         except BaseException:
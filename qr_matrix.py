@@ -0,0 +1,112 @@
+"""Compact immutable QR module matrix shared by results, renderers, and caches."""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator, overload
+
+
+class ModuleMatrix:
+    """A square grid of QR modules stored as one integer bitmask per row.
+
+    Bit ``x`` of ``rows[y]`` is set when the module at column ``x``, row ``y``
+    is dark, which is the encoder's own row layout, so building a matrix from a
+    ``QrCode`` copies ``size`` integers instead of ``size²`` booleans. Reading
+    keeps the nested-tuple shape: ``matrix[y]`` is a ``tuple[bool, ...]`` row,
+    so ``matrix[y][x]``, ``len(matrix)``, and iterating rows work unchanged.
+    Matrices compare and hash by content, and like the tuple matrix they
+    replaced, so a matrix equals its nested tuple and hashes the same.
+    """
+
+    __slots__ = ("_size", "_rows", "_hash")
+
+    _size: int
+    _rows: tuple[int, ...]
+    _hash: int | None
+
+    def __init__(self, size: int, rows: Iterable[int]) -> None:
+        packed = tuple(rows)
+        if size < 0 or len(packed) != size:
+            raise ValueError("A module matrix needs exactly one row per module.")
+        limit = 1 << size
+        if not all(type(row) is int and 0 <= row < limit for row in packed):
+            raise ValueError(f"Every row must be a bitmask of {size} modules.")
+        object.__setattr__(self, "_size", size)
+        object.__setattr__(self, "_rows", packed)
+        object.__setattr__(self, "_hash", None)
+
+    @classmethod
+    def from_modules(cls, modules: Iterable[Iterable[bool]]) -> ModuleMatrix:
+        """Pack a nested sequence of booleans, such as the old tuple matrix."""
+
+        rows = [
+            sum(1 << x for x, dark in enumerate(row) if dark) for row in modules
+        ]
+        return cls(len(rows), rows)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def rows(self) -> tuple[int, ...]:
+        """The packed rows, for renderers that work on whole rows at once."""
+
+        return self._rows
+
+    def is_dark(self, x: int, y: int) -> bool:
+        if not (0 <= x < self._size and 0 <= y < self._size):
+            raise IndexError("Module coordinates are outside the matrix.")
+        return (self._rows[y] >> x) & 1 == 1
+
+    def dark_count(self) -> int:
+        return sum(row.bit_count() for row in self._rows)
+
+    def _unpack(self, row: int) -> tuple[bool, ...]:
+        # Reversed binary text puts module 0 first; comparing characters is
+        # several times faster than shifting once per module.
+        return tuple(map("1".__eq__, format(row, f"0{self._size}b")[::-1]))
+
+    def __len__(self) -> int:
+        return self._size
+
+    @overload
+    def __getitem__(self, index: int) -> tuple[bool, ...]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> tuple[tuple[bool, ...], ...]: ...
+
+    def __getitem__(
+        self, index: int | slice
+    ) -> tuple[bool, ...] | tuple[tuple[bool, ...], ...]:
+        if isinstance(index, slice):
+            return tuple(self._unpack(row) for row in self._rows[index])
+        return self._unpack(self._rows[index])
+
+    def __iter__(self) -> Iterator[tuple[bool, ...]]:
+        return map(self._unpack, self._rows)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ModuleMatrix):
+            return self._rows == other._rows
+        if isinstance(other, tuple):
+            return len(other) == self._size and tuple(self) == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        # Must match the nested tuple's hash, since the two compare equal.
+        # Unpacking is only paid once per matrix.
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash(tuple(self)))
+        return self._hash
+
+    def __repr__(self) -> str:
+        return f"ModuleMatrix(size={self._size}, dark={self.dark_count()})"
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError("ModuleMatrix is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("ModuleMatrix is immutable")
+
+    def __reduce__(self) -> tuple[type[ModuleMatrix], tuple[int, tuple[int, ...]]]:
+        return (ModuleMatrix, (self._size, self._rows))
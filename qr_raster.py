@@ -0,0 +1,185 @@
+"""Streaming 1-bit PNG and PBM rendering of a QR module matrix.
+
+Both formats are written from packed rows with the standard library only. Each
+module row is expanded to one scanline and repeated ``scale`` times, so memory
+is bounded by one module row of pixels however large the image is.
+"""
+
+from __future__ import annotations
+
+import struct
+import zlib
+from typing import Iterator, Sequence
+
+from qr_matrix import ModuleMatrix
+
+# Default upper bound on the data of each PNG IDAT chunk and each PBM chunk.
+RASTER_CHUNK_BYTES = 64 * 1024
+DEFAULT_SCALE = 8
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _packed(matrix: Sequence[Sequence[bool]]) -> ModuleMatrix:
+    if isinstance(matrix, ModuleMatrix):
+        return matrix
+    return ModuleMatrix.from_modules(matrix)
+
+
+def _check_geometry(border: int, scale: int) -> None:
+    if isinstance(scale, bool) or not isinstance(scale, int) or scale < 1:
+        raise ValueError("scale must be a positive integer")
+    if isinstance(border, bool) or not isinstance(border, int) or border < 0:
+        raise ValueError("border must be a non-negative integer")
+
+
+def _scanlines(matrix: ModuleMatrix, border: int, scale: int) -> Iterator[bytes]:
+    """Yield one packed 1-bit scanline per module row, most significant bit first.
+
+    Set bits are dark modules. The module row's binary digits are widened to
+    ``scale`` digits each and parsed once, so the work per module row does not
+    depend on how many times the scanline is repeated.
+    """
+
+    size = matrix.size
+    width = (size + 2 * border) * scale
+    line_bytes = (width + 7) // 8
+    widen = str.maketrans({"0": "0" * scale, "1": "1" * scale})
+    # The right border and the padding to a whole byte are both light.
+    trailing = line_bytes * 8 - (border + size) * scale
+    for row in matrix.rows:
+        digits = format(row, f"0{size}b")[::-1].translate(widen)
+        yield (int(digits, 2) << trailing).to_bytes(line_bytes, "big")
+
+
+def _pixel_rows(
+    matrix: ModuleMatrix, border: int, scale: int, prefix: bytes
+) -> Iterator[bytes]:
+    """Yield the image top to bottom in blocks of whole scanlines.
+
+    Every scanline starts with ``prefix``, the PNG filter byte. A module row is
+    one block of ``scale`` identical scanlines; the quiet zone is yielded a
+    scanline at a time, so no block is larger than one module row.
+    """
+
+    light = prefix + bytes(((matrix.size + 2 * border) * scale + 7) // 8)
+    for _ in range(border * scale):
+        yield light
+    for line in _scanlines(matrix, border, scale):
+        yield (prefix + line) * scale
+    for _ in range(border * scale):
+        yield light
+
+
+def _rgb(color: str) -> bytes:
+    return bytes.fromhex(color[1:])
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return (
+        struct.pack(">I", len(data))
+        + kind
+        + data
+        + struct.pack(">I", zlib.crc32(kind + data))
+    )
+
+
+def iter_png_chunks(
+    matrix: Sequence[Sequence[bool]],
+    border: int,
+    background: str,
+    foreground: str,
+    scale: int = DEFAULT_SCALE,
+    chunk_size: int = RASTER_CHUNK_BYTES,
+) -> Iterator[bytes]:
+    """Yield a 1-bit palette PNG piece by piece, one PNG chunk per piece.
+
+    Palette index 0 is ``background`` and 1 is ``foreground``, so any validated
+    color pair keeps its polarity. Scanlines are compressed as they are built
+    and IDAT chunks of at most ``chunk_size`` data bytes are yielded as soon as
+    the compressor fills one. Invalid arguments raise immediately.
+    """
+
+    _check_geometry(border, scale)
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    packed = _packed(matrix)
+    palette = _rgb(background) + _rgb(foreground)
+    return _png_pieces(packed, border, palette, scale, chunk_size)
+
+
+def _png_pieces(
+    matrix: ModuleMatrix, border: int, palette: bytes, scale: int, chunk_size: int
+) -> Iterator[bytes]:
+    dimension = (matrix.size + 2 * border) * scale
+    header = struct.pack(">IIBBBBB", dimension, dimension, 1, 3, 0, 0, 0)
+    yield _PNG_SIGNATURE + _png_chunk(b"IHDR", header) + _png_chunk(b"PLTE", palette)
+
+    # zlib's default level. Level 9 is about ten times slower on these highly
+    # repetitive scanlines at typical scales.
+    compressor = zlib.compressobj(6)
+    pending = bytearray()
+    # Filter type 0: scanlines are stored as they are.
+    for data in _pixel_rows(matrix, border, scale, b"\x00"):
+        pending += compressor.compress(data)
+        while len(pending) >= chunk_size:
+            yield _png_chunk(b"IDAT", bytes(pending[:chunk_size]))
+            del pending[:chunk_size]
+    pending += compressor.flush()
+    while pending:
+        yield _png_chunk(b"IDAT", bytes(pending[:chunk_size]))
+        del pending[:chunk_size]
+    yield _png_chunk(b"IEND", b"")
+
+
+def render_png(
+    matrix: Sequence[Sequence[bool]],
+    border: int,
+    background: str,
+    foreground: str,
+    scale: int = DEFAULT_SCALE,
+) -> bytes:
+    """Return the complete `iter_png_chunks` image."""
+
+    return b"".join(iter_png_chunks(matrix, border, background, foreground, scale))
+
+
+def iter_pbm_chunks(
+    matrix: Sequence[Sequence[bool]],
+    border: int,
+    scale: int = DEFAULT_SCALE,
+    chunk_size: int = RASTER_CHUNK_BYTES,
+) -> Iterator[bytes]:
+    """Yield a binary (P4) PBM in chunks of at most ``chunk_size`` bytes.
+
+    PBM has no palette: dark modules are black and everything else is white,
+    whatever colors the result uses. Invalid arguments raise immediately.
+    """
+
+    _check_geometry(border, scale)
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    return _pbm_pieces(_packed(matrix), border, scale, chunk_size)
+
+
+def _pbm_pieces(
+    matrix: ModuleMatrix, border: int, scale: int, chunk_size: int
+) -> Iterator[bytes]:
+    dimension = (matrix.size + 2 * border) * scale
+    buffer = bytearray(f"P4\n{dimension} {dimension}\n".encode("ascii"))
+    for data in _pixel_rows(matrix, border, scale, b""):
+        buffer += data
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+    while buffer:
+        yield bytes(buffer[:chunk_size])
+        del buffer[:chunk_size]
+
+
+def render_pbm(
+    matrix: Sequence[Sequence[bool]], border: int, scale: int = DEFAULT_SCALE
+) -> bytes:
+    """Return the complete `iter_pbm_chunks` image."""
+
+    return b"".join(iter_pbm_chunks(matrix, border, scale))
@@ -0,0 +1,285 @@
+"""Deterministic minimal SVG rendering of a QR module matrix."""
+
+from __future__ import annotations
+
+import re
+from itertools import compress
+from typing import Iterator, Sequence
+
+from qr_matrix import ModuleMatrix
+
+# Largest module coordinate a validated symbol can reach: version 40 is 177
+# modules wide and the border is at most 16.
+_MAX_COORDINATE = 177 - 1 + 16
+_COORDINATES = tuple(str(value) for value in range(_MAX_COORDINATE + 1))
+# Maps the ASCII digits of a binary row to 0/1 bytes, which `compress` can use
+# directly as selectors.
+_BIT_SELECTORS = bytes.maketrans(b"01", b"\x00\x01")
+_DARK_RUN_RE = re.compile("1+")
+# The rest of a run's rectangle after its move, indexed by run length.
+_RUN_BODIES = tuple(f"h{length}v1h-{length}z" for length in range(178))
+
+# "modules" draws one unit square per dark module; "runs" draws one rectangle
+# per horizontal run of dark modules with relative moves, for smaller documents;
+# "outline" traces the contours of dark regions and fills them even-odd.
+SVG_PATHS = ("modules", "runs", "outline")
+
+# Default upper bound on the size of each chunk from `iter_svg_chunks`.
+SVG_CHUNK_BYTES = 16 * 1024
+
+# Outline directions in clockwise order, so a right turn is one step forward.
+_EAST, _SOUTH, _WEST, _NORTH = range(4)
+
+
+def _coordinates(start: int, count: int) -> tuple[str, ...]:
+    if start + count <= len(_COORDINATES):
+        return _COORDINATES[start : start + count]
+    return tuple(str(value) for value in range(start, start + count))
+
+
+def _run_bodies(size: int) -> tuple[str, ...]:
+    if size < len(_RUN_BODIES):
+        return _RUN_BODIES
+    return tuple(f"h{length}v1h-{length}z" for length in range(size + 1))
+
+
+def _module_path_rows(matrix: ModuleMatrix, border: int) -> Iterator[str]:
+    """Yield the path data row by row, one ``M{x},{y}h1v1h-1z`` per dark module.
+
+    Each packed row is turned into 0/1 selector bytes and the dark columns'
+    precomputed coordinate strings are picked with ``compress``, so no Python
+    code runs per module. Everything after ``M{x}`` is the same for a whole row
+    and is joined in once.
+    """
+
+    size = matrix.size
+    columns = _coordinates(border, size)
+    separator = ""
+    for y, row in enumerate(matrix.rows, start=border):
+        if not row:
+            continue
+        selectors = format(row, f"0{size}b")[::-1].encode("ascii")
+        dark = compress(columns, selectors.translate(_BIT_SELECTORS))
+        command_end = f",{y}h1v1h-1z"
+        yield separator + "M" + (command_end + " M").join(dark) + command_end
+        separator = " "
+
+
+def _run_path_rows(matrix: ModuleMatrix, border: int) -> Iterator[str]:
+    """Yield the path data row by row, one rectangle per horizontal dark run.
+
+    The first run is ``M{x},{y}h{n}v1h-{n}z``. Every later run starts with a
+    relative ``m{dx},{dy}`` from the start of the previous run, where ``z`` left
+    the current point. Commands need no separators because each starts with a
+    letter and negative numbers carry their own sign.
+    """
+
+    size = matrix.size
+    steps = _coordinates(0, size)
+    bodies = _run_bodies(size)
+    move = "M"
+    previous_x, previous_y = -border, -border
+    for y, row in enumerate(matrix.rows):
+        if not row:
+            continue
+        bits = format(row, f"0{size}b")[::-1]
+        runs = [run.span() for run in _DARK_RUN_RE.finditer(bits)]
+        # Only the first run of a row moves down; the others move right only.
+        x, end = runs[0]
+        commands = [f"{move}{x - previous_x},{y - previous_y}{bodies[end - x]}"]
+        for start, end in runs[1:]:
+            commands.append("m" + steps[start - x] + ",0" + bodies[end - start])
+            x = start
+        yield "".join(commands)
+        move = "m"
+        previous_x, previous_y = x, y
+
+
+def _bit_runs(mask: int, size: int) -> list[tuple[int, int]]:
+    bits = format(mask, f"0{size}b")[::-1]
+    return [run.span() for run in _DARK_RUN_RE.finditer(bits)]
+
+
+def _outline_edges(matrix: ModuleMatrix) -> tuple[list[int], list[list[int]]]:
+    """Return the east edge starts and, per direction, every edge's end corner.
+
+    Corners are numbered ``y * (size + 1) + x``. Edges run along module borders
+    and keep dark modules on their right. A horizontal grid line ``y`` has east
+    edges where the row below is dark and the row above is light, and west
+    edges the other way round; vertical grid lines are the same on the
+    transposed matrix. Each edge is a whole run of such modules, so consecutive
+    edges of a contour always turn. ``ends[direction][corner]`` is -1 where no
+    edge starts.
+    """
+
+    size = matrix.size
+    stride = size + 1
+    rows = (0, *matrix.rows, 0)
+    bits = [format(row, f"0{size}b")[::-1] for row in matrix.rows]
+    columns = (0, *(int(column[::-1], 2) for column in map("".join, zip(*bits))), 0)
+    ends = [[-1] * (stride * stride) for _ in range(4)]
+    east, south, west, north = ends
+    east_starts = []
+    for line in range(stride):
+        offset = line * stride
+        before, after = rows[line], rows[line + 1]
+        for start, end in _bit_runs(after & ~before, size):
+            east[offset + start] = offset + end
+            east_starts.append(offset + start)
+        for start, end in _bit_runs(before & ~after, size):
+            west[offset + end] = offset + start
+        before, after = columns[line], columns[line + 1]
+        for start, end in _bit_runs(before & ~after, size):
+            south[start * stride + line] = end * stride + line
+        for start, end in _bit_runs(after & ~before, size):
+            north[end * stride + line] = start * stride + line
+    return east_starts, ends
+
+
+def _outline_path(matrix: ModuleMatrix, border: int) -> str:
+    """Return the path data with one closed subpath per contour of a dark region.
+
+    Each contour is traced clockwise from the west end of its topmost east
+    edge: the top-left corner of an outer contour, the bottom-left corner of a
+    hole. Where two dark
+    modules touch only at a corner, the trace turns right, so a contour never
+    crosses into a diagonal neighbour and each 4-connected region gets one
+    outer contour plus one per hole. The contour starts at an absolute ``M``
+    (later ones at ``m`` relative to the previous start, where ``z`` left the
+    current point) and alternates ``h`` and ``v``; the last edge is implied by
+    ``z``. Filled even-odd, the contours cover exactly the dark modules.
+    """
+
+    size = matrix.size
+    stride = size + 1
+    east_starts, ends = _outline_edges(matrix)
+    # Edge commands by corner-number difference: x steps for h, y steps for v.
+    steps = [f"h{delta}" for delta in range(-size, size + 1)]
+    vertical = {
+        delta * stride: f"v{delta}" for delta in range(-size, size + 1) if delta
+    }
+    traced = bytearray(stride * stride)
+    commands = []
+    previous_x, previous_y = -border, -border
+    for origin in east_starts:
+        if traced[origin]:
+            continue
+        y, x = divmod(origin, stride)
+        commands.append(f"m{x - previous_x},{y - previous_y}")
+        previous_x, previous_y = x, y
+        corner, direction = origin, _EAST
+        while True:
+            end = ends[direction][corner]
+            if direction == _EAST:
+                traced[corner] = 1
+            turn = (direction + 1) & 3
+            if ends[turn][end] < 0:
+                turn = (direction + 3) & 3
+            if end == origin and turn == _EAST:
+                break
+            if direction & 1:
+                commands.append(vertical[end - corner])
+            else:
+                commands.append(steps[end - corner + size])
+            corner, direction = end, turn
+        commands.append("z")
+    if commands:
+        commands[0] = "M" + commands[0][1:]
+    return "".join(commands)
+
+
+def _document_parts(
+    matrix: Sequence[Sequence[bool]],
+    border: int,
+    background: str,
+    foreground: str,
+    path_mode: str,
+) -> tuple[str, Iterator[str] | tuple[str], str]:
+    """Return the text before the path data, the path data pieces, and the rest.
+
+    The mode is checked here, before any piece is produced. Modules and runs
+    are produced one matrix row at a time. An outline contour can span the
+    whole symbol, so its path data is one piece.
+    """
+
+    if not isinstance(matrix, ModuleMatrix):
+        matrix = ModuleMatrix.from_modules(matrix)
+    fill_rule = ""
+    path: Iterator[str] | tuple[str]
+    if path_mode == "modules":
+        path = _module_path_rows(matrix, border)
+    elif path_mode == "runs":
+        path = _run_path_rows(matrix, border)
+    elif path_mode == "outline":
+        path = (_outline_path(matrix, border),)
+        fill_rule = ' fill-rule="evenodd"'
+    else:
+        raise ValueError(f"Unknown SVG path mode: {path_mode!r}")
+    dimension = matrix.size + border * 2
+    head = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {dimension} {dimension}" '
+        'shape-rendering="crispEdges">\n'
+        f'  <rect width="100%" height="100%" fill="{background}"/>\n'
+        f'  <path fill="{foreground}"{fill_rule} d="'
+    )
+    return head, path, '"/>\n</svg>\n'
+
+
+def render_svg(
+    matrix: Sequence[Sequence[bool]],
+    border: int,
+    background: str,
+    foreground: str,
+    path_mode: str = "modules",
+) -> str:
+    """Render a deterministic minimal SVG from a validated module matrix.
+
+    ``path_mode`` is one of `SVG_PATHS`. All modes cover exactly the same
+    modules; ``outline`` adds ``fill-rule="evenodd"`` to the path.
+    """
+
+    head, path, tail = _document_parts(
+        matrix, border, background, foreground, path_mode
+    )
+    return head + "".join(path) + tail
+
+
+def iter_svg_chunks(
+    matrix: Sequence[Sequence[bool]],
+    border: int,
+    background: str,
+    foreground: str,
+    path_mode: str = "modules",
+    chunk_size: int = SVG_CHUNK_BYTES,
+) -> Iterator[bytes]:
+    """Yield the `render_svg` document as UTF-8 chunks of at most ``chunk_size``.
+
+    Path data is rendered a matrix row at a time as chunks are consumed, so the
+    first bytes are ready before the last row is rendered and only about one
+    chunk is held at once. Joined, the chunks are the `render_svg` document in
+    UTF-8. An invalid mode or chunk size raises immediately, not on the first
+    chunk.
+    """
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    head, path, tail = _document_parts(
+        matrix, border, background, foreground, path_mode
+    )
+    return _chunked(head, path, tail, chunk_size)
+
+
+def _chunked(
+    head: str, path: Iterator[str] | tuple[str], tail: str, chunk_size: int
+) -> Iterator[bytes]:
+    buffer = bytearray(head.encode("utf-8"))
+    for piece in path:
+        buffer += piece.encode("utf-8")
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+    buffer += tail.encode("utf-8")
+    while buffer:
+        yield bytes(buffer[:chunk_size])
+        del buffer[:chunk_size]
@@ -22,9 +22,14 @@
 # 
 
 from __future__ import annotations
-import collections, itertools, re
-from collections.abc import Sequence
+import array, bisect, collections, itertools, operator, re
+from collections.abc import Callable, Sequence
+from concurrent.futures import Executor
 from typing import Optional, Union
+try:
+	import numpy  # Optional; enables the array-based mask search of QrCode.set_matrix_engine()
+except ImportError:
+	numpy = None  # type: ignore[assignment]
 
 
 # ---- QR Code symbol class ----
@@ -70,7 +75,7 @@ class QrCode:
 	# ---- Static factory functions (mid level) ----
 	
 	@staticmethod
-	def encode_segments(segs: Sequence[QrSegment], ecl: QrCode.Ecc, minversion: int = 1, maxversion: int = 40, mask: int = -1, boostecl: bool = True) -> QrCode:
+	def encode_segments(segs: Sequence[QrSegment], ecl: QrCode.Ecc, minversion: int = 1, maxversion: int = 40, mask: int = -1, boostecl: bool = True, maskexecutor: Optional[Executor] = None, fastmask: bool = False) -> QrCode:
 		"""Returns a QR Code representing the given segments with the given encoding parameters.
 		The smallest possible QR Code version within the given range is automatically
 		chosen for the output. Iff boostecl is true, then the ECC level of the result
@@ -79,27 +84,29 @@ class QrCode:
 		mask, or -1 to automatically choose an appropriate mask (which may be slow).
 		This function allows the user to create a custom sequence of segments that switches
 		between modes (such as alphanumeric and byte) to encode text in less space.
+		If maskexecutor is given and the mask is chosen automatically, the eight mask candidates
+		are scored concurrently on that executor; the chosen mask is the same either way. If fastmask
+		is true, an automatically chosen mask comes from a cheaper estimate instead (see the constructor).
 		This is a mid-level API; the high-level API is encode_text() and encode_binary()."""
 		
 		if not (QrCode.MIN_VERSION <= minversion <= maxversion <= QrCode.MAX_VERSION) or not (-1 <= mask <= 7):
 			raise ValueError("Invalid value")
 		
 		# Find the minimal version number to use
-		for version in range(minversion, maxversion + 1):
-			datacapacitybits: int = QrCode._get_num_data_codewords(version, ecl) * 8  # Number of data bits available
-			datausedbits: Optional[int] = QrSegment.get_total_bits(segs, version)
-			if (datausedbits is not None) and (datausedbits <= datacapacitybits):
-				break  # This version number is found to be suitable
-			if version >= maxversion:  # All versions in the range could not fit the given data
-				msg: str = "Segment too long"
-				if datausedbits is not None:
-					msg = f"Data length = {datausedbits} bits, Max capacity = {datacapacitybits} bits"
-				raise DataTooLongError(msg)
+		found: Optional[int] = QrCode.find_min_version(lambda ver: QrSegment.get_total_bits(segs, ver), ecl, minversion, maxversion)
+		if found is None:  # All versions in the range could not fit the given data
+			msg: str = "Segment too long"
+			datausedbits: Optional[int] = QrSegment.get_total_bits(segs, maxversion)
+			if datausedbits is not None:
+				msg = f"Data length = {datausedbits} bits, Max capacity = {_DATA_CAPACITY_BITS[ecl.ordinal][maxversion]} bits"
+			raise DataTooLongError(msg)
+		version: int = found
+		datausedbits = QrSegment.get_total_bits(segs, version)
 		assert datausedbits is not None
 		
 		# Increase the error correction level while the data still fits in the current version number
 		for newecl in (QrCode.Ecc.MEDIUM, QrCode.Ecc.QUARTILE, QrCode.Ecc.HIGH):  # From low to high
-			if boostecl and (datausedbits <= QrCode._get_num_data_codewords(version, newecl) * 8):
+			if boostecl and (datausedbits <= _DATA_CAPACITY_BITS[newecl.ordinal][version]):
 				ecl = newecl
 		
 		# Concatenate all segments to create the data bit string
@@ -111,25 +118,68 @@ class QrCode:
 		assert len(bb) == datausedbits
 		
 		# Add terminator and pad up to a byte if applicable
-		datacapacitybits = QrCode._get_num_data_codewords(version, ecl) * 8
+		datacapacitybits: int = _DATA_CAPACITY_BITS[ecl.ordinal][version]
 		assert len(bb) <= datacapacitybits
 		bb.append_bits(0, min(4, datacapacitybits - len(bb)))
 		bb.append_bits(0, -len(bb) % 8)  # Note: Python's modulo on negative numbers behaves better than C family languages
 		assert len(bb) % 8 == 0
 		
-		# Pad with alternating bytes until data capacity is reached
-		for padbyte in itertools.cycle((0xEC, 0x11)):
-			if len(bb) >= datacapacitybits:
-				break
-			bb.append_bits(padbyte, 8)
-		
-		# Pack bits into bytes in big endian
-		datacodewords = bytearray([0] * (len(bb) // 8))
-		for (i, bit) in enumerate(bb):
-			datacodewords[i >> 3] |= bit << (7 - (i & 7))
+		# Pack bits into bytes in big endian, then pad with alternating bytes until data capacity is reached
+		numpadbytes: int = (datacapacitybits - len(bb)) // 8
+		datacodewords: bytes = bb.to_bytes() + bytes(itertools.islice(itertools.cycle((0xEC, 0x11)), numpadbytes))
+		assert len(datacodewords) * 8 == datacapacitybits
 		
 		# Create the QR Code object
-		return QrCode(version, ecl, datacodewords, mask)
+		return QrCode(version, ecl, datacodewords, mask, maskexecutor, fastmask)
+	
+	
+	@staticmethod
+	def find_min_version(totalbits: Callable[[int], Optional[int]], ecl: QrCode.Ecc, minversion: int = 1, maxversion: int = 40) -> Optional[int]:
+		"""Returns the smallest version number in the given range whose data capacity at the given
+		error correction level can hold the data, or None if no version in the range can. The totalbits
+		function maps a version number to the number of data bits needed at that version (including segment
+		headers), or None if a segment's character count overflows its field. Because the bit count only
+		changes where the character count field widths change, totalbits is called once per version tier,
+		and each tier is searched with a binary search over the precomputed capacity table."""
+		if not (QrCode.MIN_VERSION <= minversion <= maxversion <= QrCode.MAX_VERSION):
+			raise ValueError("Invalid value")
+		capacities: Sequence[int] = _DATA_CAPACITY_BITS[ecl.ordinal]
+		for (tierstart, tierend) in _VERSION_TIERS:
+			lo: int = max(tierstart, minversion)
+			hi: int = min(tierend, maxversion)
+			if lo > hi:
+				continue
+			datausedbits: Optional[int] = totalbits(hi)
+			if (datausedbits is None) or (datausedbits > capacities[hi]):
+				continue  # Not even the largest version of this tier is big enough
+			return bisect.bisect_left(capacities, datausedbits, lo, hi)
+		return None
+	
+	
+	# ---- Matrix engine selection ----
+	
+	@staticmethod
+	def set_matrix_engine(engine: Optional[str]) -> None:
+		"""Selects how the automatic mask choice scores its eight candidates in this process: "python"
+		scores them one after another on the row bitmasks, "numpy" builds all of them as one NumPy array and
+		scores them together, and None picks "numpy" iff NumPy can be imported (which is the initial setting).
+		Both engines compute identical penalty scores, so they choose the same mask and produce identical
+		QR Codes. Masks chosen with a maskexecutor do not use this setting, and fastmask only applies
+		with the "python" engine.
+		Raises ValueError for an unknown engine name, or for "numpy" when NumPy is not installed."""
+		if engine is None:
+			engine = "python" if (numpy is None) else "numpy"
+		elif engine not in ("python", "numpy"):
+			raise ValueError("Unknown matrix engine")
+		elif (engine == "numpy") and (numpy is None):
+			raise ValueError("NumPy is not installed")
+		QrCode._matrix_engine = engine
+	
+	
+	@staticmethod
+	def get_matrix_engine() -> str:
+		"""Returns the name of the engine that the automatic mask choice uses, "python" or "numpy"."""
+		return QrCode._matrix_engine
 	
 	
 	# ---- Private fields ----
@@ -150,19 +200,36 @@ class QrCode:
 	# the resulting object still has a mask value between 0 and 7.
 	_mask: int
 	
-	# The modules of this QR Code (False = light, True = dark).
-	# Immutable after constructor finishes. Accessed through get_module().
-	_modules: list[list[bool]]
+	# The number of rows and columns scored by the automatic mask choice, counting each candidate
+	# separately. Accessed through get_penalty_lines_scored().
+	_linesscored: int
+	
+	# The modules of this QR Code, one integer bitmask per row: bit x of _modules[y] is set
+	# iff the module at (x, y) is dark. Immutable after constructor finishes. Accessed through get_module().
+	_modules: list[int]
 	
-	# Indicates function modules that are not subjected to masking. Discarded when constructor finishes.
-	_isfunction: list[list[bool]]
+	# Indicates function modules that are not subjected to masking, using the same row bitmask
+	# layout as _modules. Discarded when constructor finishes.
+	_isfunction: list[int]
+	
+	# The modules as size*size bytes (1 = dark, 0 = light) in row-major order, built by the first
+	# call of get_module_bytes() or get_module_view() and then shared by later calls.
+	_modulebytes: Optional[bytes]
 	
 	
 	# ---- Constructor (low level) ----
 	
-	def __init__(self, version: int, errcorlvl: QrCode.Ecc, datacodewords: Union[bytes,Sequence[int]], msk: int) -> None:
+	def __init__(self, version: int, errcorlvl: QrCode.Ecc, datacodewords: Union[bytes,Sequence[int]], msk: int, maskexecutor: Optional[Executor] = None, fastmask: bool = False) -> None:
 		"""Creates a new QR Code with the given version number,
 		error correction level, data codeword bytes, and mask number.
+		If msk is -1 and maskexecutor is given, the eight mask candidates are scored
+		concurrently on independent copies of the grid, using that executor (a process
+		pool, or a thread pool on free-threaded builds), instead of one after another.
+		If msk is -1 and fastmask is true, the pure-Python engine is active and the version is at most
+		_FAST_MASK_MAX_VERSION, the eight masks are ranked by an estimated penalty (row runs, 2*2 blocks
+		and balance only) and checked in that order, and the first that creates no false finder-like
+		pattern is used. If every mask creates one, or fastmask does not apply, the mask is chosen as
+		if fastmask were false. The result may differ from the full search's choice.
 		This is a low-level API that most users should not use directly.
 		A mid-level API is the encode_segments() function."""
 		
@@ -176,32 +243,36 @@ class QrCode:
 		self._size = version * 4 + 17
 		self._errcorlvl = errcorlvl
 		
-		# Initialize both grids to be size*size arrays of Boolean false
-		self._modules    = [[False] * self._size for _ in range(self._size)]  # Initially all light
-		self._isfunction = [[False] * self._size for _ in range(self._size)]
+		# Start both grids from this version's function pattern template
+		template: tuple[Sequence[int],Sequence[int]] = QrCode._get_function_template(version)
+		self._modules    = list(template[0])
+		self._isfunction = list(template[1])
+		
+		self._linesscored = 0
 		
 		# Compute ECC, draw modules
-		self._draw_function_patterns()
 		allcodewords: bytes = self._add_ecc_and_interleave(bytearray(datacodewords))
 		self._draw_codewords(allcodewords)
 		
 		# Do masking
-		if msk == -1:  # Automatically choose best mask
-			minpenalty: int = 1 << 32
-			for i in range(8):
-				self._apply_mask(i)
-				self._draw_format_bits(i)
-				penalty = self._get_penalty_score()
-				if penalty < minpenalty:
-					msk = i
-					minpenalty = penalty
-				self._apply_mask(i)  # Undoes the mask due to XOR
+		if (msk == -1) and fastmask and (QrCode._matrix_engine == "python") and (version <= QrCode._FAST_MASK_MAX_VERSION):
+			msk = self._choose_mask_fast()  # Stays -1 if every mask creates a false finder-like pattern
+		if (msk == -1) and (maskexecutor is not None):  # Score all masks concurrently, then take the first lowest
+			penalties: list[int] = list(maskexecutor.map(_score_mask,
+				itertools.repeat(version), itertools.repeat(errcorlvl.ordinal), itertools.repeat(tuple(self._modules)), range(8)))
+			msk = penalties.index(min(penalties))
+			self._linesscored += 8 * 2 * self._size  # Every candidate is scored in full
+		elif (msk == -1) and (QrCode._matrix_engine == "numpy"):  # Score all masks at once on arrays
+			msk = self._choose_mask_numpy()
+		elif msk == -1:  # Automatically choose best mask
+			msk = self._choose_mask()
 		assert 0 <= msk <= 7
 		self._mask = msk
 		self._apply_mask(msk)  # Apply the final choice of mask
 		self._draw_format_bits(msk)  # Overwrite old format bits
 		
 		del self._isfunction
+		self._modulebytes = None
 	
 	
 	# ---- Accessor methods ----
@@ -222,17 +293,76 @@ class QrCode:
 		"""Returns this QR Code's mask, in the range [0, 7]."""
 		return self._mask
 	
+	def get_penalty_lines_scored(self) -> int:
+		"""Returns the number of rows and columns whose penalty was evaluated while choosing this
+		QR Code's mask automatically, or 0 if the mask was given explicitly. The full search scores at
+		most 16*size, and a fast selection at most 24*size, plus the full search's lines if it falls
+		back to it; fast selection only runs up to _FAST_MASK_MAX_VERSION, so the range is [0, 2832]."""
+		return self._linesscored
+	
+	def get_packed_rows(self) -> tuple[int,...]:
+		"""Returns this QR Code's modules as one integer per row, from top to bottom: bit x of
+		the integer of row y is set iff the module at (x, y) is dark. This is the internal layout,
+		so it is much cheaper than reading size*size modules through get_module()."""
+		return tuple(self._modules)
+	
+	def get_module_bytes(self) -> bytes:
+		"""Returns this QR Code's modules as size*size bytes in row-major order, one byte per
+		module: 1 for dark and 0 for light. The byte of module (x, y) is at index y * size + x.
+		The bytes are built once per QR Code and the same object is returned by later calls."""
+		if self._modulebytes is None:
+			size: int = self._size
+			# Reversed binary digits put module 0 first; translate maps b"0"/b"1" to 0/1
+			self._modulebytes = b"".join(
+				format(row, f"0{size}b")[::-1].encode("ascii").translate(_DIGITS_TO_BITS)
+				for row in self._modules)
+		return self._modulebytes
+	
+	def get_module_bits(self) -> bytes:
+		"""Returns this QR Code's modules with one bit per module, in row-major order. Each row
+		takes (size + 7) // 8 bytes, and module (x, y) is bit (x % 8) of byte
+		y * ((size + 7) // 8) + x // 8, counting from the least significant bit. Padding bits
+		are 0. This is the get_packed_rows() layout as little-endian bytes."""
+		rowbytes: int = (self._size + 7) // 8
+		return b"".join(row.to_bytes(rowbytes, "little") for row in self._modules)
+	
+	def get_module_view(self) -> memoryview:
+		"""Returns a read-only memoryview of get_module_bytes() with shape (size, size), so that
+		view[y, x] is 1 for a dark module and 0 for a light one. It supports the buffer protocol
+		without copying, for example to numpy.asarray(view) or a file's write()."""
+		size: int = self._size
+		return memoryview(self.get_module_bytes()).cast("B", (size, size))
+	
 	def get_module(self, x: int, y: int) -> bool:
 		"""Returns the color of the module (pixel) at the given coordinates, which is False
 		for light or True for dark. The top left corner has the coordinates (x=0, y=0).
 		If the given coordinates are out of bounds, then False (light) is returned."""
-		return (0 <= x < self._size) and (0 <= y < self._size) and self._modules[y][x]
+		return (0 <= x < self._size) and (0 <= y < self._size) and _get_bit(self._modules[y], x)
 	
 	
 	# ---- Private helper methods for constructor: Drawing function modules ----
 	
+	@staticmethod
+	def _get_function_template(version: int) -> tuple[Sequence[int],Sequence[int]]:
+		"""Returns the (modules, isfunction) rows of a QR Code of the given version that has only
+		its function patterns drawn. Drawn on first use of each version and then served from a cache."""
+		cached: Optional[tuple[Sequence[int],Sequence[int]]] = QrCode._FUNCTION_TEMPLATE_CACHE.get(version)
+		if cached is None:
+			blank: QrCode = object.__new__(QrCode)
+			blank._version = version
+			blank._size = version * 4 + 17
+			blank._modules    = [0] * blank._size  # Initially all light
+			blank._isfunction = [0] * blank._size
+			blank._draw_function_patterns()
+			cached = (tuple(blank._modules), tuple(blank._isfunction))
+			QrCode._FUNCTION_TEMPLATE_CACHE[version] = cached
+		return cached
+	
+	
 	def _draw_function_patterns(self) -> None:
-		"""Reads this object's version field, and draws and marks all function modules."""
+		"""Reads this object's version field, and draws and marks all function modules. The format
+		modules are marked but left light; _draw_format_bits() fills them in for each mask. This only
+		runs once per version, to fill the template cache used by the constructor."""
 		# Draw horizontal and vertical timing patterns
 		for i in range(self._size):
 			self._set_function_module(6, i, i % 2 == 0)
@@ -252,37 +382,49 @@ class QrCode:
 				if (i, j) not in skips:  # Don't draw on the three finder corners
 					self._draw_alignment_pattern(alignpatpos[i], alignpatpos[j])
 		
+		# Reserve the format modules, and draw the module next to them that is always dark
+		for (y, area, _) in QrCode._get_format_rows(self._version, 0):
+			self._modules[y] &= ~area
+			self._isfunction[y] |= area
+		self._set_function_module(8, self._size - 8, True)
+		
 		# Draw configuration data
-		self._draw_format_bits(0)  # Dummy mask value; overwritten later in the constructor
 		self._draw_version()
 	
 	
 	def _draw_format_bits(self, mask: int) -> None:
 		"""Draws two copies of the format bits (with its own error correction code)
-		based on the given mask and this object's error correction level field."""
-		# Calculate error correction code and pack bits
-		data: int = self._errcorlvl.formatbits << 3 | mask  # errCorrLvl is uint2, mask is uint3
-		rem: int = data
-		for _ in range(10):
-			rem = (rem << 1) ^ ((rem >> 9) * 0x537)
-		bits: int = (data << 10 | rem) ^ 0x5412  # uint15
-		assert bits >> 15 == 0
-		
-		# Draw first copy
-		for i in range(0, 6):
-			self._set_function_module(8, i, _get_bit(bits, i))
-		self._set_function_module(8, 7, _get_bit(bits, 6))
-		self._set_function_module(8, 8, _get_bit(bits, 7))
-		self._set_function_module(7, 8, _get_bit(bits, 8))
-		for i in range(9, 15):
-			self._set_function_module(14 - i, 8, _get_bit(bits, i))
-		
-		# Draw second copy
-		for i in range(0, 8):
-			self._set_function_module(self._size - 1 - i, 8, _get_bit(bits, i))
-		for i in range(8, 15):
-			self._set_function_module(8, self._size - 15 + i, _get_bit(bits, i))
-		self._set_function_module(8, self._size - 8, True)  # Always dark
+		based on the given mask and this object's error correction level field.
+		The format modules must already be marked as function modules."""
+		bits: int = _FORMAT_WORDS[self._errcorlvl.formatbits << 3 | mask]
+		modules: list[int] = self._modules
+		for (y, area, rowbits) in QrCode._get_format_rows(self._version, bits):
+			modules[y] = (modules[y] & ~area) | rowbits
+	
+	
+	@staticmethod
+	def _get_format_rows(version: int, bits: int) -> Sequence[tuple[int,int,int]]:
+		"""Returns (y, area, rowbits) for every row that holds format modules in a QR Code of the given
+		version, where area marks the format modules of row y and rowbits marks those of them that are
+		dark for the given 15-bit format word. Cached per (version, word); there are 32 distinct words."""
+		key: tuple[int,int] = (version, bits)
+		cached: Optional[Sequence[tuple[int,int,int]]] = QrCode._FORMAT_ROWS_CACHE.get(key)
+		if cached is not None:
+			return cached
+		size: int = version * 4 + 17
+		# Coordinates of format bits 0 to 14 in the first copy, then in the second copy
+		positions: list[tuple[int,int]] = [(8, i) for i in range(0, 6)] + [(8, 7), (8, 8), (7, 8)] \
+			+ [(14 - i, 8) for i in range(9, 15)] \
+			+ [(size - 1 - i, 8) for i in range(0, 8)] + [(8, size - 15 + i) for i in range(8, 15)]
+		area: dict[int,int] = {}
+		rowbits: dict[int,int] = {}
+		for (i, (x, y)) in enumerate(positions):
+			i %= 15
+			area[y] = area.get(y, 0) | (1 << x)
+			rowbits[y] = rowbits.get(y, 0) | (int(_get_bit(bits, i)) << x)
+		result: Sequence[tuple[int,int,int]] = tuple((y, area[y], rowbits[y]) for y in sorted(area))
+		QrCode._FORMAT_ROWS_CACHE[key] = result
+		return result
 	
 	
 	def _draw_version(self) -> None:
@@ -291,12 +433,7 @@ class QrCode:
 		if self._version < 7:
 			return
 		
-		# Calculate error correction code and pack bits
-		rem: int = self._version  # version is uint6, in the range [7, 40]
-		for _ in range(12):
-			rem = (rem << 1) ^ ((rem >> 11) * 0x1F25)
-		bits: int = self._version << 12 | rem  # uint18
-		assert bits >> 18 == 0
+		bits: int = _VERSION_WORDS[self._version]  # uint18
 		
 		# Draw two copies
 		for i in range(18):
@@ -330,8 +467,12 @@ class QrCode:
 		"""Sets the color of a module and marks it as a function module.
 		Only used by the constructor. Coordinates must be in bounds."""
 		assert type(isdark) is bool
-		self._modules[y][x] = isdark
-		self._isfunction[y][x] = True
+		bit: int = 1 << x
+		if isdark:
+			self._modules[y] |= bit
+		else:
+			self._modules[y] &= ~bit
+		self._isfunction[y] |= bit
 	
 	
 	# ---- Private helper methods for constructor: Codewords and masking ----
@@ -340,7 +481,7 @@ class QrCode:
 		"""Returns a new byte string representing the given data with the appropriate error correction
 		codewords appended to it, based on this object's version and error correction level."""
 		version: int = self._version
-		assert len(data) == QrCode._get_num_data_codewords(version, self._errcorlvl)
+		assert len(data) * 8 == _DATA_CAPACITY_BITS[self._errcorlvl.ordinal][version]
 		
 		# Calculate parameter numbers
 		numblocks: int = QrCode._NUM_ERROR_CORRECTION_BLOCKS[self._errcorlvl.ordinal][version]
@@ -363,37 +504,73 @@ class QrCode:
 		assert k == len(data)
 		
 		# Interleave (not concatenate) the bytes from every block into a single sequence
-		result = bytearray()
-		for i in range(len(blocks[0])):
-			for (j, blk) in enumerate(blocks):
-				# Skip the padding byte in short blocks
-				if (i != shortblocklen - blockecclen) or (j >= numshortblocks):
-					result.append(blk[i])
+		result = bytearray(itertools.chain.from_iterable(zip(*blocks)))
+		# Skip the padding bytes in short blocks, which form one contiguous run after interleaving
+		pad: int = (shortblocklen - blockecclen) * numblocks
+		del result[pad : pad + numshortblocks]
 		assert len(result) == rawcodewords
 		return result
 	
 	
 	def _draw_codewords(self, data: bytes) -> None:
 		"""Draws the given sequence of 8-bit codewords (data and error correction) onto the entire
-		data area of this QR Code. Function modules need to be marked off before this is called."""
+		data area of this QR Code. Function modules need to be marked off before this is called.
+		Uses the cached placement of this version, so drawing is one linear pass over the bits."""
 		assert len(data) == QrCode._get_num_raw_data_modules(self._version) // 8
 		
-		i: int = 0  # Bit index into the data
+		# The codeword bits in order, followed by one light bit that all function and remainder modules
+		# pick. If this QR Code has any remainder bits (0 to 7), they are left light by this method.
+		bits: str = format(int.from_bytes(data, "big"), f"0{len(data) * 8}b") + "0"
+		modules: list[int] = self._modules
+		for (y, rowgetter) in enumerate(QrCode._get_codeword_row_getters(self._version)):
+			modules[y] |= int("".join(rowgetter(bits)), 2)
+	
+	
+	@staticmethod
+	def _get_codeword_positions(version: int) -> array.array[int]:
+		"""Returns the module of every codeword bit (data and error correction, excluding remainder bits)
+		in a QR Code of the given version, in bit order, each as the index y * size + x. This is the order
+		of the zigzag scan, so a decoder or verifier can read the bits back in the same order. Cached per version."""
+		cached: Optional[array.array[int]] = QrCode._CODEWORD_POSITIONS_CACHE.get(version)
+		if cached is not None:
+			return cached
+		size: int = version * 4 + 17
+		isfunction: Sequence[int] = QrCode._get_function_template(version)[1]
+		numbits: int = QrCode._get_num_raw_data_modules(version) // 8 * 8
+		result = array.array("H")
 		# Do the funny zigzag scan
-		for right in range(self._size - 1, 0, -2):  # Index of right column in each column pair
+		for right in range(size - 1, 0, -2):  # Index of right column in each column pair
 			if right <= 6:
 				right -= 1
-			for vert in range(self._size):  # Vertical counter
+			upward: bool = (right + 1) & 2 == 0
+			for vert in range(size):  # Vertical counter
+				y: int = (size - 1 - vert) if upward else vert  # Actual y coordinate
 				for j in range(2):
 					x: int = right - j  # Actual x coordinate
-					upward: bool = (right + 1) & 2 == 0
-					y: int = (self._size - 1 - vert) if upward else vert  # Actual y coordinate
-					if (not self._isfunction[y][x]) and (i < len(data) * 8):
-						self._modules[y][x] = _get_bit(data[i >> 3], 7 - (i & 7))
-						i += 1
-					# If this QR Code has any remainder bits (0 to 7), they were assigned as
-					# 0/false/light by the constructor and are left unchanged by this method
-		assert i == len(data) * 8
+					if (not _get_bit(isfunction[y], x)) and (len(result) < numbits):
+						result.append(y * size + x)
+		assert len(result) == numbits
+		QrCode._CODEWORD_POSITIONS_CACHE[version] = result
+		return result
+	
+	
+	@staticmethod
+	def _get_codeword_row_getters(version: int) -> Sequence[operator.itemgetter[str]]:
+		"""Returns one getter per row of a QR Code of the given version. Applied to the string of all
+		codeword bits followed by a '0' sentinel, the getter of row y returns the characters of the modules
+		(size-1, y) down to (0, y), with the sentinel for function and remainder modules. Cached per version."""
+		cached: Optional[Sequence[operator.itemgetter[str]]] = QrCode._CODEWORD_ROW_GETTERS_CACHE.get(version)
+		if cached is not None:
+			return cached
+		size: int = version * 4 + 17
+		positions: array.array[int] = QrCode._get_codeword_positions(version)
+		grid: list[int] = [len(positions)] * (size * size)  # Sentinel index by default
+		for (i, pos) in enumerate(positions):
+			grid[pos] = i
+		result: Sequence[operator.itemgetter[str]] = tuple(
+			operator.itemgetter(*reversed(grid[y * size : (y + 1) * size])) for y in range(size))
+		QrCode._CODEWORD_ROW_GETTERS_CACHE[version] = result
+		return result
 	
 	
 	def _apply_mask(self, mask: int) -> None:
@@ -404,75 +581,296 @@ class QrCode:
 		QR Code needs exactly one (not zero, two, etc.) mask applied."""
 		if not (0 <= mask <= 7):
 			raise ValueError("Mask value out of range")
-		masker: collections.abc.Callable[[int,int],int] = QrCode._MASK_PATTERNS[mask]
+		maskrows: Sequence[int] = self._get_mask_rows(mask)
+		modules: list[int] = self._modules
 		for y in range(self._size):
-			for x in range(self._size):
-				self._modules[y][x] ^= (masker(x, y) == 0) and (not self._isfunction[y][x])
+			modules[y] ^= maskrows[y]
+	
+	
+	def _get_mask_rows(self, mask: int) -> Sequence[int]:
+		"""Returns the rows of the given mask pattern for this object's version, as bitmasks that
+		already exclude the function modules. Function modules depend only on the version, so the
+		rows are computed from the first object of each version and then served from a cache."""
+		key: tuple[int,int] = (self._version, mask)
+		result: Optional[Sequence[int]] = QrCode._MASK_ROWS_CACHE.get(key)
+		if result is None:
+			masker: collections.abc.Callable[[int,int],int] = QrCode._MASK_PATTERNS[mask]
+			size: int = self._size
+			result = tuple(
+				sum((1 << x) for x in range(size) if masker(x, y) == 0) & ~self._isfunction[y]
+				for y in range(size))
+			QrCode._MASK_ROWS_CACHE[key] = result
+		return result
 	
 	
-	def _get_penalty_score(self) -> int:
-		"""Calculates and returns the penalty score based on state of this QR Code's current modules.
-		This is used by the automatic mask choice algorithm to find the mask pattern that yields the lowest score."""
-		result: int = 0
+	def _choose_mask(self) -> int:
+		"""Returns the mask with the lowest penalty score, the lowest mask number on ties, scoring the
+		candidates one at a time in this thread. Leaves the modules unmasked."""
+		result: int = -1
+		minpenalty: int = 1 << 32
+		for i in range(8):
+			self._apply_mask(i)
+			self._draw_format_bits(i)
+			# A candidate whose total reaches the best so far cannot win (ties keep the lower mask)
+			penalty = self._get_penalty_score(minpenalty)
+			if penalty < minpenalty:
+				result = i
+				minpenalty = penalty
+			self._apply_mask(i)  # Undoes the mask due to XOR
+		return result
+	
+	
+	def _choose_mask_fast(self) -> int:
+		"""Returns a mask chosen from an estimated penalty instead of the full score. Checks the masks in
+		order of increasing estimate (ties go to the lower mask number), usually only the first few, and
+		returns the first that leaves no false finder-like pattern, or -1 if every mask leaves one. Leaves
+		the modules unmasked."""
+		estimates: list[int] = []
+		for i in range(8):
+			self._apply_mask(i)
+			self._draw_format_bits(i)
+			estimates.append(QrCode._estimate_penalty(self._size, self._modules))
+			self._apply_mask(i)
+		self._linesscored += 8 * self._size
+		
+		for i in sorted(range(8), key=lambda i: (estimates[i], i)):
+			self._apply_mask(i)
+			self._draw_format_bits(i)
+			falsefinders: int = self._count_false_finder_patterns()
+			self._apply_mask(i)
+			if falsefinders == 0:
+				return i
+		return -1
+	
+	
+	def _choose_mask_numpy(self) -> int:
+		"""Returns the mask with the lowest penalty score (the lowest mask number on ties), exactly like the
+		serial search. The eight masked candidates, each with its format bits, are built as one NumPy array of
+		shape (8, size, size) and scored together by _compute_penalties_numpy(). Leaves the modules unmasked."""
 		size: int = self._size
-		modules: list[list[bool]] = self._modules
-		
-		# Adjacent modules in row having same color, and finder-like patterns
-		for y in range(size):
-			runcolor: bool = False
-			runx: int = 0
-			runhistory = collections.deque([0] * 7, 7)
-			for x in range(size):
-				if modules[y][x] == runcolor:
-					runx += 1
-					if runx == 5:
-						result += QrCode._PENALTY_N1
-					elif runx > 5:
-						result += 1
-				else:
-					self._finder_penalty_add_history(runx, runhistory)
-					if not runcolor:
-						result += self._finder_penalty_count_patterns(runhistory) * QrCode._PENALTY_N3
-					runcolor = modules[y][x]
-					runx = 1
-			result += self._finder_penalty_terminate_and_count(runcolor, runx, runhistory) * QrCode._PENALTY_N3
-		# Adjacent modules in column having same color, and finder-like patterns
-		for x in range(size):
-			runcolor = False
-			runy: int = 0
-			runhistory = collections.deque([0] * 7, 7)
-			for y in range(size):
-				if modules[y][x] == runcolor:
-					runy += 1
-					if runy == 5:
-						result += QrCode._PENALTY_N1
-					elif runy > 5:
-						result += 1
-				else:
-					self._finder_penalty_add_history(runy, runhistory)
-					if not runcolor:
-						result += self._finder_penalty_count_patterns(runhistory) * QrCode._PENALTY_N3
-					runcolor = modules[y][x]
-					runy = 1
-			result += self._finder_penalty_terminate_and_count(runcolor, runy, runhistory) * QrCode._PENALTY_N3
+		candidates = QrCode._rows_to_array(size, self._modules)[numpy.newaxis] ^ self._get_mask_arrays()
+		ys, xs, values = QrCode._get_format_arrays(self._version, self._errcorlvl)
+		candidates[:, ys, xs] = values
+		self._linesscored += 8 * 2 * size  # Every candidate is scored in full
+		return int(QrCode._compute_penalties_numpy(size, candidates).argmin())
+	
+	
+	def _get_mask_arrays(self) -> numpy.ndarray:
+		"""Returns the rows of _get_mask_rows() for all eight masks as one uint8 array of shape
+		(8, size, size), with 1 where a module is flipped. Cached per version."""
+		result: Optional[numpy.ndarray] = QrCode._MASK_ARRAY_CACHE.get(self._version)
+		if result is None:
+			result = numpy.stack([QrCode._rows_to_array(self._size, self._get_mask_rows(i)) for i in range(8)])
+			result.flags.writeable = False
+			QrCode._MASK_ARRAY_CACHE[self._version] = result
+		return result
+	
+	
+	@staticmethod
+	def _get_format_arrays(version: int, ecl: QrCode.Ecc) -> tuple[numpy.ndarray,numpy.ndarray,numpy.ndarray]:
+		"""Returns (ys, xs, values) where the format modules of the given version are at (xs[i], ys[i]), and
+		values[mask, i] is that module's color for the format word of the given error correction level and
+		the mask. Derived from _get_format_rows(), and cached per (version, level)."""
+		key: tuple[int,int] = (version, ecl.formatbits)
+		cached: Optional[tuple[numpy.ndarray,numpy.ndarray,numpy.ndarray]] = QrCode._FORMAT_ARRAYS_CACHE.get(key)
+		if cached is not None:
+			return cached
+		size: int = version * 4 + 17
+		coords: list[tuple[int,int]] = [(y, x) for (y, area, _) in QrCode._get_format_rows(version, 0)
+			for x in range(size) if _get_bit(area, x)]
+		values: list[list[int]] = [
+			[int(_get_bit(rowbits, x)) for (y, area, rowbits) in QrCode._get_format_rows(version, _FORMAT_WORDS[ecl.formatbits << 3 | mask])
+				for x in range(size) if _get_bit(area, x)]
+			for mask in range(8)]
+		result = (numpy.array([y for (y, _) in coords]), numpy.array([x for (_, x) in coords]), numpy.array(values, dtype=numpy.uint8))
+		QrCode._FORMAT_ARRAYS_CACHE[key] = result
+		return result
+	
+	
+	@staticmethod
+	def _rows_to_array(size: int, rows: Sequence[int]) -> numpy.ndarray:
+		"""Returns the given row bitmasks as a new uint8 array of shape (size, size) indexed [y, x]."""
+		width: int = (size + 7) // 8
+		packed = numpy.frombuffer(b"".join(row.to_bytes(width, "little") for row in rows), dtype=numpy.uint8)
+		return numpy.unpackbits(packed.reshape(size, width), axis=1, count=size, bitorder="little")
+	
+	
+	@staticmethod
+	def _compute_penalties_numpy(size: int, grids: numpy.ndarray) -> numpy.ndarray:
+		"""Returns the penalty score of each of the given 0/1 uint8 grids of shape (n, size, size), as an int64
+		array of length n. The scores equal those of _compute_penalty(). All rows and columns are laid out in one
+		flat array, each after a light gap as in _get_penalty_layout(), and most rules compare shifted slices.
+		For finder-like patterns the flat array is cut into runs at its color changes. Only dark runs that are
+		three times as long as the dark run two before them, which in turn is as long as the one two after
+		them, are checked further, so the exact 1:1:3:1:1 test runs on a small fraction of all runs."""
+		count: int = grids.shape[0]
+		stride, gap, _, _ = QrCode._get_penalty_layout(size)
+		gaplen: int = len(gap)
+		flat = numpy.zeros(count * size * 2 * stride + gaplen, dtype=numpy.uint8)  # Ends with a light gap too
+		padded = flat[ : -gaplen].reshape(count, size * 2, stride)
+		padded[:, : size, gaplen : ] = grids
+		padded[:, size : , gaplen : ] = grids.transpose(0, 2, 1)
+		lines = padded[:, :, gaplen : ]  # Rows, then columns
+		
+		# Balance of dark and light modules
+		dark = grids.sum(axis=(1, 2), dtype=numpy.int64)
+		total: int = size**2  # Note that size is odd, so dark/total != 1/2
+		result = ((numpy.abs(dark * 20 - total * 10) + total - 1) // total - 1) * QrCode._PENALTY_N4
 		
 		# 2*2 blocks of modules having same color
-		for y in range(size - 1):
-			for x in range(size - 1):
-				if modules[y][x] == modules[y][x + 1] == modules[y + 1][x] == modules[y + 1][x + 1]:
-					result += QrCode._PENALTY_N2
+		corner = grids[:, : -1, : -1]
+		blocks = (corner == grids[:, : -1, 1 : ]) & (corner == grids[:, 1 : , : -1]) & (corner == grids[:, 1 : , 1 : ])
+		result += blocks.sum(axis=(1, 2), dtype=numpy.int64) * QrCode._PENALTY_N2
+		
+		# Adjacent modules in rows and columns having same color: windows of five equal modules, plus N1-1 per run of windows
+		eq = lines[:, :, 1 : ] == lines[:, :, : -1]
+		windows = eq[:, :, : -3] & eq[:, :, 1 : -2] & eq[:, :, 2 : -1] & eq[:, :, 3 : ]
+		result += windows.sum(axis=(1, 2), dtype=numpy.int64)
+		result += (windows[:, :, 0].sum(axis=1, dtype=numpy.int64)
+			+ (windows[:, :, 1 : ] & ~windows[:, :, : -1]).sum(axis=(1, 2), dtype=numpy.int64)) * (QrCode._PENALTY_N1 - 1)
+		
+		# Finder-like patterns in rows and columns. Run j > 0 ends at edges[j], runs alternate starting with
+		# light, so run j = 2k+1 is the k-th dark run, and the first and last runs are light gaps
+		edges = numpy.flatnonzero(flat[1 : ] != flat[ : -1])
+		darkruns = edges[1 : : 2] - edges[0 : : 2]
+		n = darkruns[ : -2]
+		core = (numpy.flatnonzero((darkruns[1 : -1] == n * 3) & (darkruns[2 : ] == n)) + 1) * 2 + 1  # Middle run
+		n = darkruns[(core - 3) // 2]
+		keep = (edges[core - 1] - edges[core - 2] == n) & (edges[core + 1] - edges[core] == n)
+		core = core[keep]
+		n = n[keep]
+		outside: int = flat.size  # Longer than any run; stands for the first and last gap
+		before = numpy.where(core > 3, edges[core - 3] - edges[core - 4], outside)
+		after = numpy.where(core + 3 < len(edges), edges[numpy.minimum(core + 3, len(edges) - 1)] - edges[core + 2], outside)
+		patterns = ((after >= n * 4) & (before >= n)).astype(numpy.int64) + ((before >= n * 4) & (after >= n))
+		owners = edges[core - 1] // (size * 2 * stride)
+		return result + numpy.bincount(owners, weights=patterns, minlength=count).astype(numpy.int64) * QrCode._PENALTY_N3
+	
+	
+	def _count_false_finder_patterns(self) -> int:
+		"""Returns the number of finder-like patterns, counted as in the penalty score, in this QR Code's
+		current modules after the three finder patterns and their separators are blanked to light. Blanking
+		can only add light space around a nearby pattern, so a result of 0 means none of the counted
+		patterns is anything but one of the three real finder patterns."""
+		size: int = self._size
+		corner: int = (1 << 8) - 1
+		blanked: list[int] = list(self._modules)
+		for i in range(8):
+			blanked[i] &= ~(corner | (corner << (size - 8)))
+			blanked[size - 1 - i] &= ~corner
+		_, gap, _, _ = QrCode._get_penalty_layout(size)
+		rowbits: list[str] = [format(row, f"0{size}b") for row in blanked]
+		grid: str = "".join(rowbits)
+		self._linesscored += size * 2
+		return QrCode._finder_penalty_count_patterns(size, int(gap.join(rowbits) + gap, 2)) \
+			+ QrCode._finder_penalty_count_patterns(size, int(gap.join(grid[i :: size] for i in range(size)) + gap, 2))
+	
+	
+	def _get_penalty_score(self, cutoff: int = 1 << 32) -> int:
+		"""Calculates and returns the penalty score based on state of this QR Code's current modules.
+		This is used by the automatic mask choice algorithm to find the mask pattern that yields the lowest score.
+		Scoring stops as soon as the running total reaches the given cutoff, in which case the result is only
+		known to be at least the cutoff. The number of rows and columns scored is added to this object's counter."""
+		result, lines = QrCode._compute_penalty(self._size, self._modules, cutoff)
+		self._linesscored += lines
+		return result
+	
+	
+	@staticmethod
+	def _compute_penalty(size: int, rows: Sequence[int], cutoff: int = 1 << 32) -> tuple[int,int]:
+		"""Returns the penalty score of the given grid of row bitmasks, and the number of rows and columns
+		scored. Lines are packed into large integers with light gaps between them, so that every rule is
+		evaluated for many lines at once with shifts, bitwise operations and popcounts. The score is exactly
+		that of the upstream module-by-module scan with run histories. Every term is non-negative, so once
+		the running total reaches the cutoff the remaining terms are skipped and the partial total is
+		returned, along with the number of lines actually scored: all the rows, or all the rows and
+		columns. The rows come first and are scored as one integer, cheapest terms first."""
+		stride, gap, eqmask, _ = QrCode._get_penalty_layout(size)
+		rowbits: list[str] = [format(row, f"0{size}b") for row in rows]
+		packedrows: int = int(gap.join(rowbits) + gap, 2)
+		
+		# Balance, 2*2 blocks, and adjacent modules in rows having same color
+		result: int = QrCode._row_penalty_terms(size, packedrows)
+		if result >= cutoff:
+			return (result, size)
+		# Finder-like patterns in rows
+		result += QrCode._finder_penalty_count_patterns(size, packedrows) * QrCode._PENALTY_N3
+		if result >= cutoff:
+			return (result, size)
+		
+		# Same for the columns
+		grid: str = "".join(rowbits)
+		packedcols: int = int(gap.join(grid[i :: size] for i in range(size)) + gap, 2)
+		result += QrCode._run_penalty(packedcols, eqmask)
+		result += QrCode._finder_penalty_count_patterns(size, packedcols) * QrCode._PENALTY_N3
+		assert 0 <= result <= 2568888  # Non-tight upper bound based on default values of PENALTY_N1, ..., N4
+		return (result, size * 2)
+	
+	
+	@staticmethod
+	def _estimate_penalty(size: int, rows: Sequence[int]) -> int:
+		"""Returns the part of the penalty score of the given grid of row bitmasks that needs neither the
+		columns nor the finder-like pattern scan: dark/light balance, 2*2 blocks, and runs within rows."""
+		_, gap, _, _ = QrCode._get_penalty_layout(size)
+		return QrCode._row_penalty_terms(size, int(gap.join(format(row, f"0{size}b") for row in rows) + gap, 2))
+	
+	
+	@staticmethod
+	def _row_penalty_terms(size: int, packedrows: int) -> int:
+		"""Returns the N4 balance, N2 block and row-wise N1 run penalties of the given packed rows."""
+		stride, _, eqmask, blockmask = QrCode._get_penalty_layout(size)
 		
 		# Balance of dark and light modules
-		dark: int = sum((1 if cell else 0) for row in modules for cell in row)
+		dark: int = packedrows.bit_count()
 		total: int = size**2  # Note that size is odd, so dark/total != 1/2
 		# Compute the smallest integer k >= 0 such that (45-5k)% <= dark/total <= (55+5k)%
 		k: int = (abs(dark * 20 - total * 10) + total - 1) // total - 1
 		assert 0 <= k <= 9
-		result += k * QrCode._PENALTY_N4
-		assert 0 <= result <= 2568888  # Non-tight upper bound based on default values of PENALTY_N1, ..., N4
+		result: int = k * QrCode._PENALTY_N4
+		
+		# 2*2 blocks of modules having same color
+		samevert: int = ~(packedrows ^ (packedrows >> stride))
+		samehorz: int = ~(packedrows ^ (packedrows >> 1))
+		result += (samevert & (samevert >> 1) & samehorz & blockmask).bit_count() * QrCode._PENALTY_N2
+		
+		# Adjacent modules in rows having same color
+		return result + QrCode._run_penalty(packedrows, eqmask)
+	
+	
+	# ---- Private helper functions ----
+	
+	@staticmethod
+	def _get_penalty_layout(size: int) -> tuple[int,str,int,int]:
+		"""Returns (stride, gap, eqmask, blockmask) for packing size lines of size modules into one
+		integer, as done by _compute_penalty(). Each line is followed by a gap of light modules that is
+		longer than any window the finder-like pattern rule inspects, so the gap behaves exactly like the
+		light border of the upstream algorithm. In eqmask, bit i is set iff modules i and i+1 belong to
+		the same line; blockmask additionally excludes the last line, which has no line below it."""
+		cached: Optional[tuple[int,str,int,int]] = QrCode._PENALTY_LAYOUT_CACHE.get(size)
+		if cached is not None:
+			return cached
+		gaplen: int = size // 7 * 4 + 1
+		stride: int = size + gaplen
+		linepairs: int = (1 << (size - 1)) - 1
+		blockmask: int = 0
+		for i in range(size - 1):
+			blockmask |= linepairs << (i * stride + gaplen)
+		eqmask: int = blockmask | (linepairs << ((size - 1) * stride + gaplen))
+		result: tuple[int,str,int,int] = (stride, "0" * gaplen, eqmask, blockmask)
+		QrCode._PENALTY_LAYOUT_CACHE[size] = result
 		return result
 	
 	
+	@staticmethod
+	def _run_penalty(packed: int, eqmask: int) -> int:
+		"""Returns the N1 penalty of all lines in the given packed integer. A run of L >= 5 same-colored
+		modules contains L-4 windows of five equal modules and scores N1 + (L-5), which is the number of
+		such windows plus N1-1 for each maximal block of consecutive windows."""
+		eq: int = ~(packed ^ (packed >> 1)) & eqmask  # Bit i set iff modules i and i+1 are equal
+		windows: int = eq & (eq >> 1) & (eq >> 2) & (eq >> 3)  # Bit i set iff modules i..i+4 are equal
+		return windows.bit_count() + (windows & ~(windows << 1)).bit_count() * (QrCode._PENALTY_N1 - 1)
+	
+	
 	# ---- Private helper functions ----
 	
 	def _get_alignment_pattern_positions(self) -> list[int]:
@@ -509,7 +907,7 @@ class QrCode:
 	def _get_num_data_codewords(ver: int, ecl: QrCode.Ecc) -> int:
 		"""Returns the number of 8-bit data (i.e. not error correction) codewords contained in any
 		QR Code of the given version number and error correction level, with remainder bits discarded.
-		This stateless pure function could be implemented as a (40*4)-cell lookup table."""
+		The encoder reads this (40*4)-cell table from _DATA_CAPACITY_BITS, which is built by this function."""
 		return QrCode._get_num_raw_data_modules(ver) // 8 \
 			- QrCode._ECC_CODEWORDS_PER_BLOCK    [ecl.ordinal][ver] \
 			* QrCode._NUM_ERROR_CORRECTION_BLOCKS[ecl.ordinal][ver]
@@ -517,10 +915,13 @@ class QrCode:
 	
 	@staticmethod
 	def _reed_solomon_compute_divisor(degree: int) -> bytes:
-		"""Returns a Reed-Solomon ECC generator polynomial for the given degree. This could be
-		implemented as a lookup table over all possible parameter values, instead of as an algorithm."""
+		"""Returns a Reed-Solomon ECC generator polynomial for the given degree. The generator
+		depends only on the degree, so each one is computed once and then served from a cache."""
 		if not (1 <= degree <= 255):
 			raise ValueError("Degree out of range")
+		cached: Optional[bytes] = QrCode._RS_DIVISOR_CACHE.get(degree)
+		if cached is not None:
+			return cached
 		# Polynomial coefficients are stored from highest to lowest power, excluding the leading term which is always 1.
 		# For example the polynomial x^3 + 255x^2 + 8x + 93 is stored as the uint8 array [255, 8, 93].
 		result = bytearray([0] * (degree - 1) + [1])  # Start off with the monomial x^0
@@ -536,60 +937,89 @@ class QrCode:
 				if j + 1 < degree:
 					result[j] ^= result[j + 1]
 			root = QrCode._reed_solomon_multiply(root, 0x02)
-		return result
+		divisor = bytes(result)
+		QrCode._RS_DIVISOR_CACHE[degree] = divisor
+		return divisor
 	
 	
 	@staticmethod
 	def _reed_solomon_compute_remainder(data: bytes, divisor: bytes) -> bytes:
-		"""Returns the Reed-Solomon error correction codeword for the given data and divisor polynomials."""
-		result = bytearray([0] * len(divisor))
+		"""Returns the Reed-Solomon error correction codeword for the given data and divisor polynomials.
+		The remainder is kept as one big-endian integer, so each data byte costs a shift,
+		a lookup in the divisor's product table and an XOR, with no per-coefficient multiplication."""
+		degree: int = len(divisor)
+		table: Sequence[int] = QrCode._reed_solomon_product_table(divisor)
+		shift: int = (degree - 1) * 8
+		lowmask: int = (1 << shift) - 1
+		rem: int = 0
 		for b in data:  # Polynomial division
-			factor: int = b ^ result.pop(0)
-			result.append(0)
-			for (i, coef) in enumerate(divisor):
-				result[i] ^= QrCode._reed_solomon_multiply(coef, factor)
-		return result
+			rem = ((rem & lowmask) << 8) ^ table[b ^ (rem >> shift)]
+		return rem.to_bytes(degree, "big")
+	
+	
+	@staticmethod
+	def _reed_solomon_product_table(divisor: bytes) -> Sequence[int]:
+		"""Returns the products of the given divisor polynomial with each of the 256 field elements,
+		every product packed as a big-endian integer of len(divisor) bytes. Cached per divisor."""
+		key = bytes(divisor)
+		table: Optional[Sequence[int]] = QrCode._RS_PRODUCT_TABLE_CACHE.get(key)
+		if table is None:
+			logs: list[int] = [(_GF_LOG[coef] if coef != 0 else -1) for coef in key]
+			table = (0,) + tuple(
+				int.from_bytes(bytes(((_GF_EXP[lg + _GF_LOG[factor]] if lg >= 0 else 0) for lg in logs)), "big")
+				for factor in range(1, 256))
+			QrCode._RS_PRODUCT_TABLE_CACHE[key] = table
+		return table
 	
 	
 	@staticmethod
 	def _reed_solomon_multiply(x: int, y: int) -> int:
 		"""Returns the product of the two given field elements modulo GF(2^8/0x11D). The arguments and result
-		are unsigned 8-bit integers. This could be implemented as a lookup table of 256*256 entries of uint8."""
+		are unsigned 8-bit integers. Implemented with the module's log/antilog tables."""
 		if (x >> 8 != 0) or (y >> 8 != 0):
 			raise ValueError("Byte out of range")
-		# Russian peasant multiplication
-		z: int = 0
-		for i in reversed(range(8)):
-			z = (z << 1) ^ ((z >> 7) * 0x11D)
-			z ^= ((y >> i) & 1) * x
-		assert z >> 8 == 0
-		return z
+		if (x == 0) or (y == 0):
+			return 0
+		return _GF_EXP[_GF_LOG[x] + _GF_LOG[y]]
 	
 	
-	def _finder_penalty_count_patterns(self, runhistory: collections.deque[int]) -> int:
-		"""Can only be called immediately after a light run is added, and
-		returns either 0, 1, or 2. A helper function for _get_penalty_score()."""
-		n: int = runhistory[1]
-		assert n <= self._size * 3
-		core: bool = n > 0 and (runhistory[2] == runhistory[4] == runhistory[5] == n) and runhistory[3] == n * 3
-		return (1 if (core and runhistory[0] >= n * 4 and runhistory[6] >= n) else 0) \
-		     + (1 if (core and runhistory[6] >= n * 4 and runhistory[0] >= n) else 0)
-	
-	
-	def _finder_penalty_terminate_and_count(self, currentruncolor: bool, currentrunlength: int, runhistory: collections.deque[int]) -> int:
-		"""Must be called at the end of a line (row or column) of modules. A helper function for _get_penalty_score()."""
-		if currentruncolor:  # Terminate dark run
-			self._finder_penalty_add_history(currentrunlength, runhistory)
-			currentrunlength = 0
-		currentrunlength += self._size  # Add light border to final run
-		self._finder_penalty_add_history(currentrunlength, runhistory)
-		return self._finder_penalty_count_patterns(runhistory)
-	
-	
-	def _finder_penalty_add_history(self, currentrunlength: int, runhistory: collections.deque[int]) -> None:
-		if runhistory[0] == 0:
-			currentrunlength += self._size  # Add light border to initial run
-		runhistory.appendleft(currentrunlength)
+	@staticmethod
+	def _finder_penalty_count_patterns(size: int, packed: int) -> int:
+		"""Returns the number of finder-like patterns in all lines of the given packed integer, counted
+		exactly like the upstream run-history scan: a dark-light-dark-light-dark core of exact runs
+		n, n, 3n, n, n counts once if it has at least 4n light modules after it and n before it, and
+		once more if it has 4n before and n after. Light borders count as arbitrarily long light runs."""
+		trans: int = packed ^ (packed << 1)  # Bit i set iff modules i and i-1 differ
+		notrans: int = ~trans
+		darkstart: int = packed & trans
+		result: int = 0
+		shortruns: int = -1  # Bit p set iff there is no transition at p .. p+n-2
+		middleruns: int = packed  # Bit p set iff modules p .. p+3n-1 are dark
+		for n in range(1, size // 7 + 1):
+			middleruns &= (packed >> (3 * n - 2)) & (packed >> (3 * n - 1))
+			if n >= 2:
+				shortruns &= notrans >> (n - 2)
+				middleruns &= packed >> (3 * n - 3)
+			if middleruns == 0:
+				break  # No dark run is long enough for the middle of this or any larger core
+			# A dark run starts at p and the six run boundaries of the core are transitions
+			core: int = darkstart & (trans >> n) & (trans >> (2 * n)) & (trans >> (5 * n)) \
+				& (trans >> (6 * n)) & (trans >> (7 * n))
+			if core == 0:
+				continue
+			# No further transitions inside the four short runs and the long middle run
+			inner: int = shortruns >> 1
+			core &= inner & (inner >> n) & (inner >> (5 * n)) & (inner >> (6 * n))
+			if core == 0:
+				continue
+			core &= _get_run_mask(notrans, 3 * n - 1) >> (2 * n + 1)
+			if core == 0:
+				continue
+			# Light run lengths before the core (ending at p-1) and after it (starting at p+7n)
+			longruns: int = _get_run_mask(notrans, 4 * n - 1)
+			result += (core & (longruns >> (7 * n + 1)) & (shortruns << (n - 1))).bit_count()
+			result += (core & (longruns << (4 * n - 1)) & (shortruns >> (7 * n + 1))).bit_count()
+		return result
 	
 	
 	# ---- Constants and tables ----
@@ -603,6 +1033,10 @@ class QrCode:
 	_PENALTY_N3: int = 40
 	_PENALTY_N4: int = 10
 	
+	# The highest version for which fastmask ranks the masks by an estimate. Above it nearly every mask
+	# leaves a false finder-like pattern, so the estimate and checks only add to the full search.
+	_FAST_MASK_MAX_VERSION: int = 3
+	
 	_ECC_CODEWORDS_PER_BLOCK: Sequence[Sequence[int]] = (
 		# Version: (note that index 0 is for padding, and is set to an illegal value)
 		# 0,  1,  2,  3,  4,  5,  6,  7,  8,  9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 26, 27, 28, 29, 30, 31, 32, 33, 34, 35, 36, 37, 38, 39, 40    Error correction level
@@ -619,6 +1053,36 @@ class QrCode:
 		(-1, 1, 1, 2, 2, 4, 4, 6, 6, 8, 8,  8, 10, 12, 16, 12, 17, 16, 18, 21, 20, 23, 23, 25, 27, 29, 34, 34, 35, 38, 40, 43, 45, 48, 51, 53, 56, 59, 62, 65, 68),  # Quartile
 		(-1, 1, 1, 2, 4, 4, 4, 5, 6, 8, 8, 11, 11, 16, 16, 18, 16, 19, 21, 25, 25, 25, 34, 30, 32, 35, 37, 40, 42, 45, 48, 51, 54, 57, 60, 63, 66, 70, 74, 77, 81))  # High
 	
+	# Lazily filled caches for the Reed-Solomon helpers. Generator polynomials depend only on the
+	# degree, and there are at most a few dozen distinct degrees in the tables above.
+	_RS_DIVISOR_CACHE: dict[int,bytes] = {}
+	_RS_PRODUCT_TABLE_CACHE: dict[bytes,Sequence[int]] = {}
+	
+	# Lazily filled cache for _get_mask_rows(), keyed by (version, mask).
+	_MASK_ROWS_CACHE: dict[tuple[int,int],Sequence[int]] = {}
+	
+	# Lazily filled caches for the per-version function pattern templates of the constructor,
+	# as (modules, isfunction) rows, and for _get_format_rows(). Both hold at most one entry per
+	# version (times 32 format words), and a template is only two tuples of row integers.
+	_FUNCTION_TEMPLATE_CACHE: dict[int,tuple[Sequence[int],Sequence[int]]] = {}
+	_FORMAT_ROWS_CACHE: dict[tuple[int,int],Sequence[tuple[int,int,int]]] = {}
+	
+	# Lazily filled caches of the codeword bit placement of each version, for _draw_codewords().
+	# The row getters of a version hold one index per module (about 1 MB for version 40).
+	_CODEWORD_POSITIONS_CACHE: dict[int,array.array[int]] = {}
+	_CODEWORD_ROW_GETTERS_CACHE: dict[int,Sequence[operator.itemgetter[str]]] = {}
+	
+	# Lazily filled caches of the NumPy matrix engine: all eight mask arrays of each version
+	# (about 250 kB for version 40), and the format module coordinates and colors per (version, level).
+	_MASK_ARRAY_CACHE: dict[int,numpy.ndarray] = {}
+	_FORMAT_ARRAYS_CACHE: dict[tuple[int,int],tuple[numpy.ndarray,numpy.ndarray,numpy.ndarray]] = {}
+	
+	# The engine of the automatic mask choice; see set_matrix_engine().
+	_matrix_engine: str = "python" if (numpy is None) else "numpy"
+	
+	# Lazily filled cache for _get_penalty_layout(), keyed by size.
+	_PENALTY_LAYOUT_CACHE: dict[int,tuple[int,str,int,int]] = {}
+	
 	_MASK_PATTERNS: Sequence[collections.abc.Callable[[int,int],int]] = (
 		(lambda x, y:  (x + y) % 2                  ),
 		(lambda x, y:  y % 2                        ),
@@ -677,9 +1141,7 @@ class QrSegment:
 		"""Returns a segment representing the given binary data encoded in byte mode.
 		All input byte lists are acceptable. Any text string can be converted to
 		UTF-8 bytes (s.encode("UTF-8")) and encoded as a byte mode segment."""
-		bb = _BitBuffer()
-		for b in data:
-			bb.append_bits(b, 8)
+		bb = _BitBuffer.from_bytes(data)  # Copies the bytes as one integer, without a per-byte loop
 		return QrSegment(QrSegment.Mode.BYTE, len(data), bb)
 	
 	
@@ -730,6 +1192,55 @@ class QrSegment:
 			return [QrSegment.make_bytes(text.encode("UTF-8"))]
 	
 	
+	@staticmethod
+	def make_segments_optimally(text: str, ecl: QrCode.Ecc, minversion: int = 1, maxversion: int = 40) -> list[QrSegment]:
+		"""Returns a new mutable list of zero or more segments to represent the given Unicode text string,
+		switching between numeric, alphanumeric and byte modes wherever that shortens the bit stream.
+		The split is optimal for the smallest version in the given range whose data capacity at the
+		given error correction level can hold it; pass the same range and ecl to encode_segments().
+		Raises DataTooLongError if no version in the range can hold the text. Byte segments hold the
+		UTF-8 encoding of whole characters, but decoders guess the character set of each byte segment
+		separately, so make_segments() may be the safer choice for text outside ASCII."""
+		return QrSegment.make_segments_optimally_with_version(text, ecl, minversion, maxversion)[1]
+	
+	
+	@staticmethod
+	def make_segments_optimally_with_version(text: str, ecl: QrCode.Ecc, minversion: int = 1, maxversion: int = 40) -> tuple[int,list[QrSegment]]:
+		"""Returns a pair of the smallest version in the given range that can hold the given text at the given
+		error correction level, and the segments of make_segments_optimally() for it. Pass the version as both
+		minversion and maxversion to encode_segments() so that it is not searched for a second time. Raises
+		DataTooLongError if no version in the range can hold the text."""
+		if not (QrCode.MIN_VERSION <= minversion <= maxversion <= QrCode.MAX_VERSION):
+			raise ValueError("Invalid value")
+		if text == "":
+			return (minversion, [])
+		
+		# The optimal split only depends on the character count field widths, so compute it once per tier
+		plans: dict[int,tuple[Optional[int],list[tuple[QrSegment.Mode,str]]]] = {}
+		def totalbits(ver: int) -> Optional[int]:
+			plan = QrSegment._split_optimally(text, ver)
+			plans[(ver + 7) // 17] = plan
+			return plan[0]
+		
+		version: Optional[int] = QrCode.find_min_version(totalbits, ecl, minversion, maxversion)
+		if version is None:
+			msg: str = "Segment too long"
+			datausedbits: Optional[int] = QrSegment._split_optimally(text, maxversion)[0]
+			if datausedbits is not None:
+				msg = f"Data length = {datausedbits} bits, Max capacity = {_DATA_CAPACITY_BITS[ecl.ordinal][maxversion]} bits"
+			raise DataTooLongError(msg)
+		
+		result: list[QrSegment] = []
+		for (mode, part) in plans[(version + 7) // 17][1]:
+			if mode is QrSegment.Mode.NUMERIC:
+				result.append(QrSegment.make_numeric(part))
+			elif mode is QrSegment.Mode.ALPHANUMERIC:
+				result.append(QrSegment.make_alphanumeric(part))
+			else:
+				result.append(QrSegment.make_bytes(part.encode("UTF-8")))
+		return (version, result)
+	
+	
 	@staticmethod
 	def make_eci(assignval: int) -> QrSegment:
 		"""Returns a segment representing an Extended Channel Interpretation
@@ -777,7 +1288,7 @@ class QrSegment:
 	_numchars: int
 	
 	# The data bits of this segment. Accessed through get_data().
-	_bitdata: list[int]
+	_bitdata: _BitBuffer
 	
 	
 	# ---- Constructor (low level) ----
@@ -785,12 +1296,13 @@ class QrSegment:
 	def __init__(self, mode: QrSegment.Mode, numch: int, bitdata: Sequence[int]) -> None:
 		"""Creates a new QR Code segment with the given attributes and data.
 		The character count (numch) must agree with the mode and the bit buffer length,
-		but the constraint isn't checked. The given bit buffer is cloned and stored."""
+		but the constraint isn't checked. The given bit buffer (or sequence of 0s
+		and 1s) is cloned and stored."""
 		if numch < 0:
 			raise ValueError()
 		self._mode = mode
 		self._numchars = numch
-		self._bitdata = list(bitdata)  # Make defensive copy
+		self._bitdata = _BitBuffer(bitdata)  # Make defensive copy
 	
 	
 	# ---- Accessor methods ----
@@ -823,6 +1335,87 @@ class QrSegment:
 		return result
 	
 	
+	@staticmethod
+	def _split_optimally(text: str, version: int) -> tuple[Optional[int],list[tuple[QrSegment.Mode,str]]]:
+		"""Returns the number of bits needed to encode the given non-empty text at the given version
+		with the cheapest sequence of numeric, alphanumeric and byte segments, together with that
+		sequence as (mode, substring) runs. The bit count is None if a run has too many characters
+		to fit its length field. This is a shortest-path search over the three modes, with costs
+		measured in sixths of a bit so that numeric (10/3) and alphanumeric (11/2) characters are exact."""
+		modes: tuple[QrSegment.Mode,...] = (QrSegment.Mode.BYTE, QrSegment.Mode.ALPHANUMERIC, QrSegment.Mode.NUMERIC)
+		headbyte, headalnum, headnum = ((4 + mode.num_char_count_bits(version)) * 6 for mode in modes)
+		alnumtable: dict[str,int] = QrSegment._ALPHANUMERIC_ENCODING_TABLE
+		unreachable: int = 1 << 62
+		
+		# After each character, the cheapest cost of continuing in each mode, and the
+		# mode that character itself was encoded in to achieve that cost
+		costbyte, costalnum, costnum = headbyte, headalnum, headnum
+		charmodes = bytearray(len(text) * 3)
+		i: int = 0
+		for c in text:
+			costbyte += 48 if c < "\x80" else len(c.encode("UTF-8")) * 48
+			costalnum = (costalnum + 33) if (c in alnumtable) else unreachable
+			costnum = (costnum + 20) if ("0" <= c <= "9") else unreachable
+			
+			# Ending the current segment rounds its cost up to whole bits; find the cheapest one to end
+			best: int = (costbyte + 5) // 6 * 6
+			bestmode: int = 0
+			rounded: int = (costalnum + 5) // 6 * 6
+			if rounded < best:
+				best, bestmode = rounded, 1
+			rounded = (costnum + 5) // 6 * 6
+			if rounded < best:
+				best, bestmode = rounded, 2
+			
+			# Either stay in each mode, or switch into it after the cheapest ended segment
+			charmodes[i] = 0
+			if best + headbyte < costbyte:
+				costbyte, charmodes[i] = best + headbyte, bestmode
+			charmodes[i + 1] = 1
+			if best + headalnum < costalnum:
+				costalnum, charmodes[i + 1] = best + headalnum, bestmode
+			charmodes[i + 2] = 2
+			if best + headnum < costnum:
+				costnum, charmodes[i + 2] = best + headnum, bestmode
+			i += 3
+		
+		# Trace the cheapest final state backwards into per-character modes, then group them into runs
+		state: int = 0
+		if costalnum < costbyte:
+			state = 1
+		if costnum < (costalnum if state == 1 else costbyte):
+			state = 2
+		runs: list[tuple[QrSegment.Mode,str]] = []
+		end: int = len(text)
+		runmode: int = -1
+		for i in reversed(range(len(text))):
+			state = charmodes[i * 3 + state]
+			if state != runmode:
+				if runmode != -1:
+					runs.append((modes[runmode], text[i + 1 : end]))
+					end = i + 1
+				runmode = state
+		runs.append((modes[runmode], text[ : end]))
+		runs.reverse()
+		
+		# Count the exact bits of the runs
+		result: Optional[int] = 0
+		for (mode, part) in runs:
+			numchars: int = len(part.encode("UTF-8")) if (mode is QrSegment.Mode.BYTE) else len(part)
+			ccbits: int = mode.num_char_count_bits(version)
+			if numchars >= (1 << ccbits):
+				result = None
+				break
+			if mode is QrSegment.Mode.NUMERIC:
+				databits: int = numchars // 3 * 10 + (0, 4, 7)[numchars % 3]
+			elif mode is QrSegment.Mode.ALPHANUMERIC:
+				databits = numchars // 2 * 11 + numchars % 2 * 6
+			else:
+				databits = numchars * 8
+			result += 4 + ccbits + databits
+		return (result, runs)
+	
+	
 	# ---- Constants ----
 	
 	# Describes precisely all strings that are encodable in numeric mode.
@@ -877,15 +1470,64 @@ class QrSegment:
 
 # ---- Private helper class ----
 
-class _BitBuffer(list[int]):
-	"""An appendable sequence of bits (0s and 1s). Mainly used by QrSegment."""
+class _BitBuffer:
+	"""An appendable sequence of bits (0s and 1s). Mainly used by QrSegment.
+	The bits are held as one big-endian integer plus a bit length, so appending
+	is a shift and an OR, and packing into bytes is a single conversion."""
+	
+	__slots__ = ("_value", "_length")
+	
+	_value: int  # The bits in big-endian order; the first bit is the most significant
+	_length: int  # The number of bits, including leading 0s
+	
+	def __init__(self, bits: Union[_BitBuffer,Sequence[int]] = ()) -> None:
+		"""Creates a buffer holding a copy of the given buffer or sequence of 0s and 1s."""
+		if isinstance(bits, _BitBuffer):
+			self._value = bits._value
+			self._length = bits._length
+		else:
+			self._value = 0
+			self._length = 0
+			for bit in bits:
+				self.append_bits(bit, 1)
+	
+	@staticmethod
+	def from_bytes(data: Union[bytes,Sequence[int]]) -> _BitBuffer:
+		"""Returns a buffer holding the bits of the given bytes in big endian."""
+		result = _BitBuffer()
+		result._value = int.from_bytes(bytes(data), "big")
+		result._length = len(data) * 8
+		return result
+	
+	def __len__(self) -> int:
+		return self._length
+	
+	def __iter__(self) -> collections.abc.Iterator[int]:
+		value: int = self._value
+		return (((value >> i) & 1) for i in reversed(range(self._length)))
 	
 	def append_bits(self, val: int, n: int) -> None:
 		"""Appends the given number of low-order bits of the given
 		value to this buffer. Requires n >= 0 and 0 <= val < 2^n."""
 		if (n < 0) or (val >> n != 0):
 			raise ValueError("Value out of range")
-		self.extend(((val >> i) & 1) for i in reversed(range(n)))
+		self._value = (self._value << n) | val
+		self._length += n
+	
+	def extend(self, other: _BitBuffer) -> None:
+		"""Appends all bits of the given buffer to this buffer."""
+		self._value = (self._value << other._length) | other._value
+		self._length += other._length
+	
+	def to_bytes(self) -> bytes:
+		"""Returns the bits packed into bytes in big endian. Requires a length that is a multiple of 8."""
+		if self._length % 8 != 0:
+			raise ValueError("Bit length is not a multiple of 8")
+		return self._value.to_bytes(self._length // 8, "big")
+
+
+# Maps the ASCII digits of a binary number to byte values 0 and 1
+_DIGITS_TO_BITS: bytes = bytes.maketrans(b"01", b"\x00\x01")
 
 
 def _get_bit(x: int, i: int) -> bool:
@@ -893,6 +1535,97 @@ def _get_bit(x: int, i: int) -> bool:
 	return (x >> i) & 1 != 0
 
 
+def _get_run_mask(x: int, n: int) -> int:
+	"""Returns a bitmask where bit p is set iff bits p to p+n-1 of x are all set.
+	Uses O(log n) shifts by combining windows of doubling widths. For n = 0 the result is -1."""
+	result: int = -1
+	span: int = x  # Windows of width 'width'
+	width: int = 1
+	offset: int = 0
+	while n > 0:
+		if n & 1:
+			result &= span >> offset
+			offset += width
+		n >>= 1
+		if n > 0:
+			span &= span >> width
+			width <<= 1
+	return result
+
+
+def _score_mask(version: int, eclordinal: int, modules: Sequence[int], mask: int) -> int:
+	"""Returns the penalty score of the given unmasked module rows of a QR Code of the given version and
+	error correction ordinal after applying the given mask and its format bits. This works on its own copy
+	of the rows, and is a module-level function so that process pools can pickle it by reference."""
+	qr: QrCode = object.__new__(QrCode)
+	qr._version = version
+	qr._size = version * 4 + 17
+	qr._errcorlvl = (QrCode.Ecc.LOW, QrCode.Ecc.MEDIUM, QrCode.Ecc.QUARTILE, QrCode.Ecc.HIGH)[eclordinal]
+	qr._modules = list(modules)
+	qr._isfunction = list(QrCode._get_function_template(version)[1])
+	qr._linesscored = 0
+	qr._apply_mask(mask)
+	qr._draw_format_bits(mask)
+	return qr._get_penalty_score()
+
+
+def _make_gf_tables() -> tuple[bytes,tuple[int,...]]:
+	"""Returns the antilog and log tables of GF(2^8/0x11D) for the generator 0x02. The antilog
+	table holds 510 entries so that the sum of two logarithms can be looked up without reduction."""
+	exp = bytearray(510)
+	log: list[int] = [0] * 256  # Entry 0 is unused because 0 has no logarithm
+	x: int = 1
+	for i in range(255):
+		exp[i] = exp[i + 255] = x
+		log[x] = i
+		x <<= 1
+		if x >> 8 != 0:
+			x ^= 0x11D
+	return bytes(exp), tuple(log)
+
+_GF_EXP, _GF_LOG = _make_gf_tables()
+
+
+def _make_format_words() -> tuple[int,...]:
+	"""Returns the 32 format words (15 bits, with BCH error correction and the XOR mask applied),
+	indexed by the 2-bit error correction format bits followed by the 3-bit mask number."""
+	result: list[int] = []
+	for data in range(32):
+		rem: int = data
+		for _ in range(10):
+			rem = (rem << 1) ^ ((rem >> 9) * 0x537)
+		bits: int = (data << 10 | rem) ^ 0x5412  # uint15
+		assert bits >> 15 == 0
+		result.append(bits)
+	return tuple(result)
+
+
+def _make_version_words() -> tuple[int,...]:
+	"""Returns the 18-bit version words (with BCH error correction) indexed by version number.
+	Only versions 7 to 40 carry version information; the other entries are set to an illegal value."""
+	result: list[int] = [-1] * 7
+	for ver in range(7, 41):
+		rem: int = ver  # version is uint6, in the range [7, 40]
+		for _ in range(12):
+			rem = (rem << 1) ^ ((rem >> 11) * 0x1F25)
+		bits: int = ver << 12 | rem  # uint18
+		assert bits >> 18 == 0
+		result.append(bits)
+	return tuple(result)
+
+_FORMAT_WORDS: tuple[int,...] = _make_format_words()
+_VERSION_WORDS: tuple[int,...] = _make_version_words()
+
+# Version ranges that share the same character count field widths, in increasing order
+_VERSION_TIERS: tuple[tuple[int,int],...] = ((1, 9), (10, 26), (27, 40))
+
+# Data capacity in bits, indexed by error correction ordinal then version number. Entry 0 of each
+# row is unused (set below any real capacity), and each row is strictly increasing from version 1.
+_DATA_CAPACITY_BITS: tuple[tuple[int,...],...] = tuple(
+	tuple([-1] + [QrCode._get_num_data_codewords(ver, ecl) * 8 for ver in range(QrCode.MIN_VERSION, QrCode.MAX_VERSION + 1)])
+	for ecl in (QrCode.Ecc.LOW, QrCode.Ecc.MEDIUM, QrCode.Ecc.QUARTILE, QrCode.Ecc.HIGH))
+
+
 
 class DataTooLongError(ValueError):
 	"""Raised when the supplied data does not fit any QR Code version. Ways to handle this exception include:
@@ -2,22 +2,55 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import re
+import zlib
 from pathlib import Path
+from typing import Sequence
 from xml.etree import ElementTree
 
 
 ROOT = Path(__file__).resolve().parents[1]
 FIXTURE_PATH = ROOT / "tests" / "fixtures" / "payloads.json"
+ENCODER_GOLDEN_PATH = ROOT / "tests" / "fixtures" / "encoder_golden.json"
 SVG_NAMESPACE = "http://www.w3.org/2000/svg"
 MODULE_COMMAND_RE = re.compile(r"M(\d+),(\d+)h1v1h-1z")
+RUN_COMMAND_RE = re.compile(r"([Mm])(-?\d+),(-?\d+)h(\d+)v1h-(\d+)z")
+OUTLINE_CONTOUR_RE = re.compile(r"([Mm])(-?\d+),(-?\d+)((?:[hv]-?\d+)+)z")
+OUTLINE_STEP_RE = re.compile(r"([hv])(-?\d+)")
 
 
 def load_fixture_catalog() -> dict[str, object]:
     return json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
 
 
+def load_encoder_golden() -> dict[str, object]:
+    """Digests recorded from the unmodified upstream encoder (see ENCODER_PROVENANCE)."""
+
+    return json.loads(ENCODER_GOLDEN_PATH.read_text(encoding="utf-8"))
+
+
+def golden_payload(seed: str, length: int) -> bytes:
+    """Deterministic binary payload used by the encoder golden fixture."""
+
+    output = b""
+    block = seed.encode("ascii")
+    while len(output) < length:
+        block = hashlib.sha256(block).digest()
+        output += block
+    return output[:length]
+
+
+def matrix_digest(size: int, is_dark) -> str:
+    """SHA-256 of the row-major module string, read through a (x, y) callback."""
+
+    bits = "".join(
+        "1" if is_dark(x, y) else "0" for y in range(size) for x in range(size)
+    )
+    return hashlib.sha256(bits.encode("ascii")).hexdigest()
+
+
 def parse_svg(svg: str) -> tuple[ElementTree.Element, ElementTree.Element, ElementTree.Element]:
     root = ElementTree.fromstring(svg)
     rectangle = root.find(f"{{{SVG_NAMESPACE}}}rect")
@@ -27,13 +60,128 @@ def parse_svg(svg: str) -> tuple[ElementTree.Element, ElementTree.Element, Eleme
     return root, rectangle, path
 
 
+def render_svg_per_module(
+    matrix: Sequence[Sequence[bool]],
+    border: int,
+    background: str,
+    foreground: str,
+) -> str:
+    """The original SVG renderer, which formats every dark module separately.
+
+    It is the byte-for-byte oracle for `qr_svg.render_svg` and the baseline
+    in `benchmark.py`.
+    """
+
+    size = len(matrix)
+    dimension = size + border * 2
+    path = " ".join(
+        f"M{x + border},{y + border}h1v1h-1z"
+        for y, row in enumerate(matrix)
+        for x, dark in enumerate(row)
+        if dark
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {dimension} {dimension}" '
+        'shape-rendering="crispEdges">\n'
+        f'  <rect width="100%" height="100%" fill="{background}"/>\n'
+        f'  <path fill="{foreground}" d="{path}"/>\n'
+        "</svg>\n"
+    )
+
+
+def _run_path_coordinates(commands: str) -> set[tuple[int, int]]:
+    """Expand a run-length path into modules, checking every command's shape."""
+
+    coordinates: set[tuple[int, int]] = set()
+    position = 0
+    x = y = 0
+    for match in RUN_COMMAND_RE.finditer(commands):
+        if match.start() != position:
+            raise AssertionError("SVG path contains an unexpected command")
+        move, dx, dy, width, back = match.groups()
+        if width != back or int(width) < 1:
+            raise AssertionError("SVG run does not close into a rectangle")
+        if move == "M":
+            if position != 0:
+                raise AssertionError("Only the first run may use an absolute move")
+            x, y = int(dx), int(dy)
+        else:
+            if position == 0:
+                raise AssertionError("The first run must use an absolute move")
+            # `z` returned the current point to the previous run's start.
+            x, y = x + int(dx), y + int(dy)
+        run = {(x + offset, y) for offset in range(int(width))}
+        if coordinates & run:
+            raise AssertionError("SVG runs overlap")
+        coordinates |= run
+        position = match.end()
+    if position != len(commands):
+        raise AssertionError("SVG path contains an unexpected command")
+    return coordinates
+
+
+def _outline_path_coordinates(commands: str, dimension: int) -> set[tuple[int, int]]:
+    """Fill closed rectilinear contours even-odd at every module center.
+
+    A ray from each center to the right crosses the contours' vertical edges;
+    an odd count means the module is dark. This follows the SVG fill rule
+    rather than the production tracer.
+    """
+
+    vertical_edges: list[tuple[int, int, int]] = []
+    position = 0
+    start_x = start_y = 0
+    for match in OUTLINE_CONTOUR_RE.finditer(commands):
+        if match.start() != position:
+            raise AssertionError("SVG path contains an unexpected command")
+        move, dx, dy, steps = match.groups()
+        if (move == "M") != (position == 0):
+            raise AssertionError("Only the first contour may use an absolute move")
+        if move == "M":
+            start_x, start_y = int(dx), int(dy)
+        else:
+            # `z` returned the current point to the previous contour's start.
+            start_x, start_y = start_x + int(dx), start_y + int(dy)
+        x, y = start_x, start_y
+        for axis, amount in OUTLINE_STEP_RE.findall(steps):
+            if axis == "h":
+                x += int(amount)
+            else:
+                vertical_edges.append((x, y, y + int(amount)))
+                y += int(amount)
+        if x != start_x:
+            raise AssertionError("SVG contour does not close with a vertical edge")
+        vertical_edges.append((x, y, start_y))
+        position = match.end()
+    if position != len(commands):
+        raise AssertionError("SVG path contains an unexpected command")
+
+    crossings: list[list[int]] = [[] for _ in range(dimension)]
+    for x, y0, y1 in vertical_edges:
+        for row in range(min(y0, y1), max(y0, y1)):
+            crossings[row].append(x)
+    coordinates: set[tuple[int, int]] = set()
+    for row, edges in enumerate(crossings):
+        if len(edges) % 2:
+            raise AssertionError("SVG contours do not close")
+        edges.sort()
+        for left, right in zip(edges[::2], edges[1::2]):
+            coordinates.update((column, row) for column in range(left, right))
+    return coordinates
+
+
 def svg_module_coordinates(svg: str) -> set[tuple[int, int]]:
-    _root, _rectangle, path = parse_svg(svg)
+    root, _rectangle, path = parse_svg(svg)
     commands = path.attrib.get("d", "")
+    if path.attrib.get("fill-rule") == "evenodd":
+        dimension = int(root.attrib["viewBox"].split()[2])
+        return _outline_path_coordinates(commands, dimension)
     matches = MODULE_COMMAND_RE.findall(commands)
     rebuilt = " ".join(f"M{x},{y}h1v1h-1z" for x, y in matches)
     if rebuilt != commands:
-        raise AssertionError("SVG path contains an unexpected command")
+        # Not the one-square-per-module form; it must be the run-length form.
+        return _run_path_coordinates(commands)
     return {(int(x), int(y)) for x, y in matches}
 
 
@@ -71,3 +219,65 @@ def decode_svg(svg: str) -> str:
     if barcode is None:
         raise AssertionError("ZXing-C++ could not decode generated SVG geometry")
     return barcode.text
+
+
+def read_png_pixels(data: bytes) -> tuple[list[list[int]], list[tuple[int, int, int]]]:
+    """Decode a non-interlaced 1-bit palette PNG into palette indexes.
+
+    Every chunk CRC is checked, and only filter type 0 is accepted, which is
+    all the production writer emits.
+    """
+
+    if not data.startswith(b"\x89PNG\r\n\x1a\n"):
+        raise AssertionError("Missing PNG signature")
+    position = 8
+    chunks: list[tuple[bytes, bytes]] = []
+    while position < len(data):
+        length = int.from_bytes(data[position : position + 4], "big")
+        kind = data[position + 4 : position + 8]
+        body = data[position + 8 : position + 8 + length]
+        crc = data[position + 8 + length : position + 12 + length]
+        if zlib.crc32(kind + body).to_bytes(4, "big") != crc:
+            raise AssertionError(f"Bad CRC in PNG {kind!r} chunk")
+        chunks.append((kind, body))
+        position += 12 + length
+    kinds = [kind for kind, _body in chunks]
+    if kinds[:2] != [b"IHDR", b"PLTE"] or kinds[-1] != b"IEND":
+        raise AssertionError("Unexpected PNG chunk order")
+    header = chunks[0][1]
+    width = int.from_bytes(header[:4], "big")
+    height = int.from_bytes(header[4:8], "big")
+    if header[8:] != bytes([1, 3, 0, 0, 0]):
+        raise AssertionError("Expected a non-interlaced 1-bit palette PNG")
+    palette_bytes = chunks[1][1]
+    palette = [
+        (palette_bytes[index], palette_bytes[index + 1], palette_bytes[index + 2])
+        for index in range(0, len(palette_bytes), 3)
+    ]
+    raw = zlib.decompress(b"".join(body for kind, body in chunks if kind == b"IDAT"))
+    stride = 1 + (width + 7) // 8
+    if len(raw) != stride * height:
+        raise AssertionError("PNG image data has the wrong length")
+    pixels = []
+    for y in range(height):
+        line = raw[y * stride : (y + 1) * stride]
+        if line[0] != 0:
+            raise AssertionError("Unexpected PNG filter type")
+        pixels.append([(line[1 + x // 8] >> (7 - x % 8)) & 1 for x in range(width)])
+    return pixels, palette
+
+
+def read_pbm_pixels(data: bytes) -> list[list[int]]:
+    """Decode a binary (P4) PBM with a plain header into 0/1 pixels."""
+
+    magic, dimensions, raster = data.split(b"\n", 2)
+    if magic != b"P4":
+        raise AssertionError("Expected a binary PBM")
+    width, height = (int(value) for value in dimensions.split())
+    stride = (width + 7) // 8
+    if len(raster) != stride * height:
+        raise AssertionError("PBM raster has the wrong length")
+    return [
+        [(raster[y * stride + x // 8] >> (7 - x % 8)) & 1 for x in range(width)]
+        for y in range(height)
+    ]
@@ -2,9 +2,12 @@ from __future__ import annotations
 
 import json
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch
 
 import app as web_app
+import qr_core
+from qr_contract import GenerationRequest
 
 
 def valid_request(content: str = "Hello, API") -> dict[str, object]:
@@ -45,6 +48,8 @@ class GenerateApiTests(unittest.TestCase):
         self.assertEqual(data["metadata"]["fileName"], "api.qr.svg")
         self.assertIn(data["metadata"]["actualErrorCorrection"], "LMQH")
         self.assertEqual(data["metadata"]["scanability"], "pass")
+        self.assertEqual(data["metadata"]["maskSelection"], "exact")
+        self.assertEqual(data["metadata"]["svgPath"], "modules")
         self.assertTrue(data["svg"].startswith("<?xml"))
         self.assertEqual(response.headers["Cache-Control"], "no-store")
         self.assertEqual(response.headers["X-Content-Type-Options"], "nosniff")
@@ -113,6 +118,8 @@ class GenerateApiTests(unittest.TestCase):
             ({"foreground": "black"}, "invalid_color"),
             ({"border": "4"}, "invalid_border"),
             ({"border": 0}, "unsafe_border"),
+            ({"maskSelection": "best"}, "invalid_mask_selection"),
+            ({"svgPath": "compact"}, "invalid_svg_path"),
         ]
         for overrides, code in cases:
             with self.subTest(code=code):
@@ -138,6 +145,50 @@ class GenerateApiTests(unittest.TestCase):
         )
         self.assert_error(response, 413, "request_too_large")
 
+    def test_svg_endpoint_streams_the_same_document(self) -> None:
+        for svg_path in ("modules", "runs"):
+            with self.subTest(svg_path=svg_path):
+                request_data = valid_request("stream " * 200)
+                request_data["svgPath"] = svg_path
+                expected = self.client.post("/api/generate", json=request_data)
+                response = self.client.post("/api/generate/svg", json=request_data)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.is_streamed)
+                self.assertEqual(response.mimetype, "image/svg+xml")
+                self.assertEqual(response.headers["Cache-Control"], "no-store")
+                self.assertEqual(
+                    response.get_data(as_text=True), expected.get_json()["svg"]
+                )
+
+    def test_svg_endpoint_reports_errors_before_streaming(self) -> None:
+        request_data = valid_request()
+        request_data["border"] = 0
+        response = self.client.post("/api/generate/svg", json=request_data)
+        self.assert_error(response, 422, "unsafe_border")
+        response = self.client.post(
+            "/api/generate/svg", data="{}", content_type="text/plain"
+        )
+        self.assert_error(response, 415, "unsupported_media_type")
+
+    def test_repeated_public_payloads_reuse_the_encoding_cache(self) -> None:
+        request_data = {"payloadType": "url", "fields": {"url": "example.com/menu"}}
+        wifi_data = {
+            "payloadType": "wifi",
+            "fields": {"ssid": "Event", "password": "cache-b7", "security": "WPA"},
+        }
+        cache = web_app.EncodingCache()
+        with patch.object(web_app, "ENCODING_CACHE", cache):
+            first = self.client.post("/api/generate", json=request_data)
+            request_data["foreground"] = "#0D47A1"
+            second = self.client.post("/api/generate", json=request_data)
+            for _ in range(2):
+                self.client.post("/api/generate", json=wifi_data)
+        self.assertEqual(
+            first.get_json()["metadata"]["mask"], second.get_json()["metadata"]["mask"]
+        )
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries), (1, 1, 1))
+
     def test_unexpected_errors_do_not_leak_exception_or_payload_to_body_or_logs(self) -> None:
         secret = "do-not-log-f7ae"
         with patch.object(
@@ -151,5 +202,151 @@ class GenerateApiTests(unittest.TestCase):
         self.assertIn("RuntimeError", combined)
 
 
+def ndjson(*items: object) -> bytes:
+    return "\n".join(
+        item if isinstance(item, str) else json.dumps(item) for item in items
+    ).encode("utf-8")
+
+
+class BatchApiTests(unittest.TestCase):
+    def setUp(self) -> None:
+        web_app.app.config.update(TESTING=True)
+        self.client = web_app.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        web_app.shutdown_batch_executor()
+
+    def post_batch(self, body: bytes, content_type: str = "application/x-ndjson"):
+        return self.client.post(
+            "/api/generate/batch", data=body, content_type=content_type
+        )
+
+    def test_each_item_streams_back_the_single_item_response(self) -> None:
+        secret = "batch-private-4c1e"
+        items: list[object] = [
+            valid_request(f"{secret} {index}") for index in range(12)
+        ]
+        items[3] = {"payloadType": "url", "fields": {"url": ""}}
+        items[5] = "{not json"
+        items[6] = "[1, 2]"
+        items[7] = {**valid_request(), "extra": True}
+        response = self.post_batch(ndjson(*items) + b"\n\n")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        self.assertEqual(response.headers["Cache-Control"], "no-store")
+        body = response.get_data(as_text=True)
+        self.assertNotIn(secret, body)
+        lines = {line["index"]: line for line in map(json.loads, body.splitlines())}
+        self.assertEqual(sorted(lines), list(range(12)))
+        failures = {
+            3: (422, "empty_payload_field"),
+            5: (400, "invalid_json"),
+            6: (400, "invalid_request_shape"),
+            7: (400, "unknown_request_field"),
+        }
+        for index, item in enumerate(items):
+            with self.subTest(index=index):
+                line = lines[index]
+                if index in failures:
+                    self.assertEqual(
+                        (line["status"], line["error"]["code"]), failures[index]
+                    )
+                    continue
+                expected = self.client.post("/api/generate", json=item).get_json()
+                self.assertEqual(line, {"index": index, "status": 200, **expected})
+
+    def test_batch_limits_and_media_type_fail_before_streaming(self) -> None:
+        line = ndjson({"payloadType": "url", "fields": {"url": "example.com"}})
+        lines = [line] * (web_app.MAX_BATCH_ITEMS + 1)
+        too_many = self.post_batch(b"\n".join(lines))
+        self.assertEqual(too_many.status_code, 413)
+        self.assertEqual(too_many.get_json()["error"]["code"], "batch_too_large")
+        # Each line keeps the single-request bound, inside the batch byte cap.
+        padded = line + b" " * web_app.MAX_REQUEST_BYTES
+        response = self.post_batch(padded + b"\n" + line)
+        self.assertEqual(response.status_code, 200)
+        items = {
+            item["index"]: item
+            for item in map(json.loads, response.get_data(as_text=True).splitlines())
+        }
+        self.assertEqual(
+            (items[0]["status"], items[0]["error"]["code"]), (413, "request_too_large")
+        )
+        self.assertEqual(items[1]["status"], 200)
+        oversized = self.post_batch(b"x" * (web_app.MAX_BATCH_BYTES + 1))
+        self.assertEqual(oversized.status_code, 413)
+        self.assertEqual(oversized.get_json()["error"]["code"], "request_too_large")
+        wrong_type = self.post_batch(line, content_type="application/json")
+        self.assertEqual(wrong_type.status_code, 415)
+        self.assertEqual(
+            wrong_type.get_json()["error"]["code"], "unsupported_media_type"
+        )
+
+    def test_batches_use_the_installed_executor_until_it_is_shut_down(self) -> None:
+        line = ndjson({"payloadType": "url", "fields": {"url": "example.com/pool"}})
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            with patch.object(web_app, "_BATCH_EXECUTOR", executor), patch.object(
+                executor, "submit", wraps=executor.submit
+            ) as submit:
+                response = self.post_batch(line)
+                self.assertEqual(json.loads(response.get_data())["status"], 200)
+                submit.assert_called()
+                web_app.shutdown_batch_executor()
+                self.assertIsNone(web_app._BATCH_EXECUTOR)
+            with self.assertRaises(RuntimeError):
+                executor.submit(int)
+
+    def test_an_unexpected_item_failure_does_not_end_the_stream(self) -> None:
+        secret = "batch-item-secret-71f"
+        items = [valid_request(f"item {index}") for index in range(5)]
+        items[2] = valid_request(secret)
+        real_generate = qr_core.generate
+
+        def flaky_generate(request: GenerationRequest, **kwargs: object):
+            if secret in request.fields["text"]:
+                raise RuntimeError(secret)
+            return real_generate(request, **kwargs)
+
+        with ThreadPoolExecutor(max_workers=1) as executor, patch.object(
+            web_app, "_BATCH_EXECUTOR", executor
+        ), patch.object(qr_core, "generate", flaky_generate), self.assertLogs(
+            web_app.app.logger, level="ERROR"
+        ) as captured:
+            response = self.post_batch(ndjson(*items))
+            body = response.get_data(as_text=True)
+        lines = {line["index"]: line for line in map(json.loads, body.splitlines())}
+        self.assertEqual(sorted(lines), list(range(5)))
+        self.assertEqual(
+            (lines[2]["status"], lines[2]["error"]["code"]), (500, "internal_error")
+        )
+        for index in (0, 1, 3, 4):
+            with self.subTest(index=index):
+                self.assertEqual(lines[index]["status"], 200)
+        combined = "\n".join([body, *captured.output])
+        self.assertNotIn(secret, combined)
+        self.assertIn("RuntimeError", combined)
+
+    def test_unexpected_batch_errors_end_the_stream_safely(self) -> None:
+        secret = "batch-do-not-log-9d2"
+
+        def failing_batch(*_args: object, **_kwargs: object):
+            raise RuntimeError(secret)
+            yield
+
+        with patch.object(web_app, "generate_many", failing_batch), self.assertLogs(
+            web_app.app.logger, level="ERROR"
+        ) as captured:
+            response = self.post_batch(ndjson(valid_request(secret)))
+            lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(
+            [json.loads(line)["error"]["code"] for line in lines], ["internal_error"]
+        )
+        combined = "\n".join(lines + captured.output)
+        self.assertNotIn(secret, combined)
+        self.assertIn("RuntimeError", combined)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -9,6 +9,7 @@ from unittest.mock import patch
 
 import main
 from qr_contract import GenerationRequest
+from qr_core import generate
 
 
 class InteractiveCliTests(unittest.TestCase):
@@ -93,6 +94,26 @@ class InteractiveCliTests(unittest.TestCase):
                 ["first.svg", "second.svg"],
             )
 
+    def test_svg_is_streamed_to_the_file_without_building_the_document(self) -> None:
+        request = GenerationRequest("text", {"text": "streamed"}, output_name="streamed")
+        results = []
+        real_render = main.render
+
+        def render(*args: object, **kwargs: object):
+            results.append(real_render(*args, **kwargs))
+            return results[-1]
+
+        with tempfile.TemporaryDirectory() as directory, patch.object(
+            main, "collect_request", return_value=request
+        ), patch.object(main, "render", render), patch(
+            "builtins.input", side_effect=["n", "n", "n"]
+        ), redirect_stdout(io.StringIO()):
+            self.assertEqual(main.run_interactive(directory), 0)
+            saved = (Path(directory) / "streamed.svg").read_text(encoding="utf-8")
+        (result,) = results
+        self.assertNotIn("svg", vars(result))  # The cached document was never built
+        self.assertEqual(saved, generate(request).svg)
+
     def test_filesystem_error_is_safe_and_does_not_print_raw_exception(self) -> None:
         request = GenerationRequest("text", {"text": "private"})
         output = io.StringIO()
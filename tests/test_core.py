@@ -1,12 +1,38 @@
 from __future__ import annotations
 
+import asyncio
+import pickle
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, replace
 from unittest.mock import patch
 
-from qrcodegen import DataTooLongError
-from qr_contract import CapacityError, GenerationRequest, QrGenerationError
-from qr_core import MAX_PAYLOAD_BYTES, generate, warning_codes
-from tests.helpers import load_fixture_catalog
+from qrcodegen import DataTooLongError, QrCode
+from qr_contract import (
+    CapacityError,
+    EncodedSymbol,
+    GenerationRequest,
+    GenerationResult,
+    InternalGenerationError,
+    Presentation,
+    QrGenerationError,
+)
+import qr_core
+from qr_core import (
+    MAX_PAYLOAD_BYTES,
+    EncodingCache,
+    agenerate,
+    agenerate_many,
+    encode,
+    fit_version,
+    generate,
+    generate_many,
+    render,
+    render_svg,
+    warning_codes,
+)
+from tests.helpers import load_fixture_catalog, svg_module_coordinates
 
 
 def text_request(text: str = "hello", **overrides: object) -> GenerationRequest:
@@ -135,6 +161,96 @@ class SharedCoreTests(unittest.TestCase):
                     )
                 self.assertEqual(raised.exception.code, "payload_too_large")
 
+    def test_fit_version_is_exact_and_admits_dense_modes_past_the_byte_limit(self) -> None:
+        cases = [
+            ("L", "7" * 7089, 40),
+            ("L", "7" * 7090, None),
+            ("H", "HELLO WORLD " * 154, 40),
+            ("H", "HELLO WORLD " * 155, None),
+            ("M", "a" * 2331, 40),
+            ("M", "a" * 2332, None),
+            ("Q", "Olá, 世界", 2),
+            ("M", "", 1),
+        ]
+        for level, payload, expected in cases:
+            with self.subTest(level=level, length=len(payload)):
+                self.assertEqual(fit_version(payload, level), expected)
+                if not payload:
+                    continue
+                request = text_request(payload, requested_error_correction=level)
+                if expected is None:
+                    with patch("qr_core.QrCode.encode_segments") as encode:
+                        with self.assertRaises(CapacityError) as raised:
+                            generate(request)
+                    self.assertEqual(raised.exception.code, "payload_too_large")
+                    encode.assert_not_called()
+                else:
+                    self.assertEqual(generate(request).version, expected)
+
+        with self.assertRaises(QrGenerationError) as raised:
+            fit_version("hello", "X")
+        self.assertEqual(raised.exception.code, "invalid_error_correction")
+
+    def test_the_version_search_runs_once_per_encode(self) -> None:
+        find_min_version = QrCode.find_min_version
+        for text in ("HTTPS://EXAMPLE.COM/ITEM/12345?ref=qr", "1234567890", "Olá"):
+            with self.subTest(text=text), patch(
+                "qrcodegen.QrCode.find_min_version", wraps=find_min_version
+            ) as search:
+                result = generate(text_request(text))
+                # One search over all versions; the encoder only checks the fit.
+                self.assertEqual(search.call_count, 2)
+                self.assertEqual(
+                    search.call_args.args[2:], (result.version, result.version)
+                )
+
+    def test_mask_executor_is_opt_in_and_does_not_change_output(self) -> None:
+        request = text_request("https://EXAMPLE.COM/" + "0123456789" * 60)
+        serial = generate(request)
+        with ThreadPoolExecutor(4) as executor:
+            pooled = generate(request, mask_executor=executor)
+        self.assertEqual(pooled.mask, serial.mask)
+        self.assertEqual(pooled.svg, serial.svg)
+
+    def test_fast_mask_selection_is_opt_in_reported_and_validated(self) -> None:
+        request = text_request("https://example.com/" + "q" * 200)
+        exact = generate(request)
+        fast = generate(text_request("https://example.com/" + "q" * 200, mask_selection="fast"))
+        self.assertEqual(exact.mask_selection, "exact")
+        self.assertEqual(fast.mask_selection, "fast")
+        self.assertEqual(fast.version, exact.version)
+        self.assertEqual(fast.to_public_dict()["metadata"]["maskSelection"], "fast")
+
+        for value in ("quick", "", None, 1):
+            with self.subTest(value=value), self.assertRaises(QrGenerationError) as raised:
+                generate(text_request(mask_selection=value))
+            self.assertEqual(raised.exception.code, "invalid_mask_selection")
+
+    def test_compact_svg_paths_are_opt_in_reported_and_validated(self) -> None:
+        request = text_request("https://example.com/" + "r" * 200)
+        modules = generate(request)
+        runs = generate(replace(request, svg_path="runs"))
+        self.assertEqual(modules.svg_path, "modules")
+        self.assertEqual(runs.svg_path, "runs")
+        self.assertEqual(runs.matrix, modules.matrix)
+        self.assertEqual(
+            svg_module_coordinates(runs.svg), svg_module_coordinates(modules.svg)
+        )
+        self.assertLess(len(runs.svg), len(modules.svg) // 2)
+        self.assertEqual(runs.to_public_dict()["metadata"]["svgPath"], "runs")
+        rendered = render(encode(request), Presentation(svg_path="runs"))
+        self.assertEqual(rendered.svg, runs.svg)
+        outline = generate(replace(request, svg_path="outline"))
+        self.assertEqual(
+            svg_module_coordinates(outline.svg), svg_module_coordinates(modules.svg)
+        )
+        self.assertLess(len(outline.svg), len(runs.svg))
+
+        for value in ("rectangles", "", None, 1):
+            with self.subTest(value=value), self.assertRaises(QrGenerationError) as raised:
+                generate(replace(request, svg_path=value))
+            self.assertEqual(raised.exception.code, "invalid_svg_path")
+
     def test_encoder_capacity_failure_has_a_safe_distinct_code(self) -> None:
         with patch(
             "qr_core.QrCode.encode_segments",
@@ -162,5 +278,349 @@ class SharedCoreTests(unittest.TestCase):
                 self.assertEqual(raised.exception.code, "invalid_unicode")
 
 
+class EncodingCacheTests(unittest.TestCase):
+    def url_request(self, path: str = "event", **overrides: object) -> GenerationRequest:
+        values: dict[str, object] = {
+            "payload_type": "url",
+            "fields": {"url": f"https://example.com/{path}"},
+        }
+        values.update(overrides)
+        return GenerationRequest(**values)
+
+    def test_hits_re_render_presentation_and_match_uncached_output(self) -> None:
+        cache = EncodingCache()
+        first = generate(self.url_request("e/" + "x" * 120), cache=cache)
+        styled_request = self.url_request(
+            "e/" + "x" * 120,
+            foreground="#1A237E",
+            background="#FFF8E1",
+            border=6,
+            output_name="a.svg",
+        )
+        styled = generate(styled_request, cache=cache)
+        self.assertEqual(styled, generate(styled_request))
+        self.assertEqual(styled.matrix, first.matrix)
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries), (1, 1, 1))
+
+        for overrides in ({"requested_error_correction": "H"}, {"mask_selection": "fast"}):
+            generate(self.url_request("e/" + "x" * 120, **overrides), cache=cache)
+        self.assertEqual(cache.stats().misses, 3)
+
+    def test_keys_are_keyed_digests_not_payload_text(self) -> None:
+        cache = EncodingCache(secret=b"k" * 32)
+        generate(self.url_request("cache-private-51c0"), cache=cache)
+        payload = b"https://example.com/cache-private-51c0"
+        (key,) = cache._entries
+        self.assertEqual(len(key), 32)
+        self.assertNotIn(b"cache-private", key)
+        self.assertEqual(key, cache.key(payload, "M", "exact"))
+        self.assertNotEqual(key, EncodingCache().key(payload, "M", "exact"))
+
+    def test_sensitive_payloads_are_skipped_unless_opted_in(self) -> None:
+        wifi = GenerationRequest(
+            "wifi", {"ssid": "Venue", "password": "cache-secret-9d", "security": "WPA"}
+        )
+        skipping = EncodingCache()
+        for request in (wifi, wifi, text_request(), text_request()):
+            generate(request, cache=skipping)
+        stats = skipping.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries), (0, 0, 0))
+
+        opted_in = EncodingCache(include_sensitive=True)
+        generate(wifi, cache=opted_in)
+        generate(wifi, cache=opted_in)
+        self.assertEqual(opted_in.stats().hits, 1)
+
+    def test_entries_are_bounded_by_count_and_age(self) -> None:
+        now = [0.0]
+        cache = EncodingCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+        for path in ("a", "b", "a", "c"):
+            generate(self.url_request(path), cache=cache)
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.evictions, stats.entries), (1, 1, 2))
+        generate(self.url_request("b"), cache=cache)  # Evicted as least recently used
+        self.assertEqual(cache.stats().misses, 4)
+
+        now[0] = 10.0
+        generate(self.url_request("c"), cache=cache)
+        stats = cache.stats()
+        self.assertEqual((stats.expirations, stats.misses), (1, 5))
+
+        cache.clear()
+        self.assertEqual(cache.stats().entries, 0)
+        for arguments in ({"max_entries": 0}, {"ttl_seconds": 0}):
+            with self.subTest(**arguments), self.assertRaises(ValueError):
+                EncodingCache(**arguments)
+
+    def test_failures_are_not_cached(self) -> None:
+        cache = EncodingCache()
+        request = self.url_request("x" * 1300, requested_error_correction="H")
+        for _ in range(2):
+            with self.assertRaises(CapacityError):
+                generate(request, cache=cache)
+        self.assertEqual((cache.stats().misses, cache.stats().entries), (2, 0))
+
+
+class EncodeRenderTests(unittest.TestCase):
+    def test_generate_is_encode_then_render(self) -> None:
+        requests = [
+            text_request("Olá, 世界", border=2, output_name="two.phase.svg"),
+            GenerationRequest(
+                "wifi",
+                {"ssid": "Cafe", "password": "", "security": "nopass"},
+                requested_error_correction="Q",
+                foreground="#FFFFFF",
+                background="#1A1A1A",
+            ),
+        ]
+        for request in requests:
+            with self.subTest(payload_type=request.payload_type):
+                symbol = encode(request)
+                self.assertIsInstance(symbol, EncodedSymbol)
+                self.assertEqual(render(symbol, request.presentation), generate(request))
+
+    def test_one_encode_feeds_many_presentations(self) -> None:
+        symbol = encode(text_request("https://example.com/" + "p" * 90))
+        palettes = [
+            Presentation(),
+            Presentation("#0D47A1", "#E3F2FD", 6, "blue.svg"),
+            Presentation("#FFFFFF", "#000000", 2),
+        ]
+        with patch("qr_core.QrCode.encode_segments") as encode_segments:
+            results = [render(symbol, presentation) for presentation in palettes]
+        encode_segments.assert_not_called()
+        self.assertEqual({result.matrix for result in results}, {symbol.matrix})
+        self.assertEqual(len({result.svg for result in results}), 3)
+        self.assertEqual(
+            warning_codes(results[2].warnings),
+            ("reduced_quiet_zone", "reversed_polarity"),
+        )
+
+    def test_encode_ignores_presentation_and_render_validates_it(self) -> None:
+        symbol = encode(text_request(foreground="black", border=0))
+        self.assertEqual(symbol.encoded_payload, "hello")
+        cases = [
+            (Presentation(foreground="black"), "invalid_color"),
+            (Presentation(border=0), "unsafe_border"),
+            (Presentation("#777777", "#888888"), "unsafe_contrast"),
+        ]
+        for presentation, code in cases:
+            with self.subTest(code=code), self.assertRaises(QrGenerationError) as raised:
+                render(symbol, presentation)
+            self.assertEqual(raised.exception.code, code)
+        with self.assertRaises(TypeError):
+            render(text_request(), Presentation())
+        with self.assertRaises(TypeError):
+            encode(Presentation())
+
+
+class LeanResultTests(unittest.TestCase):
+    def test_lean_results_render_lazily_and_drop_the_payload(self) -> None:
+        secret = "lean-private-4c2e"
+        request = text_request(secret, foreground="#123456", border=3)
+        full = generate(request)
+        with patch("qr_contract.render_svg", wraps=render_svg) as rendered:
+            lean = generate(request, lean=True)
+            rendered.assert_not_called()
+            self.assertIsNone(lean.encoded_payload)
+            self.assertNotIn("svg", vars(lean))
+            self.assertEqual(lean.svg, full.svg)
+            self.assertEqual(lean.svg, full.svg)
+            rendered.assert_called_once()
+        self.assertEqual(lean.matrix, full.matrix)
+        self.assertEqual(lean.to_public_dict(), full.to_public_dict())
+        self.assertNotIn(secret, repr(vars(lean)))
+        self.assertEqual(full.encoded_payload, secret)
+        self.assertIn("svg", vars(full))
+
+    def test_results_are_immutable_and_compare_without_the_derived_svg(self) -> None:
+        symbol = encode(text_request("compare"))
+        first = render(symbol, Presentation(), lean=True)
+        second = render(symbol, Presentation(), lean=True)
+        second.svg
+        self.assertEqual(first, second)
+        with self.assertRaises(AttributeError):
+            first.border = 2
+
+    def test_svg_is_derived_not_a_constructor_or_copied_field(self) -> None:
+        result = generate(text_request("derived"))
+        values = asdict(result)
+        self.assertNotIn("svg", values)
+        with self.assertRaises(TypeError):
+            GenerationResult(**values, svg=result.svg)
+        recolored = replace(result, foreground="#0D47A1")
+        self.assertNotIn("svg", vars(recolored))
+        self.assertIn('fill="#0D47A1"', recolored.svg)
+        self.assertNotEqual(recolored.svg, result.svg)
+
+
+class GenerateManyTests(unittest.TestCase):
+    def test_results_and_errors_come_back_in_input_order(self) -> None:
+        requests = [text_request(f"batch {index}") for index in range(40)]
+        requests[3] = text_request("")
+        requests[17] = text_request("x", border=99)
+        outcomes = list(generate_many(requests, workers=2, chunksize=5))
+        self.assertEqual(len(outcomes), len(requests))
+        for index, (request, outcome) in enumerate(zip(requests, outcomes)):
+            with self.subTest(index=index):
+                if index in (3, 17):
+                    self.assertIsInstance(outcome, QrGenerationError)
+                    with self.assertRaises(type(outcome)) as raised:
+                        generate(request)
+                    self.assertEqual(outcome.code, raised.exception.code)
+                else:
+                    self.assertEqual(outcome, generate(request))
+                    self.assertEqual(outcome.svg, generate(request).svg)
+
+    def test_unordered_results_carry_their_input_index(self) -> None:
+        requests = [text_request(f"unordered {index}") for index in range(25)]
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            pairs = list(
+                generate_many(
+                    requests, chunksize=4, ordered=False, lean=True, executor=executor
+                )
+            )
+        self.assertEqual(sorted(index for index, _ in pairs), list(range(25)))
+        for index, outcome in pairs:
+            self.assertEqual(outcome, generate(requests[index], lean=True))
+
+    def test_an_unexpected_failure_only_fails_its_own_item(self) -> None:
+        requests = [text_request(f"isolated {index}") for index in range(9)]
+        real_generate = qr_core.generate
+
+        def flaky_generate(request: GenerationRequest, **kwargs: object):
+            if request is requests[4]:
+                raise RuntimeError("boom")
+            return real_generate(request, **kwargs)
+
+        with ThreadPoolExecutor(max_workers=2) as executor, patch.object(
+            qr_core, "generate", flaky_generate
+        ):
+            outcomes = list(generate_many(requests, chunksize=3, executor=executor))
+        self.assertEqual(len(outcomes), len(requests))
+        failure = outcomes[4]
+        self.assertIsInstance(failure, InternalGenerationError)
+        self.assertEqual((failure.code, failure.http_status), ("internal_error", 500))
+        self.assertEqual(failure.error_type, "RuntimeError")
+        for index, outcome in enumerate(outcomes):
+            if index != 4:
+                with self.subTest(index=index):
+                    self.assertEqual(outcome, generate(requests[index]))
+
+    def test_input_is_read_lazily_within_the_window(self) -> None:
+        consumed = 0
+
+        def requests():
+            nonlocal consumed
+            for index in range(1000):
+                consumed += 1
+                yield text_request(f"lazy {index}")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            outcomes = generate_many(
+                requests(), chunksize=3, window=2, executor=executor
+            )
+            self.assertEqual(consumed, 0)
+            next(outcomes)
+            # The first chunk is consumed and one more is in flight.
+            self.assertLessEqual(consumed, 3 * 3)
+            outcomes.close()
+        self.assertLess(consumed, 1000)
+
+    def test_invalid_batch_arguments_raise_before_any_work(self) -> None:
+        for overrides in ({"chunksize": 0}, {"workers": 0}, {"window": -1}):
+            with self.subTest(**overrides), self.assertRaises(ValueError):
+                generate_many([text_request()], **overrides)
+
+    def test_errors_survive_pickling(self) -> None:
+        error = CapacityError("payload_too_long", "Payload is too long.")
+        copy = pickle.loads(pickle.dumps(error))
+        self.assertIs(type(copy), CapacityError)
+        self.assertEqual((copy.code, copy.message), (error.code, error.message))
+        internal = pickle.loads(pickle.dumps(InternalGenerationError("KeyError")))
+        self.assertEqual(
+            (internal.code, internal.error_type), ("internal_error", "KeyError")
+        )
+
+
+class AsyncGenerateTests(unittest.IsolatedAsyncioTestCase):
+    async def test_agenerate_matches_generate_and_raises_the_same_errors(self) -> None:
+        request = text_request("async hello", svg_path="runs")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            result = await agenerate(request, executor=executor, lean=True)
+        self.assertEqual(result, generate(request, lean=True))
+        self.assertEqual(result.svg, generate(request).svg)
+        for request in (text_request(""), text_request("x", border=99)):
+            with self.subTest(request=request):
+                with self.assertRaises(QrGenerationError) as expected:
+                    generate(request)
+                with self.assertRaises(type(expected.exception)) as raised:
+                    await agenerate(request)
+                self.assertEqual(raised.exception.code, expected.exception.code)
+
+    async def test_batches_keep_order_or_report_indices(self) -> None:
+        requests = [text_request(f"async batch {index}") for index in range(20)]
+        requests[4] = text_request("")
+
+        async def source():
+            for request in requests:
+                yield request
+
+        outcomes = [
+            outcome async for outcome in agenerate_many(source(), concurrency=3)
+        ]
+        self.assertIsInstance(outcomes[4], QrGenerationError)
+        for index, outcome in enumerate(outcomes):
+            if index != 4:
+                self.assertEqual(outcome, generate(requests[index]))
+        pairs = [
+            pair
+            async for pair in agenerate_many(requests, concurrency=3, ordered=False)
+        ]
+        self.assertEqual(sorted(index for index, _ in pairs), list(range(20)))
+        for index, outcome in pairs:
+            self.assertEqual(type(outcome), type(outcomes[index]))
+
+    async def test_input_is_read_only_as_concurrency_allows(self) -> None:
+        consumed = 0
+
+        async def source():
+            nonlocal consumed
+            for index in range(1000):
+                consumed += 1
+                yield text_request(f"backpressure {index}")
+
+        outcomes = agenerate_many(source(), concurrency=4)
+        await anext(outcomes)
+        self.assertLessEqual(consumed, 4)
+        await outcomes.aclose()
+        self.assertLess(consumed, 1000)
+        with self.assertRaises(ValueError):
+            agenerate_many([], concurrency=0)
+
+    async def test_cancelled_requests_stop_before_rendering(self) -> None:
+        started, release = threading.Event(), threading.Event()
+        encode_built = qr_core._encode_built
+
+        def blocked_encode(*args: object) -> EncodedSymbol:
+            started.set()
+            release.wait(5)
+            return encode_built(*args)
+
+        with (
+            ThreadPoolExecutor(max_workers=1) as executor,
+            patch("qr_core._encode_built", blocked_encode),
+            patch("qr_core.render", wraps=qr_core.render) as render_spy,
+        ):
+            task = asyncio.ensure_future(agenerate(text_request(), executor=executor))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            release.set()
+        render_spy.assert_not_called()
+
+
 if __name__ == "__main__":
     unittest.main()
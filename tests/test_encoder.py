@@ -0,0 +1,736 @@
+from __future__ import annotations
+
+import collections
+import hashlib
+import random
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest.mock import patch
+
+from qrcodegen import (
+    _DATA_CAPACITY_BITS,
+    DataTooLongError,
+    QrCode,
+    QrSegment,
+    _BitBuffer,
+    _score_mask,
+)
+from tests.helpers import golden_payload, load_encoder_golden, matrix_digest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+ECC_BY_CODE = {
+    "L": QrCode.Ecc.LOW,
+    "M": QrCode.Ecc.MEDIUM,
+    "Q": QrCode.Ecc.QUARTILE,
+    "H": QrCode.Ecc.HIGH,
+}
+
+
+def reference_multiply(x: int, y: int) -> int:
+    """Upstream Russian-peasant GF(2^8/0x11D) multiplication."""
+
+    z = 0
+    for i in reversed(range(8)):
+        z = (z << 1) ^ ((z >> 7) * 0x11D)
+        z ^= ((y >> i) & 1) * x
+    return z
+
+
+def reference_divisor(degree: int) -> bytes:
+    result = [0] * (degree - 1) + [1]
+    root = 1
+    for _ in range(degree):
+        for j in range(degree):
+            result[j] = reference_multiply(result[j], root)
+            if j + 1 < degree:
+                result[j] ^= result[j + 1]
+        root = reference_multiply(root, 0x02)
+    return bytes(result)
+
+
+def reference_remainder(data: bytes, divisor: bytes) -> bytes:
+    result = [0] * len(divisor)
+    for byte in data:
+        factor = byte ^ result.pop(0)
+        result.append(0)
+        for index, coefficient in enumerate(divisor):
+            result[index] ^= reference_multiply(coefficient, factor)
+    return bytes(result)
+
+
+def reference_penalty(matrix: list[list[bool]]) -> int:
+    """Upstream module-by-module penalty scan with run histories."""
+
+    size = len(matrix)
+    result = 0
+
+    def add_history(length: int, history: collections.deque[int]) -> None:
+        if history[0] == 0:
+            length += size
+        history.appendleft(length)
+
+    def count_patterns(history: collections.deque[int]) -> int:
+        n = history[1]
+        core = (
+            n > 0
+            and history[2] == history[4] == history[5] == n
+            and history[3] == n * 3
+        )
+        return int(core and history[0] >= n * 4 and history[6] >= n) + int(
+            core and history[6] >= n * 4 and history[0] >= n
+        )
+
+    for lines in (matrix, [list(column) for column in zip(*matrix)]):
+        for line in lines:
+            color, length = False, 0
+            history: collections.deque[int] = collections.deque([0] * 7, 7)
+            for dark in line:
+                if dark == color:
+                    length += 1
+                    if length == 5:
+                        result += 3
+                    elif length > 5:
+                        result += 1
+                else:
+                    add_history(length, history)
+                    if not color:
+                        result += count_patterns(history) * 40
+                    color, length = dark, 1
+            if color:
+                add_history(length, history)
+                length = 0
+            add_history(length + size, history)
+            result += count_patterns(history) * 40
+
+    for y in range(size - 1):
+        for x in range(size - 1):
+            if matrix[y][x] == matrix[y][x + 1] == matrix[y + 1][x] == matrix[y + 1][x + 1]:
+                result += 3
+
+    dark_count = sum(map(sum, matrix))
+    total = size * size
+    return result + ((abs(dark_count * 20 - total * 10) + total - 1) // total - 1) * 10
+
+
+def pack_rows(matrix: list[list[bool]]) -> list[int]:
+    return [sum(1 << x for x, dark in enumerate(row) if dark) for row in matrix]
+
+
+def finder_rich_matrix(generator: random.Random, size: int) -> list[list[bool]]:
+    """Lines built from short runs and 1:1:3:1:1 patterns at random scales and offsets."""
+
+    matrix = []
+    for _ in range(size):
+        line: list[bool] = []
+        while len(line) < size + 40:
+            if generator.random() < 0.3:
+                n = generator.randint(1, size // 7)
+                line += [False] * generator.randint(0, 5 * n)
+                line += [True] * n + [False] * n + [True] * 3 * n + [False] * n + [True] * n
+            else:
+                line += [generator.random() < 0.5] * generator.randint(1, 8)
+        offset = generator.randint(0, 40)
+        matrix.append(line[offset : offset + size])
+    if generator.random() < 0.5:
+        matrix = [list(column) for column in zip(*matrix)]
+    return matrix
+
+
+def encode_golden_case(case: dict[str, object]) -> QrCode:
+    ecl = ECC_BY_CODE[case["errorCorrection"]]
+    if case["kind"] == "text":
+        return QrCode.encode_text(case["text"], ecl)
+    version = case["version"]
+    segment = QrSegment.make_bytes(golden_payload(case["seed"], case["length"]))
+    return QrCode.encode_segments(
+        [segment],
+        ecl,
+        minversion=version,
+        maxversion=version,
+        mask=case["mask"],
+        boostecl=False,
+    )
+
+
+class ReedSolomonTests(unittest.TestCase):
+    def test_field_multiplication_matches_the_reference_for_every_pair(self) -> None:
+        for x in range(256):
+            for y in range(256):
+                self.assertEqual(
+                    QrCode._reed_solomon_multiply(x, y), reference_multiply(x, y)
+                )
+        with self.assertRaises(ValueError):
+            QrCode._reed_solomon_multiply(256, 1)
+
+    def test_divisors_and_remainders_match_the_reference(self) -> None:
+        generator = random.Random(20260820)
+        for degree in range(1, 69):
+            with self.subTest(degree=degree):
+                divisor = QrCode._reed_solomon_compute_divisor(degree)
+                self.assertEqual(divisor, reference_divisor(degree))
+                self.assertIs(QrCode._reed_solomon_compute_divisor(degree), divisor)
+                for length in (0, 1, degree, 153):
+                    data = bytes(generator.randrange(256) for _ in range(length))
+                    self.assertEqual(
+                        QrCode._reed_solomon_compute_remainder(data, divisor),
+                        reference_remainder(data, divisor),
+                    )
+
+
+class BitBufferTests(unittest.TestCase):
+    def test_bits_append_extend_iterate_and_pack_in_big_endian(self) -> None:
+        buffer = _BitBuffer()
+        buffer.append_bits(0b101, 3)
+        buffer.append_bits(0, 0)
+        buffer.extend(_BitBuffer([0, 0, 1, 1, 1]))
+        self.assertEqual(len(buffer), 8)
+        self.assertEqual(list(buffer), [1, 0, 1, 0, 0, 1, 1, 1])
+        self.assertEqual(buffer.to_bytes(), bytes([0b10100111]))
+        buffer.append_bits(1, 1)
+        with self.assertRaises(ValueError):
+            buffer.to_bytes()
+        for value, width in ((2, 1), (-1, 4), (0, -1)):
+            with self.subTest(value=value, width=width), self.assertRaises(ValueError):
+                buffer.append_bits(value, width)
+
+    def test_byte_segments_keep_their_bits_and_copies_stay_independent(self) -> None:
+        data = "Olá, 世界".encode("utf-8")
+        segment = QrSegment.make_bytes(data)
+        self.assertEqual(segment.get_num_chars(), len(data))
+        self.assertEqual(
+            segment.get_data(),
+            [(byte >> shift) & 1 for byte in data for shift in range(7, -1, -1)],
+        )
+        copy = QrSegment(QrSegment.Mode.BYTE, len(data), segment._bitdata)
+        copy._bitdata.append_bits(1, 1)
+        self.assertEqual(len(segment.get_data()), len(data) * 8)
+        rebuilt = QrSegment(QrSegment.Mode.BYTE, len(data), segment.get_data())
+        self.assertEqual(rebuilt.get_data(), segment.get_data())
+
+
+class PackedRowTests(unittest.TestCase):
+    def test_rows_are_bitmasks_behind_the_module_accessor(self) -> None:
+        qr = QrCode.encode_text("packed rows", QrCode.Ecc.MEDIUM)
+        size = qr.get_size()
+        self.assertEqual(len(qr._modules), size)
+        for y, row in enumerate(qr._modules):
+            self.assertIsInstance(row, int)
+            self.assertEqual(row >> size, 0)
+            for x in range(size):
+                self.assertEqual(qr.get_module(x, y), (row >> x) & 1 == 1)
+        for x, y in ((-1, 0), (0, -1), (size, 0), (0, size)):
+            self.assertFalse(qr.get_module(x, y))
+        self.assertFalse(hasattr(qr, "_isfunction"))
+        self.assertEqual(qr.get_packed_rows(), tuple(qr._modules))
+        self.assertIsInstance(qr.get_packed_rows(), tuple)
+
+    def test_bulk_exports_match_the_module_accessor(self) -> None:
+        for version in (1, 7, 40):
+            qr = QrCode.encode_segments(
+                [QrSegment.make_bytes(golden_payload(f"bulk-{version}", 8))],
+                QrCode.Ecc.LOW,
+                minversion=version,
+            )
+            size = qr.get_size()
+            modules = [qr.get_module(x, y) for y in range(size) for x in range(size)]
+            with self.subTest(version=version):
+                data = qr.get_module_bytes()
+                self.assertEqual(list(data), [int(dark) for dark in modules])
+                self.assertIs(qr.get_module_bytes(), data)
+
+                view = qr.get_module_view()
+                self.assertTrue(view.readonly)
+                self.assertEqual((view.shape, view.format), ((size, size), "B"))
+                self.assertIs(view.obj, data)
+                self.assertEqual(view[size - 1, 2], int(qr.get_module(2, size - 1)))
+                with self.assertRaises(TypeError):
+                    view[0, 0] = 1
+
+                row_bytes = (size + 7) // 8
+                bits = qr.get_module_bits()
+                self.assertEqual(len(bits), size * row_bytes)
+                for y, row in enumerate(qr.get_packed_rows()):
+                    self.assertEqual(
+                        int.from_bytes(bits[y * row_bytes : (y + 1) * row_bytes], "little"),
+                        row,
+                    )
+
+    def test_mask_rows_skip_function_modules_and_undo_by_xor(self) -> None:
+        qr = QrCode.encode_text("masking", QrCode.Ecc.LOW)
+        before = list(qr._modules)
+        for mask in range(8):
+            with self.subTest(mask=mask):
+                rows = QrCode._MASK_ROWS_CACHE[(qr.get_version(), mask)]
+                # The top-left finder, separator, and format area (9x9) is never masked.
+                self.assertTrue(all(row & 0x1FF == 0 for row in rows[:9]))
+                qr._apply_mask(mask)
+                qr._apply_mask(mask)
+                self.assertEqual(qr._modules, before)
+
+
+class FunctionTemplateTests(unittest.TestCase):
+    def test_format_and_version_words_match_the_standard_tables(self) -> None:
+        import qrcodegen
+
+        self.assertEqual(len(qrcodegen._FORMAT_WORDS), 32)
+        # ISO/IEC 18004 Annex C: M/mask 0, L/mask 0, and H/mask 7.
+        self.assertEqual(qrcodegen._FORMAT_WORDS[0b00000], 0x5412)
+        self.assertEqual(qrcodegen._FORMAT_WORDS[0b01000], 0x77C4)
+        self.assertEqual(qrcodegen._FORMAT_WORDS[0b10111], 0x083B)
+        self.assertEqual(len([word for word in qrcodegen._VERSION_WORDS if word >= 0]), 34)
+        self.assertEqual(qrcodegen._VERSION_WORDS[7], 0x07C94)
+        self.assertEqual(qrcodegen._VERSION_WORDS[40], 0x28C69)
+
+    def test_symbols_of_one_version_start_from_the_same_cached_template(self) -> None:
+        first = QrCode.encode_segments(
+            QrSegment.make_segments("template one"), QrCode.Ecc.LOW, 9, 9
+        )
+        template = QrCode._FUNCTION_TEMPLATE_CACHE[9]
+        second = QrCode.encode_segments(
+            QrSegment.make_segments("template two"), QrCode.Ecc.HIGH, 9, 9
+        )
+        self.assertIs(QrCode._FUNCTION_TEMPLATE_CACHE[9], template)
+        modules, function = template
+        for qr in (first, second):
+            for y in range(qr.get_size()):
+                row = qr._modules[y] & function[y]
+                # Only the format area differs from the template among function modules.
+                format_area = 0
+                for format_y, area, _bits in QrCode._get_format_rows(9, 0):
+                    if format_y == y:
+                        format_area = area
+                self.assertEqual(row & ~format_area, modules[y] & ~format_area)
+
+
+class CodewordPlacementTests(unittest.TestCase):
+    def test_positions_follow_the_zigzag_scan_over_data_modules(self) -> None:
+        for version in (1, 2, 7, 21, 40):
+            with self.subTest(version=version):
+                size = version * 4 + 17
+                positions = QrCode._get_codeword_positions(version)
+                function = QrCode._get_function_template(version)[1]
+                self.assertEqual(
+                    len(positions), QrCode._get_num_raw_data_modules(version) // 8 * 8
+                )
+                self.assertEqual(len(set(positions)), len(positions))
+                self.assertEqual(positions[0], size * size - 1)
+                self.assertEqual(positions[1], size * size - 2)
+                for position in positions:
+                    y, x = divmod(position, size)
+                    self.assertEqual((function[y] >> x) & 1, 0)
+                self.assertIs(QrCode._get_codeword_positions(version), positions)
+
+    def test_codewords_read_back_in_placement_order_after_unmasking(self) -> None:
+        generator = random.Random(5)
+        for version, mask in ((3, 0), (12, 5), (33, 7)):
+            with self.subTest(version=version, mask=mask):
+                ecl = QrCode.Ecc.MEDIUM
+                data = bytes(
+                    generator.randrange(256)
+                    for _ in range(QrCode._get_num_data_codewords(version, ecl))
+                )
+                qr = QrCode(version, ecl, data, mask)
+                expected = qr._add_ecc_and_interleave(bytearray(data))
+                mask_rows = QrCode._MASK_ROWS_CACHE[(version, mask)]
+                size = qr.get_size()
+                bits = "".join(
+                    str(((qr._modules[p // size] ^ mask_rows[p // size]) >> (p % size)) & 1)
+                    for p in QrCode._get_codeword_positions(version)
+                )
+                self.assertEqual(int(bits, 2).to_bytes(len(expected), "big"), expected)
+
+
+class VersionSearchTests(unittest.TestCase):
+    def test_capacity_table_and_search_match_the_linear_upstream_scan(self) -> None:
+        generator = random.Random(7)
+        texts = ["", "0" * 7089, "A" * 4296, "a" * 2953, "a" * 2954]
+        texts += [
+            generator.choice(("0123456789", "HELLO WORLD", "hello"))
+            * generator.randrange(1, 700)
+            for _ in range(40)
+        ]
+        for text in texts:
+            segments = QrSegment.make_segments(text)
+            for code, ecl in ECC_BY_CODE.items():
+                bounds = [(1, 40)]
+                bounds.append(tuple(sorted(generator.sample(range(1, 41), 2))))
+                for minversion, maxversion in bounds:
+                    expected = None
+                    for version in range(minversion, maxversion + 1):
+                        used = QrSegment.get_total_bits(segments, version)
+                        capacity = QrCode._get_num_data_codewords(version, ecl) * 8
+                        self.assertEqual(capacity, _DATA_CAPACITY_BITS[ecl.ordinal][version])
+                        if used is not None and used <= capacity:
+                            expected = version
+                            break
+                    with self.subTest(length=len(text), ecl=code, bounds=(minversion, maxversion)):
+                        found = QrCode.find_min_version(
+                            lambda version: QrSegment.get_total_bits(segments, version),
+                            ecl,
+                            minversion,
+                            maxversion,
+                        )
+                        self.assertEqual(found, expected)
+                        if expected is None:
+                            with self.assertRaises(DataTooLongError):
+                                QrCode.encode_segments(segments, ecl, minversion, maxversion)
+                        else:
+                            qr = QrCode.encode_segments(segments, ecl, minversion, maxversion)
+                            self.assertEqual(qr.get_version(), expected)
+
+
+def reference_split_bits(text: str, version: int) -> int | None:
+    """Fewest bits over every split of the text into single-mode segments."""
+
+    best: list[int | None] = [0] + [None] * len(text)
+    for start in range(len(text)):
+        if best[start] is None:
+            continue
+        for end in range(start + 1, len(text) + 1):
+            part = text[start:end]
+            options = [QrSegment.make_bytes(part.encode("utf-8"))]
+            if QrSegment.is_alphanumeric(part):
+                options.append(QrSegment.make_alphanumeric(part))
+            if QrSegment.is_numeric(part):
+                options.append(QrSegment.make_numeric(part))
+            for segment in options:
+                bits = QrSegment.get_total_bits([segment], version)
+                if bits is not None and (best[end] is None or best[start] + bits < best[end]):
+                    best[end] = best[start] + bits
+    return best[-1]
+
+
+class SegmentationTests(unittest.TestCase):
+    def test_optimal_split_matches_an_exhaustive_search_and_round_trips(self) -> None:
+        generator = random.Random(8)
+        alphabet = "0123456789ABCXYZ :/.-abcé"
+        for _ in range(150):
+            text = "".join(generator.choice(alphabet) for _ in range(generator.randrange(1, 20)))
+            for version in (1, 10, 27):
+                with self.subTest(text=text, version=version):
+                    bits, runs = QrSegment._split_optimally(text, version)
+                    self.assertEqual("".join(part for _, part in runs), text)
+                    self.assertEqual(bits, reference_split_bits(text, version))
+
+    def test_segments_fit_the_smallest_version_or_raise(self) -> None:
+        ecl = QrCode.Ecc.MEDIUM
+        self.assertEqual(QrSegment.make_segments_optimally("", ecl), [])
+        text = "https://EXAMPLE.COM/T/0012345678"
+        segments = QrSegment.make_segments_optimally(text, ecl)
+        self.assertEqual(
+            [segment.get_mode() for segment in segments],
+            [QrSegment.Mode.BYTE, QrSegment.Mode.ALPHANUMERIC, QrSegment.Mode.NUMERIC],
+        )
+        self.assertEqual(QrSegment.get_total_bits(segments, 1), 207)
+        self.assertEqual(QrCode.encode_segments(segments, ecl).get_version(), 2)
+        with self.assertRaises(DataTooLongError):
+            QrSegment.make_segments_optimally(text, ecl, maxversion=1)
+        with self.assertRaises(DataTooLongError):
+            QrSegment.make_segments_optimally("A1" * 3000, QrCode.Ecc.HIGH)
+        version, planned = QrSegment.make_segments_optimally_with_version(text, ecl)
+        self.assertEqual(version, 2)
+        self.assertEqual(
+            [(s.get_mode(), s.get_data()) for s in planned],
+            [(s.get_mode(), s.get_data()) for s in segments],
+        )
+        self.assertEqual(
+            QrSegment.make_segments_optimally_with_version("", ecl, 5, 9), (5, [])
+        )
+
+
+class PenaltyScoreTests(unittest.TestCase):
+    def test_bitboard_scores_match_the_reference_scan_on_synthetic_grids(self) -> None:
+        generator = random.Random(7)
+        for trial in range(300):
+            size = generator.choice((21, 25, 45, 77, 101))
+            if trial % 3 == 0:
+                matrix = [
+                    [generator.random() < 0.5 for _ in range(size)] for _ in range(size)
+                ]
+            else:
+                matrix = finder_rich_matrix(generator, size)
+            with self.subTest(trial=trial, size=size):
+                self.assertEqual(
+                    QrCode._compute_penalty(size, pack_rows(matrix))[0],
+                    reference_penalty(matrix),
+                )
+
+    def test_bitboard_scores_match_the_reference_scan_for_every_mask(self) -> None:
+        for text in ("penalty", "https://example.com/" + "x" * 150):
+            for mask in range(8):
+                qr = QrCode.encode_segments(
+                    QrSegment.make_segments(text), QrCode.Ecc.QUARTILE, mask=mask
+                )
+                size = qr.get_size()
+                matrix = [[qr.get_module(x, y) for x in range(size)] for y in range(size)]
+                with self.subTest(version=qr.get_version(), mask=mask):
+                    self.assertEqual(qr._get_penalty_score(), reference_penalty(matrix))
+
+    def test_cutoff_only_stops_candidates_that_cannot_win(self) -> None:
+        generator = random.Random(11)
+        for trial in range(60):
+            size = generator.choice((21, 45, 101))
+            rows = pack_rows(finder_rich_matrix(generator, size))
+            full, lines = QrCode._compute_penalty(size, rows)
+            self.assertEqual(lines, size * 2)
+            for cutoff in (0, full // 2, full, full + 1):
+                with self.subTest(trial=trial, cutoff=cutoff):
+                    bounded, lines = QrCode._compute_penalty(size, rows, cutoff)
+                    self.assertIn(lines, (size, size * 2))
+                    if cutoff > full:
+                        self.assertEqual((bounded, lines), (full, size * 2))
+                    else:
+                        self.assertGreaterEqual(bounded, cutoff)
+                        self.assertLessEqual(bounded, full)
+
+    def test_lines_scored_are_counted_per_code(self) -> None:
+        segments = QrSegment.make_segments("https://example.com/" + "x" * 150)
+        fixed = QrCode.encode_segments(segments, QrCode.Ecc.MEDIUM, mask=3)
+        self.assertEqual(fixed.get_penalty_lines_scored(), 0)
+        automatic = QrCode.encode_segments(segments, QrCode.Ecc.MEDIUM)
+        size = automatic.get_size()
+        self.assertGreaterEqual(automatic.get_penalty_lines_scored(), 8 * size + size)
+        self.assertLessEqual(automatic.get_penalty_lines_scored(), 8 * 2 * size)
+
+
+class MaskExecutorTests(unittest.TestCase):
+    def test_each_candidate_score_matches_the_serial_search(self) -> None:
+        generator = random.Random(9)
+        for version in (1, 7, 27):
+            with self.subTest(version=version):
+                ecl = QrCode.Ecc.QUARTILE
+                data = bytes(
+                    generator.randrange(256)
+                    for _ in range(QrCode._get_num_data_codewords(version, ecl))
+                )
+                unmasked = QrCode(version, ecl, data, 0)
+                unmasked._isfunction = list(QrCode._get_function_template(version)[1])
+                unmasked._apply_mask(0)
+                rows = tuple(unmasked._modules)
+                for mask in range(8):
+                    masked = QrCode(version, ecl, data, mask)
+                    self.assertEqual(
+                        _score_mask(version, ecl.ordinal, rows, mask),
+                        masked._get_penalty_score(),
+                    )
+
+    def test_pooled_mask_choice_is_identical_to_the_serial_path(self) -> None:
+        generator = random.Random(10)
+        segments = [
+            [QrSegment.make_bytes(bytes(generator.randrange(256) for _ in range(length)))]
+            for length in (10, 300, 1200)
+        ]
+        executors = (ThreadPoolExecutor(4), ProcessPoolExecutor(2))
+        try:
+            for executor in executors:
+                for segs in segments:
+                    with self.subTest(executor=type(executor).__name__, bits=len(segs[0].get_data())):
+                        serial = QrCode.encode_segments(segs, QrCode.Ecc.LOW)
+                        pooled = QrCode.encode_segments(segs, QrCode.Ecc.LOW, maskexecutor=executor)
+                        self.assertEqual(pooled.get_mask(), serial.get_mask())
+                        self.assertEqual(pooled._modules, serial._modules)
+        finally:
+            for executor in executors:
+                executor.shutdown()
+
+
+class FastMaskTests(unittest.TestCase):
+    def setUp(self) -> None:
+        QrCode.set_matrix_engine("python")
+
+    def tearDown(self) -> None:
+        QrCode.set_matrix_engine(None)
+
+    def test_fast_mask_is_the_best_estimate_without_false_finders(self) -> None:
+        generator = random.Random(12)
+        for version in range(1, QrCode._FAST_MASK_MAX_VERSION + 1):
+            ecl = QrCode.Ecc.MEDIUM
+            data = bytes(
+                generator.randrange(256)
+                for _ in range(QrCode._get_num_data_codewords(version, ecl))
+            )
+            with self.subTest(version=version):
+                fast = QrCode(version, ecl, data, -1, fastmask=True)
+                size = fast.get_size()
+                estimates = []
+                finders = []
+                for mask in range(8):
+                    masked = QrCode(version, ecl, data, mask)
+                    estimates.append(QrCode._estimate_penalty(size, masked._modules))
+                    finders.append(masked._count_false_finder_patterns())
+                ranked = sorted(range(8), key=lambda mask: (estimates[mask], mask))
+                clean = [mask for mask in ranked if finders[mask] == 0]
+                explicit = QrCode(version, ecl, data, fast.get_mask())
+                self.assertEqual(fast._modules, explicit._modules)
+                if clean:
+                    self.assertEqual(fast.get_mask(), clean[0])
+                    checked = ranked.index(clean[0]) + 1
+                    self.assertEqual(fast.get_penalty_lines_scored(), 8 * size + checked * 2 * size)
+                else:
+                    self.assertEqual(fast.get_mask(), QrCode(version, ecl, data, -1).get_mask())
+
+    def test_fast_mask_is_the_full_search_where_it_would_not_pay_off(self) -> None:
+        ecl = QrCode.Ecc.MEDIUM
+        cases = (("python", QrCode._FAST_MASK_MAX_VERSION + 1), ("python", 25), ("numpy", 1))
+        for engine, version in cases:
+            if engine == "numpy" and numpy is None:
+                continue
+            QrCode.set_matrix_engine(engine)
+            data = bytes(i % 256 for i in range(QrCode._get_num_data_codewords(version, ecl)))
+            with self.subTest(engine=engine, version=version), patch.object(
+                QrCode, "_choose_mask_fast"
+            ) as choose_fast:
+                fast = QrCode(version, ecl, data, -1, fastmask=True)
+                exact = QrCode(version, ecl, data, -1)
+                choose_fast.assert_not_called()
+                self.assertEqual(fast._modules, exact._modules)
+                self.assertEqual(fast.get_penalty_lines_scored(), exact.get_penalty_lines_scored())
+
+    def test_fast_mask_keeps_checking_past_the_best_estimates(self) -> None:
+        generator = random.Random(14)
+        ecl = QrCode.Ecc.LOW
+        while True:
+            data = bytes(
+                generator.randrange(256) for _ in range(QrCode._get_num_data_codewords(1, ecl))
+            )
+            finders = [QrCode(1, ecl, data, mask)._count_false_finder_patterns() for mask in range(8)]
+            if sum(count > 0 for count in finders) >= 3 and 0 in finders:
+                break
+        # Rank three masks with false finders first, so all the usual candidates fail.
+        failing = [mask for mask in range(8) if finders[mask] > 0][:3]
+        estimates = [0 if mask in failing else 100 + mask for mask in range(8)]
+        with patch.object(QrCode, "_estimate_penalty", side_effect=estimates):
+            fast = QrCode(1, ecl, data, -1, fastmask=True)
+        self.assertNotIn(fast.get_mask(), failing)
+        self.assertEqual(QrCode(1, ecl, data, fast.get_mask())._count_false_finder_patterns(), 0)
+
+    def test_fast_mask_falls_back_to_the_exact_search_when_every_mask_fails(self) -> None:
+        data = bytes(range(QrCode._get_num_data_codewords(3, QrCode.Ecc.MEDIUM)))
+        exact = QrCode(3, QrCode.Ecc.MEDIUM, data, -1)
+        with patch.object(QrCode, "_count_false_finder_patterns", return_value=1):
+            fast = QrCode(3, QrCode.Ecc.MEDIUM, data, -1, fastmask=True)
+        self.assertEqual(fast.get_mask(), exact.get_mask())
+        self.assertEqual(fast._modules, exact._modules)
+
+    def test_estimate_is_the_row_part_of_the_full_penalty(self) -> None:
+        generator = random.Random(13)
+        for trial in range(40):
+            size = generator.choice((21, 45, 101))
+            rows = pack_rows(finder_rich_matrix(generator, size))
+            with self.subTest(trial=trial):
+                estimate = QrCode._estimate_penalty(size, rows)
+                self.assertLessEqual(estimate, QrCode._compute_penalty(size, rows)[0])
+                self.assertGreaterEqual(estimate, 0)
+
+    def test_explicit_mask_ignores_fast_selection(self) -> None:
+        segments = QrSegment.make_segments("fast mask")
+        fixed = QrCode.encode_segments(segments, QrCode.Ecc.LOW, mask=6, fastmask=True)
+        self.assertEqual(fixed.get_mask(), 6)
+        self.assertEqual(fixed.get_penalty_lines_scored(), 0)
+
+
+class MatrixEngineTests(unittest.TestCase):
+    def tearDown(self) -> None:
+        QrCode.set_matrix_engine(None)
+
+    def test_selection_is_automatic_with_a_validated_override(self) -> None:
+        QrCode.set_matrix_engine(None)
+        self.assertEqual(QrCode.get_matrix_engine(), "python" if numpy is None else "numpy")
+        QrCode.set_matrix_engine("python")
+        self.assertEqual(QrCode.get_matrix_engine(), "python")
+        with self.assertRaises(ValueError):
+            QrCode.set_matrix_engine("fortran")
+        with patch("qrcodegen.numpy", None):
+            with self.assertRaises(ValueError):
+                QrCode.set_matrix_engine("numpy")
+            QrCode.set_matrix_engine(None)
+            self.assertEqual(QrCode.get_matrix_engine(), "python")
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_array_scores_match_the_reference_scan_on_synthetic_grids(self) -> None:
+        generator = random.Random(14)
+        for size in (21, 45, 101, 177):
+            matrices = [
+                finder_rich_matrix(generator, size)
+                if generator.random() < 0.6
+                else [[generator.random() < 0.5 for _ in range(size)] for _ in range(size)]
+                for _ in range(5)
+            ]
+            grids = numpy.array(matrices, dtype=numpy.uint8)
+            with self.subTest(size=size):
+                self.assertEqual(
+                    QrCode._compute_penalties_numpy(size, grids).tolist(),
+                    [reference_penalty(matrix) for matrix in matrices],
+                )
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_array_scores_match_the_bitboards_for_every_mask(self) -> None:
+        generator = random.Random(15)
+        for version in (1, 6, 7, 21, 40):
+            for ecl in ECC_BY_CODE.values():
+                data = bytes(
+                    generator.randrange(256)
+                    for _ in range(QrCode._get_num_data_codewords(version, ecl))
+                )
+                masked = [QrCode(version, ecl, data, mask) for mask in range(8)]
+                size = masked[0].get_size()
+                grids = numpy.stack([QrCode._rows_to_array(size, qr._modules) for qr in masked])
+                unmasked = QrCode(version, ecl, data, 0)
+                unmasked._isfunction = list(QrCode._get_function_template(version)[1])
+                unmasked._apply_mask(0)
+                candidates = QrCode._rows_to_array(size, unmasked._modules)[numpy.newaxis] ^ unmasked._get_mask_arrays()
+                ys, xs, values = QrCode._get_format_arrays(version, ecl)
+                candidates[:, ys, xs] = values
+                with self.subTest(version=version, ecl=ecl.ordinal):
+                    self.assertTrue(numpy.array_equal(candidates, grids))
+                    self.assertEqual(
+                        QrCode._compute_penalties_numpy(size, grids).tolist(),
+                        [QrCode._compute_penalty(size, qr._modules)[0] for qr in masked],
+                    )
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_engines_produce_identical_symbols(self) -> None:
+        generator = random.Random(16)
+        for length in (1, 40, 400, 2000):
+            segments = [QrSegment.make_bytes(bytes(generator.randrange(256) for _ in range(length)))]
+            with self.subTest(length=length):
+                QrCode.set_matrix_engine("python")
+                expected = QrCode.encode_segments(segments, QrCode.Ecc.LOW)
+                QrCode.set_matrix_engine("numpy")
+                actual = QrCode.encode_segments(segments, QrCode.Ecc.LOW)
+                self.assertEqual(actual.get_mask(), expected.get_mask())
+                self.assertEqual(actual._modules, expected._modules)
+                self.assertEqual(actual.get_penalty_lines_scored(), 16 * actual.get_size())
+
+
+class GoldenEncoderTests(unittest.TestCase):
+    def test_symbols_match_digests_recorded_from_the_upstream_encoder(self) -> None:
+        for case in load_encoder_golden()["cases"]:
+            with self.subTest(
+                kind=case["kind"],
+                version=case["version"],
+                mask=case["mask"],
+                level=case["errorCorrection"],
+            ):
+                qr = encode_golden_case(case)
+                self.assertEqual(qr.get_version(), case["version"])
+                self.assertEqual(qr.get_mask(), case["chosenMask"])
+                if "actualErrorCorrection" in case:
+                    self.assertEqual(
+                        "LMQH"[qr.get_error_correction_level().ordinal],
+                        case["actualErrorCorrection"],
+                    )
+                self.assertEqual(
+                    matrix_digest(qr.get_size(), qr.get_module), case["sha256"]
+                )
+                digits = qr.get_module_bytes().translate(bytes.maketrans(b"\0\1", b"01"))
+                self.assertEqual(hashlib.sha256(digits).hexdigest(), case["sha256"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -56,6 +56,24 @@ class SafeOutputTests(unittest.TestCase):
                     self.assertTrue(path.name.startswith("escape"))
             self.assertFalse((root / "escape.svg").exists())
 
+    def test_chunk_iterables_are_written_in_order(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            chunks = iter([b"<svg>", "界".encode("utf-8"), b"</svg>"])
+            path = save_svg_exclusive(chunks, "chunks", directory)
+            self.assertEqual(path.read_text(encoding="utf-8"), "<svg>界</svg>")
+
+    def test_failing_chunk_source_removes_only_the_new_file(self) -> None:
+        def chunks():
+            yield b"<svg>"
+            raise RuntimeError("renderer failed")
+
+        with tempfile.TemporaryDirectory() as directory:
+            existing = save_svg_exclusive("kept", "partial", directory)
+            with self.assertRaises(RuntimeError):
+                save_svg_exclusive(chunks(), "partial", directory)
+            self.assertEqual(list(Path(directory).iterdir()), [existing])
+            self.assertEqual(existing.read_text(encoding="utf-8"), "kept")
+
     def test_filesystem_errors_propagate_to_the_adapter_without_fallback_overwrite(self) -> None:
         with tempfile.TemporaryDirectory() as directory, patch(
             "qr_files.os.open", side_effect=PermissionError("private path")
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import pickle
+import unittest
+
+from qrcodegen import QrCode
+from qr_matrix import ModuleMatrix
+
+
+class ModuleMatrixTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.qr = QrCode.encode_text("https://example.com/matrix", QrCode.Ecc.QUARTILE)
+        self.size = self.qr.get_size()
+        self.matrix = ModuleMatrix(self.size, self.qr.get_packed_rows())
+        self.nested = tuple(
+            tuple(self.qr.get_module(x, y) for x in range(self.size))
+            for y in range(self.size)
+        )
+
+    def test_reads_like_the_nested_tuple_matrix(self) -> None:
+        self.assertEqual(len(self.matrix), self.size)
+        self.assertEqual(tuple(self.matrix), self.nested)
+        self.assertEqual(self.matrix[-1], self.nested[-1])
+        self.assertEqual(self.matrix[3:7], self.nested[3:7])
+        for y in range(self.size):
+            row = self.matrix[y]
+            self.assertIsInstance(row, tuple)
+            for x in range(self.size):
+                self.assertIs(row[x], self.nested[y][x])
+                self.assertEqual(self.matrix.is_dark(x, y), self.nested[y][x])
+        self.assertEqual(self.matrix.dark_count(), sum(map(sum, self.nested)))
+        with self.assertRaises(IndexError):
+            self.matrix[self.size]
+        with self.assertRaises(IndexError):
+            self.matrix.is_dark(self.size, 0)
+
+    def test_content_equality_hashing_and_round_trips(self) -> None:
+        packed = ModuleMatrix.from_modules(self.nested)
+        self.assertEqual(packed, self.matrix)
+        self.assertEqual(hash(packed), hash(self.matrix))
+        self.assertEqual(packed.rows, self.qr.get_packed_rows())
+        self.assertEqual(pickle.loads(pickle.dumps(self.matrix)), self.matrix)
+        self.assertNotEqual(self.matrix, ModuleMatrix(self.size, [0] * self.size))
+        # Compatible with the nested tuple matrix it replaced, which is not a list.
+        self.assertEqual(self.matrix, self.nested)
+        self.assertEqual(self.nested, self.matrix)
+        self.assertEqual(hash(self.matrix), hash(self.nested))
+        self.assertEqual(len({self.matrix, self.nested}), 1)
+        self.assertNotEqual(self.matrix, self.nested[:-1])
+        self.assertNotEqual(self.matrix, list(self.nested))
+        self.assertEqual(ModuleMatrix.from_modules([]), ModuleMatrix(0, ()))
+
+    def test_rows_are_validated_and_the_matrix_is_immutable(self) -> None:
+        invalid = ((2, [0]), (2, [0, 4]), (2, [0, -1]), (1, ["1"]), (1, [True]))
+        for size, rows in invalid:
+            with self.subTest(size=size, rows=rows), self.assertRaises(ValueError):
+                ModuleMatrix(size, rows)
+        with self.assertRaises(AttributeError):
+            self.matrix._rows = ()
+        with self.assertRaises(AttributeError):
+            self.matrix.extra = 1
+        self.assertFalse(hasattr(self.matrix, "__dict__"))
+
+
+if __name__ == "__main__":
+    unittest.main()
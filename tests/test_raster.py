@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import io
+import unittest
+
+from qrcodegen import QrCode, QrSegment
+from qr_contract import GenerationRequest
+from qr_core import generate
+from qr_matrix import ModuleMatrix
+from qr_raster import iter_pbm_chunks, iter_png_chunks, render_pbm, render_png
+from tests.helpers import golden_payload, read_pbm_pixels, read_png_pixels
+
+
+def _symbol(version: int) -> ModuleMatrix:
+    qr = QrCode.encode_segments(
+        [QrSegment.make_bytes(golden_payload(f"raster-{version}", 16))],
+        QrCode.Ecc.LOW,
+        minversion=version,
+        maxversion=version,
+    )
+    return ModuleMatrix(qr.get_size(), qr.get_packed_rows())
+
+
+def _expected_pixels(matrix: ModuleMatrix, border: int, scale: int) -> list[list[int]]:
+    dimension = (matrix.size + 2 * border) * scale
+    return [
+        [
+            int(
+                0 <= x // scale - border < matrix.size
+                and 0 <= y // scale - border < matrix.size
+                and matrix.is_dark(x // scale - border, y // scale - border)
+            )
+            for x in range(dimension)
+        ]
+        for y in range(dimension)
+    ]
+
+
+class RasterRendererTests(unittest.TestCase):
+    def test_png_pixels_and_palette_match_the_matrix(self) -> None:
+        for version, border, scale in ((1, 0, 1), (1, 4, 3), (2, 2, 5), (7, 4, 2)):
+            matrix = _symbol(version)
+            with self.subTest(version=version, border=border, scale=scale):
+                pixels, palette = read_png_pixels(
+                    render_png(matrix, border, "#FFF8E1", "#0D47A1", scale)
+                )
+                self.assertEqual(palette, [(0xFF, 0xF8, 0xE1), (0x0D, 0x47, 0xA1)])
+                self.assertEqual(pixels, _expected_pixels(matrix, border, scale))
+
+    def test_pbm_pixels_match_the_matrix(self) -> None:
+        for version, border, scale in ((1, 0, 1), (1, 4, 3), (7, 4, 2)):
+            matrix = _symbol(version)
+            with self.subTest(version=version, border=border, scale=scale):
+                pixels = read_pbm_pixels(render_pbm(matrix, border, scale))
+                self.assertEqual(pixels, _expected_pixels(matrix, border, scale))
+
+    def test_large_images_stream_in_bounded_chunks(self) -> None:
+        matrix = _symbol(40)
+        png_chunks = list(
+            iter_png_chunks(matrix, 16, "#FFFFFF", "#000000", 30, chunk_size=4096)
+        )
+        self.assertTrue(png_chunks[0].startswith(b"\x89PNG"))
+        self.assertLessEqual(max(len(chunk) for chunk in png_chunks[1:]), 4096 + 12)
+        # A 6,270-pixel-square image is too slow for the pure-Python reader.
+        from PIL import Image
+
+        with Image.open(io.BytesIO(b"".join(png_chunks))) as image:
+            image.load()
+            self.assertEqual(image.size, ((177 + 32) * 30,) * 2)
+            for x, y in ((0, 0), (3, 5), (176, 176), (8, 8), (10, 3)):
+                dark = image.getpixel(((x + 16) * 30 + 15, (y + 16) * 30 + 15))
+                self.assertEqual(dark == 1, matrix.is_dark(x, y))
+
+        pbm_chunks = list(iter_pbm_chunks(matrix, 16, 30, chunk_size=4096))
+        self.assertLessEqual({len(chunk) for chunk in pbm_chunks[:-1]}, {4096})
+        self.assertEqual(b"".join(pbm_chunks), render_pbm(matrix, 16, 30))
+
+    def test_invalid_geometry_is_rejected_before_any_output(self) -> None:
+        matrix = _symbol(1)
+        for scale in (0, -1, 1.5, True):
+            with self.subTest(scale=scale), self.assertRaises(ValueError):
+                iter_png_chunks(matrix, 4, "#FFFFFF", "#000000", scale)
+        for border in (-1, 1.5, 4.0, True):
+            with self.subTest(border=border), self.assertRaises(ValueError):
+                iter_pbm_chunks(matrix, border)
+            with self.subTest(border=border), self.assertRaises(ValueError):
+                iter_png_chunks(matrix, border, "#FFFFFF", "#000000")
+        with self.assertRaises(ValueError):
+            iter_png_chunks(matrix, 4, "#FFFFFF", "#000000", chunk_size=0)
+
+    def test_results_render_rasters_with_their_presentation(self) -> None:
+        result = generate(
+            GenerationRequest(
+                payload_type="url",
+                fields={"url": "example.com/raster"},
+                foreground="#FFFFFF",
+                background="#000000",
+                border=6,
+            )
+        )
+        pixels, palette = read_png_pixels(b"".join(result.png_chunks(2)))
+        self.assertEqual(palette, [(0, 0, 0), (255, 255, 255)])
+        self.assertEqual(pixels, _expected_pixels(result.matrix, 6, 2))
+        pbm = read_pbm_pixels(b"".join(result.pbm_chunks(2)))
+        self.assertEqual(pbm, pixels)
+
+
+if __name__ == "__main__":
+    unittest.main()
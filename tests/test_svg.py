@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import random
+import unittest
+
+from qrcodegen import QrCode, QrSegment
+from qr_matrix import ModuleMatrix
+from qr_svg import iter_svg_chunks, render_svg
+from tests.helpers import golden_payload, render_svg_per_module, svg_module_coordinates
+
+
+def _symbol(version: int, seed: str) -> ModuleMatrix:
+    qr = QrCode.encode_segments(
+        [QrSegment.make_bytes(golden_payload(seed, 16))],
+        QrCode.Ecc.LOW,
+        minversion=version,
+        maxversion=version,
+    )
+    return ModuleMatrix(qr.get_size(), qr.get_packed_rows())
+
+
+class SvgRendererTests(unittest.TestCase):
+    def test_packed_renderer_matches_the_per_module_reference(self) -> None:
+        for version in (1, 2, 7, 14, 27, 40):
+            matrix = _symbol(version, f"svg-{version}")
+            for border in (0, 1, 4, 16):
+                with self.subTest(version=version, border=border):
+                    expected = render_svg_per_module(
+                        matrix, border, "#FFFFFF", "#000000"
+                    )
+                    self.assertEqual(
+                        render_svg(matrix, border, "#FFFFFF", "#000000"), expected
+                    )
+
+    def test_edge_rows_and_nested_sequences_render_identically(self) -> None:
+        generator = random.Random(17)
+        size = 21
+        rows = [0, (1 << size) - 1, 1, 1 << (size - 1)]
+        rows += [generator.getrandbits(size) for _ in range(size - len(rows))]
+        matrix = ModuleMatrix(size, rows)
+        nested = [list(row) for row in matrix]
+        expected = render_svg_per_module(nested, 4, "#FFFFFF", "#112233")
+        self.assertEqual(render_svg(matrix, 4, "#FFFFFF", "#112233"), expected)
+        self.assertEqual(render_svg(nested, 4, "#FFFFFF", "#112233"), expected)
+        self.assertEqual(
+            render_svg(ModuleMatrix(3, [0, 0, 0]), 2, "#FFFFFF", "#000000"),
+            render_svg_per_module(ModuleMatrix(3, [0, 0, 0]), 2, "#FFFFFF", "#000000"),
+        )
+
+    def test_coordinates_beyond_the_precomputed_table_are_still_exact(self) -> None:
+        matrix = _symbol(40, "wide-border")
+        self.assertEqual(
+            render_svg(matrix, 40, "#FFFFFF", "#000000"),
+            render_svg_per_module(matrix, 40, "#FFFFFF", "#000000"),
+        )
+
+    def test_run_path_covers_the_same_modules_with_fewer_bytes(self) -> None:
+        for version in (1, 7, 27, 40):
+            matrix = _symbol(version, f"runs-{version}")
+            for border in (0, 4, 16):
+                with self.subTest(version=version, border=border):
+                    modules = render_svg(matrix, border, "#FFFFFF", "#000000")
+                    runs = render_svg(matrix, border, "#FFFFFF", "#000000", "runs")
+                    self.assertEqual(
+                        svg_module_coordinates(runs),
+                        {
+                            (x + border, y + border)
+                            for y in range(matrix.size)
+                            for x in range(matrix.size)
+                            if matrix.is_dark(x, y)
+                        },
+                    )
+                    self.assertEqual(
+                        svg_module_coordinates(runs), svg_module_coordinates(modules)
+                    )
+                    self.assertLess(len(runs), len(modules))
+
+    def test_run_path_format_and_unknown_modes(self) -> None:
+        matrix = ModuleMatrix(3, [0b011, 0, 0b101])
+        svg = render_svg(matrix, 2, "#FFFFFF", "#000000", "runs")
+        self.assertIn(' d="M2,2h2v1h-2zm0,2h1v1h-1zm2,0h1v1h-1z"', svg)
+        empty = render_svg(ModuleMatrix(2, [0, 0]), 4, "#FFFFFF", "#000000", "runs")
+        self.assertIn(' d=""', empty)
+        with self.assertRaises(ValueError):
+            render_svg(matrix, 2, "#FFFFFF", "#000000", "squares")
+
+    def test_outline_fills_the_same_modules_even_odd(self) -> None:
+        for version in (1, 7, 27, 40):
+            matrix = _symbol(version, f"outline-{version}")
+            for border in (0, 4, 16):
+                with self.subTest(version=version, border=border):
+                    runs = render_svg(matrix, border, "#FFFFFF", "#000000", "runs")
+                    outline = render_svg(
+                        matrix, border, "#FFFFFF", "#000000", "outline"
+                    )
+                    self.assertIn('fill-rule="evenodd"', outline)
+                    self.assertEqual(
+                        svg_module_coordinates(outline), svg_module_coordinates(runs)
+                    )
+                    self.assertLess(len(outline), len(runs))
+
+    def test_outline_traces_one_contour_per_region_and_hole(self) -> None:
+        generator = random.Random(19)
+        for _ in range(200):
+            size = generator.randrange(1, 10)
+            rows = [generator.getrandbits(size) for _ in range(size)]
+            matrix = ModuleMatrix(size, rows)
+            with self.subTest(rows=matrix.rows):
+                self.assertEqual(
+                    svg_module_coordinates(
+                        render_svg(matrix, 1, "#FFFFFF", "#000000", "outline")
+                    ),
+                    svg_module_coordinates(render_svg(matrix, 1, "#FFFFFF", "#000000")),
+                )
+        cases = [
+            (ModuleMatrix(3, [0b111, 0b101, 0b111]), "M1,1h3v3h-3zm1,2h1v-1h-1z"),
+            (ModuleMatrix(2, [0b01, 0b10]), "M1,1h1v1h-1zm1,1h1v1h-1z"),
+            (ModuleMatrix(2, [0b11, 0b01]), "M1,1h2v1h-1v1h-1z"),
+            (ModuleMatrix(2, [0, 0]), ""),
+        ]
+        for matrix, path in cases:
+            with self.subTest(rows=matrix.rows):
+                svg = render_svg(matrix, 1, "#FFFFFF", "#000000", "outline")
+                self.assertIn(f' d="{path}"', svg)
+
+    def test_chunks_join_to_the_document_and_respect_the_bound(self) -> None:
+        matrix = _symbol(40, "chunks")
+        for path_mode in ("modules", "runs", "outline"):
+            svg = render_svg(matrix, 4, "#FFFFFF", "#000000", path_mode)
+            expected = svg.encode("utf-8")
+            for chunk_size in (1, 7, 1024, 16 * 1024, len(expected) + 1):
+                with self.subTest(path_mode=path_mode, chunk_size=chunk_size):
+                    chunks = list(
+                        iter_svg_chunks(
+                            matrix, 4, "#FFFFFF", "#000000", path_mode, chunk_size
+                        )
+                    )
+                    self.assertEqual(b"".join(chunks), expected)
+                    sizes = {len(chunk) for chunk in chunks[:-1]}
+                    self.assertLessEqual(sizes, {chunk_size})
+                    self.assertTrue(0 < len(chunks[-1]) <= chunk_size)
+
+    def test_first_chunk_is_bounded_and_arguments_are_checked_eagerly(self) -> None:
+        matrix = _symbol(40, "lazy")
+        chunks = iter_svg_chunks(matrix, 4, "#FFFFFF", "#000000", chunk_size=1024)
+        first = next(chunks)
+        self.assertTrue(first.startswith(b'<?xml version="1.0"'))
+        self.assertEqual(len(first), 1024)
+        rest = b"".join(chunks)
+        expected = render_svg(matrix, 4, "#FFFFFF", "#000000").encode("utf-8")
+        self.assertEqual(first + rest, expected)
+        with self.assertRaises(ValueError):
+            iter_svg_chunks(matrix, 4, "#FFFFFF", "#000000", "squares")
+        with self.assertRaises(ValueError):
+            iter_svg_chunks(matrix, 4, "#FFFFFF", "#000000", chunk_size=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import io
 import unittest
 from xml.etree import ElementTree
 
+from qrcodegen import QrCode, QrSegment
 from qr_contract import GenerationRequest
 from qr_core import generate, warning_codes
 from tests.helpers import (
@@ -105,6 +107,52 @@ class SvgAndIndependentDecodeTests(unittest.TestCase):
         self.assertEqual(result.version, 32)
         self.assertEqual(decode_svg(result.svg), payload)
 
+    def test_mixed_mode_payloads_decode_exactly_from_smaller_symbols(self) -> None:
+        payloads = [
+            "https://EXAMPLE.COM/T/0012345678",
+            "WIFI:T:WPA;S:cafe;P:8392017465930281746550192837;;",
+            "ORDER 20240917000123 SHIPS TO DOCK 7",
+        ]
+        for payload in payloads:
+            with self.subTest(payload=payload):
+                result = generate(GenerationRequest("text", {"text": payload}))
+                byte_mode = QrCode.encode_segments(
+                    [QrSegment.make_bytes(payload.encode("utf-8"))], QrCode.Ecc.MEDIUM
+                )
+                self.assertLess(result.version, byte_mode.get_version())
+                self.assertEqual(decode_svg(result.svg), payload)
+
+    def test_fast_mask_selection_decodes_every_catalog_fixture(self) -> None:
+        for fixture in self.catalog["payloads"]:
+            with self.subTest(fixture=fixture["id"]):
+                result = self._generate_fixture(fixture, mask_selection="fast")
+                self.assertEqual(result.mask_selection, "fast")
+                self.assertEqual(decode_svg(result.svg), fixture["expected"])
+
+    def test_compact_svg_paths_decode_every_catalog_fixture(self) -> None:
+        for svg_path in ("runs", "outline"):
+            for fixture in self.catalog["payloads"]:
+                with self.subTest(svg_path=svg_path, fixture=fixture["id"]):
+                    result = self._generate_fixture(fixture, svg_path=svg_path)
+                    self.assertNotIn(" ", result.svg.split(' d="')[1])
+                    self.assertEqual(decode_svg(result.svg), fixture["expected"])
+
+    def test_png_and_pbm_output_decode_every_catalog_fixture(self) -> None:
+        import zxingcpp
+        from PIL import Image
+
+        for fixture in self.catalog["payloads"]:
+            result = self._generate_fixture(fixture, foreground="#0D47A1")
+            for name, chunks in (
+                ("png", result.png_chunks(4)),
+                ("pbm", result.pbm_chunks(4)),
+            ):
+                with self.subTest(fixture=fixture["id"], format=name):
+                    with Image.open(io.BytesIO(b"".join(chunks))) as image:
+                        barcode = zxingcpp.read_barcode(image.convert("L"))
+                    self.assertIsNotNone(barcode)
+                    self.assertEqual(barcode.text, fixture["expected"])
+
     def test_evidence_matrix_for_contrast_polarity_and_quiet_zone(self) -> None:
         cases = [
             ({}, ()),